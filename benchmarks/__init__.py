@@ -0,0 +1 @@
+"""Benchmark suite for the data factory engine, run with python -m benchmarks"""
@@ -0,0 +1,74 @@
+"""
+Command line of the benchmark suite.
+
+Run the benchmarks and write their results:
+    python -m benchmarks run --output benchmarks/results/current.json [--quick] [--only pipeline,dataset]
+
+Compare two result files, exiting with status 1 if any benchmark regressed:
+    python -m benchmarks compare benchmarks/results/baseline.json benchmarks/results/current.json --threshold 0.1
+"""
+
+import argparse
+import sys
+from benchmarks import bench_dataset, bench_handoff, bench_orchestrator, bench_pipeline
+from benchmarks.harness import compare_results, write_results
+
+SUITES = {
+    "pipeline": bench_pipeline,
+    "orchestrator": bench_orchestrator,
+    "handoff": bench_handoff,
+    "dataset": bench_dataset,
+}
+
+
+def main(argv: list = None) -> int:
+    """
+    Run the command line.
+
+    Parameters:
+    - argv (list, optional): Command line arguments, defaults to sys.argv.
+
+    Returns:
+    int: The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write their results.")
+    run_parser.add_argument("--output", default="benchmarks/results/current.json")
+    run_parser.add_argument("--quick", action="store_true", help="Smaller sizes, for a smoke run.")
+    run_parser.add_argument("--only", default="", help=f"Comma-separated suites among {', '.join(SUITES)}.")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Relative slowdown flagged as a regression."
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        regressions = compare_results(args.baseline, args.current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        return 0
+
+    names = [name for name in args.only.split(",") if name] or list(SUITES)
+    unknown = set(names) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}.")
+    results = {}
+    for name in names:
+        print(f"Running {name} benchmarks...")
+        suite_results = SUITES[name].run(args.quick)
+        for benchmark, result in suite_results.items():
+            print(f"  {benchmark}: {result['median_seconds'] * 1e3:.3f} ms ({result['per_unit_seconds'] * 1e6:.3f} us/unit)")
+        results.update(suite_results)
+    write_results(results, args.output, args.quick)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Benchmarks of Dataset location building and expansion throughput"""
+
+from benchmarks.harness import measure
+from data_factory.dataset import Dataset, DatasetType
+
+
+def run(quick: bool) -> dict:
+    """
+    Time single location builds and partition grid expansions.
+
+    Parameters:
+    - quick (bool): If True, expand a smaller grid.
+
+    Returns:
+    dict: Benchmark name -> result, per location.
+    """
+    dataset = Dataset(
+        "bench_dataset", "/mnt/lake/<SOURCE>/<YEAR>/<MONTH>/<DAY>/data.csv", DatasetType.FILE
+    )
+    n_calls = 10_000
+    results = {
+        "dataset.build_location": measure(
+            lambda: [
+                dataset.build_parametrized_data_location(SOURCE="sales", YEAR=2024, MONTH=1, DAY=i)
+                for i in range(n_calls)
+            ],
+            units=n_calls,
+        )
+    }
+
+    days = 31
+    sources = 4 if quick else 40
+    grid = {
+        "SOURCE": [f"source_{i}" for i in range(sources)],
+        "YEAR": [2023, 2024],
+        "MONTH": list(range(1, 13)),
+        "DAY": list(range(1, days + 1)),
+    }
+    n_locations = sources * 2 * 12 * days
+    results["dataset.expand_locations"] = measure(
+        lambda: dataset.expand_data_locations(grid), units=n_locations
+    )
+    results["dataset.expand_locations.existing_only"] = measure(
+        lambda: dataset.expand_data_locations(grid, existing_only=True), units=n_locations
+    )
+    return results
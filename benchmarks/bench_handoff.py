@@ -0,0 +1,45 @@
+"""Benchmarks of the cost of handing activity outputs over to worker processes, by payload size"""
+
+import pickle
+from benchmarks.harness import measure
+from data_factory.handoff import OutputType, SharedMemoryHandoff
+
+
+def pickle_round_trip(payload: dict):
+    """Hand an output over the way process pools do by default."""
+    pickle.loads(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def shared_memory_round_trip(payload: dict, outputs: dict):
+    """Hand an output over through shared memory, reading it back in place."""
+    exported = SharedMemoryHandoff.export_outputs(payload, outputs, min_bytes=0)
+    handles = pickle.loads(pickle.dumps(SharedMemoryHandoff.handles(exported)))
+    for handle in handles:
+        buffer = SharedMemoryHandoff.attach(handle)
+        buffer.release()
+    SharedMemoryHandoff.release_attached()
+    SharedMemoryHandoff.unlink(handles)
+
+
+def run(quick: bool) -> dict:
+    """
+    Time pickled and shared memory handoffs of BYTES outputs from 1 KiB to 64 MiB.
+
+    Parameters:
+    - quick (bool): If True, stop at 1 MiB.
+
+    Returns:
+    dict: Benchmark name -> result, per byte.
+    """
+    sizes = (1 << 10, 1 << 20) if quick else (1 << 10, 1 << 16, 1 << 20, 1 << 24, 1 << 26)
+    outputs = {"data": OutputType.BYTES}
+    results = {}
+    for size in sizes:
+        payload = {"data": bytes(size)}
+        results[f"handoff.pickle.{size}"] = measure(
+            lambda payload=payload: pickle_round_trip(payload), units=size
+        )
+        results[f"handoff.shared_memory.{size}"] = measure(
+            lambda payload=payload: shared_memory_round_trip(payload, outputs), units=size
+        )
+    return results
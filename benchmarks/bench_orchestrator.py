@@ -0,0 +1,44 @@
+"""Benchmarks of PipelineOrchestrator scaling with the number of pipelines"""
+
+from benchmarks.harness import measure
+from data_factory.pipeline import Activity, Pipeline
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+
+
+def noop() -> None:
+    """Activity doing nothing, so only the orchestration overhead is timed."""
+
+
+def run(quick: bool) -> dict:
+    """
+    Time orchestrators of 1 to 10k single-activity pipelines, sequentially and on a thread pool.
+
+    Parameters:
+    - quick (bool): If True, stop at 100 pipelines.
+
+    Returns:
+    dict: Benchmark name -> result.
+    """
+    sizes = (1, 10, 100) if quick else (1, 10, 100, 1000, 10000)
+    results = {}
+    for n_pipelines in sizes:
+        pipelines = [
+            Pipeline(f"pipeline_{i}", activities=[Activity("work", noop, timeout_seconds=None)])
+            for i in range(n_pipelines)
+        ]
+        repeat = 3 if n_pipelines >= 1000 else 5
+        results[f"orchestrator.construct.{n_pipelines}"] = measure(
+            lambda pipelines=pipelines: PipelineOrchestrator(pipelines),
+            repeat=repeat,
+            units=n_pipelines,
+        )
+        orchestrator = PipelineOrchestrator(pipelines)
+        results[f"orchestrator.sequential.{n_pipelines}"] = measure(
+            orchestrator.run_pipelines, repeat=repeat, units=n_pipelines
+        )
+        results[f"orchestrator.thread_pool.{n_pipelines}"] = measure(
+            lambda orchestrator=orchestrator: orchestrator.run_pipelines(max_workers=8),
+            repeat=repeat,
+            units=n_pipelines,
+        )
+    return results
@@ -0,0 +1,72 @@
+"""Benchmarks of the per-activity framework overhead of Pipeline.run"""
+
+from benchmarks.harness import measure
+from data_factory.executor import ExecutorType
+from data_factory.pipeline import Activity, Pipeline
+
+
+def passthrough(df_spark: int = 0, **parameters) -> dict:
+    """Activity forwarding its previous output, so only the framework overhead is timed."""
+    return {"df_spark": df_spark + len(parameters)}
+
+
+def run(quick: bool) -> dict:
+    """
+    Time pipelines of pass-through activities, per activity.
+
+    Parameters:
+    - quick (bool): If True, run fewer activities and rounds.
+
+    Returns:
+    dict: Benchmark name -> result.
+    """
+    n_activities = 100 if quick else 1000
+    repeat = 3 if quick else 5
+    results = {}
+
+    for label, timeout_seconds in (("inline", None), ("thread_watchdog", 3600)):
+        pipeline = Pipeline(
+            "bench_sequential",
+            activities=[
+                Activity(
+                    f"activity_{i}",
+                    passthrough,
+                    timeout_seconds=timeout_seconds,
+                    parameters={"batch": 0, "source": "bench"},
+                )
+                for i in range(n_activities)
+            ],
+            parameters={"batch": 1},
+        )
+        results[f"pipeline.sequential.{label}"] = measure(
+            pipeline.run, repeat=repeat, units=n_activities
+        )
+        pipeline.compile()
+        results[f"pipeline.sequential.{label}.compiled"] = measure(
+            pipeline.run, repeat=repeat, units=n_activities
+        )
+
+    names = [f"activity_{i}" for i in range(n_activities * 100)]
+    results["pipeline.construct.activities"] = measure(
+        lambda: [Activity(name, passthrough, parameters={"batch": 0}) for name in names],
+        repeat=repeat,
+        units=len(names),
+    )
+    results["pipeline.construct.activities.bulk"] = measure(
+        lambda: Activity.bulk(names, passthrough, parameters=[{"batch": 0} for _ in names]),
+        repeat=repeat,
+        units=len(names),
+    )
+
+    # Fan-out DAG: one root, every other activity depends on it
+    activities = [Activity("root", passthrough, timeout_seconds=None)] + [
+        Activity(f"activity_{i}", passthrough, timeout_seconds=None, depends_on=["root"])
+        for i in range(n_activities - 1)
+    ]
+    pipeline = Pipeline("bench_dag", activities=activities)
+    results["pipeline.dag.thread_pool"] = measure(
+        lambda: pipeline.run(max_workers=8, executor_type=ExecutorType.THREAD),
+        repeat=repeat,
+        units=n_activities,
+    )
+    return results
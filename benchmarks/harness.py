@@ -0,0 +1,104 @@
+"""Timing, result files and regression comparison of the benchmark suite"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+def measure(func: callable, repeat: int = 5, number: int = 1, units: int = 1) -> dict:
+    """
+    Time a function.
+
+    Parameters:
+    - func (callable): The function to time, called without arguments.
+    - repeat (int, optional): Number of timed rounds, the median and minimum are reported.
+    - number (int, optional): Number of calls per round.
+    - units (int, optional): Units of work per call, for instance activities per pipeline run.
+
+    Returns:
+    dict: The median and minimum seconds per call, the median seconds per unit and the timing settings.
+    """
+    func()  # warm up imports, caches and thread pools
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    median = statistics.median(timings)
+    return {
+        "median_seconds": median,
+        "min_seconds": min(timings),
+        "per_unit_seconds": median / units,
+        "units": units,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def write_results(results: dict, path: str, quick: bool):
+    """
+    Write benchmark results to a JSON file, with the environment they were measured in.
+
+    Parameters:
+    - results (dict): Benchmark name -> result of measure.
+    - path (str): Path of the file.
+    - quick (bool): Whether the results come from a quick run.
+
+    Returns:
+    None
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def compare_results(baseline_path: str, current_path: str, threshold: float = 0.1) -> list:
+    """
+    Compare two result files and print the change of every benchmark they share.
+
+    Parameters:
+    - baseline_path (str): Path of the baseline results.
+    - current_path (str): Path of the current results.
+    - threshold (float, optional): Relative slowdown above which a benchmark regressed. The minimum of the rounds
+      is compared, it is the least disturbed by other load on the machine.
+
+    Returns:
+    list: The names of the regressed benchmarks.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    with open(current_path, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    width = max((len(name) for name in set(baseline) | set(current)), default=0)
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["min_seconds"]
+        after = current[name]["min_seconds"]
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<{width}}  {before * 1e3:12.3f} ms -> {after * 1e3:12.3f} ms  {change:+8.1%}{flag}")
+    for name in sorted(set(current) - set(baseline)):
+        print(f"{name:<{width}}  new")
+    for name in sorted(set(baseline) - set(current)):
+        print(f"{name:<{width}}  missing")
+    return regressions
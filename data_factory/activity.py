@@ -0,0 +1,918 @@
+"""Module for datafactory activities"""
+
+import asyncio
+import copy
+import importlib
+import inspect
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor
+from enum import Enum
+from typing import Any
+from data_factory.cache import ActivityResultCache
+from data_factory.cancellation import CANCELLATION_TOKEN_PARAMETER, CancellationToken, OperationCanceledError
+from data_factory.handoff import OUTPUT_TYPE_CHECKS, OutputType, SharedMemoryHandoff
+from data_factory.metrics import MetricsProbe
+from data_factory.profiling import ActivityProfile
+from data_factory.resources import ResourceRequest
+from data_factory.spill import SpillStore
+from data_factory.status import PipelineRunStatus
+from data_factory.utils.validation_utils import StringUtils
+
+
+class DependencyCondition(Enum):
+    """Enum representing the upstream outcomes an activity dependency can be conditioned on."""
+
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    COMPLETED = "Completed"
+    SKIPPED = "Skipped"
+
+
+DEPENDENCY_CONDITION_STATUSES = {
+    DependencyCondition.SUCCEEDED: {PipelineRunStatus.SUCCEEDED},
+    DependencyCondition.FAILED: {PipelineRunStatus.FAILED, PipelineRunStatus.TIMED_OUT},
+    DependencyCondition.COMPLETED: {
+        PipelineRunStatus.SUCCEEDED,
+        PipelineRunStatus.FAILED,
+        PipelineRunStatus.TIMED_OUT,
+    },
+    DependencyCondition.SKIPPED: {PipelineRunStatus.SKIPPED},
+}
+
+
+class TimeoutMode(Enum):
+    """
+    Enum representing how an activity action is supervised against its timeout.
+
+    THREAD detects an overrun, ends the activity as TIMED_OUT and cancels the token of the run, so actions
+    declaring a cancellation_token parameter can stop; other actions keep running in their abandoned thread
+    until they return. PROCESS terminates the worker process and is the mode enforcing timeouts.
+    """
+
+    THREAD = "Thread"
+    PROCESS = "Process"
+
+
+class ActivityTimeoutError(TimeoutError):
+    """Raised by the watchdog when an activity action overruns its timeout."""
+
+
+class LazyAction:
+    """
+    Action referenced by its dotted path, imported the first time it is called.
+
+    Declaring activities with lazy actions does not import their modules, so definitions of many pipelines
+    load without the import cost of actions that never run. Lazy actions are pickled as their path.
+    """
+
+    __slots__ = ("path", "_module_name", "_attribute", "_target")
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize LazyAction instance.
+
+        Parameters:
+        - path (str): "package.module.function", or "package.module:Class.method" for nested attributes.
+
+        Raises:
+        - ValueError: If the path has no module or no attribute.
+
+        Returns:
+        None
+        """
+        module_name, separator, attribute = path.partition(":")
+        if not separator:
+            module_name, _, attribute = path.rpartition(".")
+        if not module_name or not attribute:
+            raise ValueError(
+                f"Invalid action path '{path}', expected 'package.module.function' or 'package.module:attribute'."
+            )
+        self.path = path
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def __getstate__(self) -> str:
+        return self.path
+
+    def __setstate__(self, state: str):
+        self.__init__(state)
+
+    def __repr__(self) -> str:
+        return f"LazyAction({self.path!r})"
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def resolve(self) -> callable:
+        """
+        Import the action, once.
+
+        Raises:
+        - ImportError: If the module cannot be imported.
+        - AttributeError: If the module has no such attribute.
+
+        Returns:
+        callable: The action.
+        """
+        if self._target is None:
+            target = importlib.import_module(self._module_name)
+            for name in self._attribute.split("."):
+                target = getattr(target, name)
+            self._target = target
+        return self._target
+
+
+def resolve_action(action: Any) -> callable:
+    """
+    Get the callable of an action, importing lazy actions.
+
+    Parameters:
+    - action (callable | LazyAction): The action of an activity.
+
+    Returns:
+    callable: The action.
+    """
+    return action.resolve() if isinstance(action, LazyAction) else action
+
+
+def _call_action(action: callable, parameters: dict) -> Any:
+    """
+    Call an activity action, running coroutine actions to completion on a fresh event loop.
+
+    Spilled outputs passed as parameters are read back here, in the thread or process calling the action.
+
+    Parameters:
+    - action (callable): The action of the activity, a function or an async function.
+    - parameters (dict): The parameters to be passed to the action.
+
+    Returns:
+    Any: The output of the action.
+    """
+    action = resolve_action(action)
+    parameters = SpillStore.resolve(parameters)
+    if inspect.iscoroutinefunction(action):
+        return asyncio.run(action(**parameters))
+    return action(**parameters)
+
+
+def _run_action_in_process(action: callable, parameters: dict, sender, profile: ActivityProfile = None) -> None:
+    """
+    Run an activity action in a supervised worker process and send its outcome back to the watchdog.
+
+    Parameters:
+    - action (callable): The action of the activity.
+    - parameters (dict): The parameters to be passed to the action.
+    - sender (Connection): Pipe end used to send (succeeded, result or error message) to the watchdog.
+    - profile (ActivityProfile, optional): If set, the action is profiled in the worker process.
+
+    Returns:
+    None
+    """
+    try:
+        if profile is None:
+            outcome = (True, _call_action(action, parameters))
+        else:
+            outcome = (True, profile.call(_call_action, action, parameters))
+    except Exception as e:  # pylint: disable=W0718
+        outcome = (False, str(e))
+    try:
+        sender.send(outcome)
+    except Exception as e:  # pylint: disable=W0718
+        sender.send((False, f"Activity output could not be sent back from the worker process: {e}"))
+    finally:
+        sender.close()
+
+
+class Activity:
+    """Class representing an activity in a pipeline."""
+
+    # Compact records, large generated pipelines hold 100k+ activities
+    __slots__ = (
+        "name",
+        "action",
+        "timeout_seconds",
+        "timeout_mode",
+        "parameters",
+        "depends_on",
+        "cache",
+        "outputs",
+        "inputs",
+        "run_status",
+        "failure_reason",
+        "cache_hit",
+        "collect_metrics",
+        "queued_at",
+        "metrics",
+        "resources",
+        "profile",
+        "cancellation_token",
+        "_action_cpu_seconds",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        action: callable,
+        timeout_seconds: int = 3600,
+        parameters: dict = None,
+        depends_on: Any = None,
+        timeout_mode: TimeoutMode = TimeoutMode.THREAD,
+        cache: ActivityResultCache = None,
+        outputs: dict = None,
+        inputs: dict = None,
+        resources: ResourceRequest = None,
+    ) -> None:
+        """
+        Initialize Activity instance.
+
+        Parameters:
+        - name (str): The name of the activity.
+        - action (callable | str): The Python function to be executed as the activity, or an async function.
+          A dotted path is wrapped in a LazyAction and only imported when the activity runs.
+        - timeout_seconds (int): The maximum time (in seconds) the activity is allowed to run before timing out.
+          None disables the timeout and runs the action inline, without a watchdog thread.
+        - parameters (dict): The parameters to be passed to the activity.
+        - depends_on (list | dict): Upstream activity names, or a dict mapping upstream activity names to a
+          DependencyCondition (or list of them). A plain list of names means DependencyCondition.SUCCEEDED.
+        - timeout_mode (TimeoutMode): How the action is supervised. THREAD runs it in a watchdog-joined daemon
+          thread, which is abandoned on timeout: the cancellation_token passed to the action is canceled, an
+          action ignoring it keeps running, with whatever it holds, until it returns. PROCESS runs it in a worker
+          process, which is terminated on timeout, and is the mode to use for enforceable timeouts. The action, its
+          parameters and its output must then be picklable.
+        - cache (ActivityResultCache, optional): Opt-in result cache. When set, a run whose action and resolved
+          parameters match a cached run returns the cached output without calling the action.
+        - outputs (dict, optional): Named outputs of the activity, name -> OutputType. The action returns a dict
+          holding every named output, checked against its declared type.
+        - inputs (dict, optional): Parameters bound to named outputs of earlier activities,
+          parameter name -> "<activity name>.<output name>".
+        - resources (ResourceRequest, optional): Resources the activity holds while it runs, when its pipeline
+          has a ResourceBudget. Defaults to one CPU slot.
+
+        Returns:
+        None
+        """
+        if not StringUtils.validate_snake_case(name):
+            raise ValueError(f"The name '{name}' is not in snake_case.")
+        self.name = name
+        self.action = LazyAction(action) if isinstance(action, str) else action
+        self.timeout_seconds = timeout_seconds
+        if not isinstance(timeout_mode, TimeoutMode):
+            raise ValueError(
+                f"Invalid timeout_mode. Allowed modes are {', '.join(mode.value for mode in TimeoutMode)}."
+            )
+        self.timeout_mode = timeout_mode
+        self.parameters = parameters or {}
+        self.depends_on = self._normalize_depends_on(depends_on)
+        self.cache = cache
+        self.outputs = self._validate_outputs_declaration(outputs or {})
+        self.inputs = self._parse_inputs(inputs or {})
+        if resources is not None and not isinstance(resources, ResourceRequest):
+            raise ValueError(f"resources must be a ResourceRequest, got {type(resources).__name__}.")
+        self.resources = resources
+        # Set by the pipeline when a MetricsRecorder collects the metrics of its activities
+        self.collect_metrics = False
+        # Set by the pipeline for the duration of a run given a CancellationToken
+        self.cancellation_token = None
+        self._reset_run_state()
+
+    def _reset_run_state(self):
+        """Reset the state of the last run, which copies of the activity do not share."""
+        self.run_status = None
+        self.failure_reason = None
+        self.cache_hit = False
+        self.queued_at = None
+        self.metrics = None
+        # Set by the pipeline when an ActivityProfiler selects the run
+        self.profile = None
+        self._action_cpu_seconds = None
+
+    @classmethod
+    def bulk(
+        cls,
+        names: list,
+        action: callable,
+        parameters: list = None,
+        timeout_seconds: int = 3600,
+        depends_on: Any = None,
+        timeout_mode: TimeoutMode = TimeoutMode.THREAD,
+        cache: ActivityResultCache = None,
+        outputs: dict = None,
+        inputs: dict = None,
+        resources: ResourceRequest = None,
+    ) -> list:
+        """
+        Create many activities running the same action, for instance one per partition of a backfill.
+
+        The names are validated in one pass and the shared declarations are validated once, by the first
+        activity. The activities share their normalized depends_on, outputs and inputs, which must not be
+        modified. Subclasses of Activity take other arguments and create their activities one by one.
+
+        Parameters:
+        - names (list): The names of the activities.
+        - action (callable | str): The action of every activity, see Activity.__init__.
+        - parameters (list, optional): The parameters of every activity, in the order of names.
+        - timeout_seconds, depends_on, timeout_mode, cache, outputs, inputs, resources: Shared by every
+          activity, see Activity.__init__.
+
+        Raises:
+        - TypeError: If called on a subclass of Activity.
+        - ValueError: If a name is not in snake_case, names and parameters differ in length or a shared
+          declaration is invalid.
+
+        Returns:
+        list: The activities, in the order of names.
+        """
+        if cls is not Activity:
+            raise TypeError(f"{cls.__name__}.bulk is not supported, create the activities with {cls.__name__}().")
+        names = list(names)
+        invalid_names = StringUtils.invalid_snake_case(names)
+        if invalid_names:
+            raise ValueError(f"The name '{invalid_names[0]}' is not in snake_case.")
+        parameters = [None] * len(names) if parameters is None else list(parameters)
+        if len(parameters) != len(names):
+            raise ValueError(
+                f"Got {len(parameters)} parameters for {len(names)} activities, expected one per activity."
+            )
+        if not names:
+            return []
+        # The first activity validates the shared declarations, the others copy its slots without running __init__
+        prototype = Activity(
+            names[0],
+            action,
+            timeout_seconds=timeout_seconds,
+            parameters=parameters[0],
+            depends_on=depends_on,
+            timeout_mode=timeout_mode,
+            cache=cache,
+            outputs=outputs,
+            inputs=inputs,
+            resources=resources,
+        )
+        activities = [prototype]
+        state = [(slot, getattr(prototype, slot)) for slot in Activity.__slots__]
+        new_activity = object.__new__
+        for index in range(1, len(names)):
+            activity = new_activity(Activity)
+            for slot, value in state:
+                setattr(activity, slot, value)
+            activity.name = names[index]
+            activity.parameters = parameters[index] or {}
+            activities.append(activity)
+        return activities
+
+    @staticmethod
+    def _normalize_depends_on(depends_on: Any) -> dict:
+        """
+        Normalize a depends_on declaration into a dict of upstream activity name -> tuple of conditions.
+
+        Args:
+        - depends_on (list | dict): The depends_on declaration.
+
+        Raises:
+        - ValueError: If a condition is not a valid DependencyCondition.
+
+        Returns:
+        dict: The normalized dependencies.
+        """
+        if not depends_on:
+            return {}
+        if not isinstance(depends_on, dict):
+            depends_on = {name: DependencyCondition.SUCCEEDED for name in depends_on}
+
+        normalized = {}
+        for upstream_name, conditions in depends_on.items():
+            if isinstance(conditions, DependencyCondition):
+                conditions = (conditions,)
+            conditions = tuple(conditions)
+            if not conditions or not all(isinstance(c, DependencyCondition) for c in conditions):
+                raise ValueError(
+                    f"Invalid dependency condition for '{upstream_name}'. Allowed conditions are "
+                    f"{', '.join(condition.value for condition in DependencyCondition)}."
+                )
+            normalized[upstream_name] = conditions
+        return normalized
+
+    @staticmethod
+    def _validate_outputs_declaration(outputs: dict) -> dict:
+        """
+        Validate the declared named outputs.
+
+        Args:
+        - outputs (dict): Output name -> OutputType.
+
+        Raises:
+        - ValueError: If an output name is not in snake_case or its type is not a valid OutputType.
+
+        Returns:
+        dict: The declared named outputs.
+        """
+        for output_name, output_type in outputs.items():
+            if not StringUtils.validate_snake_case(output_name):
+                raise ValueError(f"The output name '{output_name}' is not in snake_case.")
+            if not isinstance(output_type, OutputType):
+                raise ValueError(
+                    f"Invalid type for output '{output_name}'. Allowed types are "
+                    f"{', '.join(type_.value for type_ in OutputType)}."
+                )
+        return outputs
+
+    @staticmethod
+    def _parse_inputs(inputs: dict) -> dict:
+        """
+        Parse the input bindings into parameter name -> (activity name, output name).
+
+        Args:
+        - inputs (dict): Parameter name -> "<activity name>.<output name>".
+
+        Raises:
+        - ValueError: If a binding is not of the form "<activity name>.<output name>".
+
+        Returns:
+        dict: The parsed input bindings.
+        """
+        parsed = {}
+        for parameter, reference in inputs.items():
+            producer, _, output_name = str(reference).partition(".")
+            if not producer or not output_name:
+                raise ValueError(
+                    f"Invalid input binding '{reference}' for parameter '{parameter}', "
+                    "expected '<activity name>.<output name>'."
+                )
+            parsed[parameter] = (producer, output_name)
+        return parsed
+
+    def check_outputs(self, result: Any):
+        """
+        Check that the output of a run holds every declared named output with its declared type.
+
+        Parameters:
+        - result (dict): The output of the action.
+
+        Raises:
+        - ValueError: If a named output is missing or has the wrong type.
+
+        Returns:
+        None
+        """
+        if not self.outputs:
+            return
+        if not isinstance(result, dict):
+            raise ValueError(
+                f"Activity '{self.name}' declares outputs {list(self.outputs)} but returned {type(result).__name__}."
+            )
+        for output_name, output_type in self.outputs.items():
+            if output_name not in result:
+                raise ValueError(f"Activity '{self.name}' did not return its output '{output_name}'.")
+            if not OUTPUT_TYPE_CHECKS[output_type](result[output_name]):
+                raise ValueError(
+                    f"Output '{output_name}' of activity '{self.name}' is a {type(result[output_name]).__name__}, "
+                    f"expected {output_type.value}."
+                )
+
+    def dependencies_met(self, upstream_statuses: dict) -> bool:
+        """
+        Check whether the run statuses of the upstream activities satisfy the dependency conditions.
+
+        Conditions declared for the same upstream activity are alternatives, all upstream activities must match.
+
+        Parameters:
+        - upstream_statuses (dict): Upstream activity name -> PipelineRunStatus.
+
+        Returns:
+        bool: True if the activity should run, False if it should be skipped.
+        """
+        return all(
+            any(
+                upstream_statuses[upstream_name] in DEPENDENCY_CONDITION_STATUSES[condition]
+                for condition in conditions
+            )
+            for upstream_name, conditions in self.depends_on.items()
+        )
+
+    def run(self, parameters: dict = None):
+        """
+        Run the activity.
+
+        Executes the associated Python function (activity) under a timeout watchdog and updates the run status
+        and failure reason. An action overrunning timeout_seconds ends with PipelineRunStatus.TIMED_OUT, only
+        TimeoutMode.PROCESS also stops the action, see TimeoutMode.
+        With a cache, a cached output is returned without calling the action and cache_hit is set.
+        If collect_metrics is set, the metrics of the run are kept in metrics. If profile is set, the action is
+        profiled, see ActivityProfiler. If cancellation_token is canceled, the run ends with
+        PipelineRunStatus.CANCELED, see CancellationToken.
+
+        Parameters:
+        - parameters (dict, optional): Parameters of this run, defaults to the parameters of the activity.
+
+        Returns:
+        None
+        """
+        probe = MetricsProbe(self.queued_at) if self.collect_metrics else None
+        if parameters is None:
+            parameters = self.parameters
+        result = None
+        # Runs in a watchdog-joined thread get their own token, canceled when they time out
+        in_thread = self.timeout_seconds is not None and self.timeout_mode == TimeoutMode.THREAD
+        token = CancellationToken(parent=self.cancellation_token) if in_thread else self.cancellation_token
+        try:
+            self._start_run()
+            cache_key, self.cache_hit, result = self._cache_lookup(parameters)
+            if not self.cache_hit:
+                parameters = self._action_parameters(parameters, token)
+                if self.timeout_seconds is None:
+                    result = self._call_action_timed(parameters)
+                elif self.timeout_mode == TimeoutMode.PROCESS:
+                    result = self._run_in_process(parameters)
+                else:
+                    result = self._run_in_thread(parameters, token)
+                self.check_outputs(result)
+                self._cache_store(cache_key, result)
+            self.run_status = PipelineRunStatus.SUCCEEDED
+            return result
+
+        except ActivityTimeoutError as e:
+            self.run_status = PipelineRunStatus.TIMED_OUT
+            self.failure_reason = str(e)
+            return None
+
+        except OperationCanceledError as e:
+            self.run_status = PipelineRunStatus.CANCELED
+            self.failure_reason = str(e)
+            return None
+
+        except Exception as e:  # pylint: disable=W0718
+            self.run_status = PipelineRunStatus.FAILED
+            self.failure_reason = str(e)
+            return None
+
+        finally:
+            if in_thread:
+                token.detach()
+            self._finish_metrics(probe, result)
+
+    async def arun(self, executor: Executor = None, parameters: dict = None):
+        """
+        Run the activity on the running event loop.
+
+        Async actions are awaited on the loop, cancelled if they overrun timeout_seconds. Sync actions are
+        offloaded with Activity.run to the executor, which enforces the timeout with timeout_mode.
+        Updates the run status and failure reason.
+
+        Parameters:
+        - executor (Executor, optional): Executor for sync actions, defaults to the loop's default executor.
+        - parameters (dict, optional): Parameters of this run, defaults to the parameters of the activity.
+
+        Returns:
+        None
+        """
+        try:
+            action = resolve_action(self.action)
+        except Exception:  # pylint: disable=W0718
+            # Lazy actions failing to import fail the run in Activity.run
+            action = None
+        if not inspect.iscoroutinefunction(action):
+            return await asyncio.get_running_loop().run_in_executor(executor, self.run, parameters)
+        if parameters is None:
+            parameters = self.parameters
+
+        probe = MetricsProbe(self.queued_at) if self.collect_metrics else None
+        result = None
+        try:
+            self._start_run()
+            cache_key, self.cache_hit, result = self._cache_lookup(parameters)
+            if not self.cache_hit:
+                parameters = self._action_parameters(parameters, self.cancellation_token)
+                task = asyncio.ensure_future(action(**SpillStore.resolve(parameters)))
+                done = await self._await_action(task)
+                if not done:
+                    task.cancel()
+                    if self.cancellation_token is not None:
+                        self.cancellation_token.raise_if_canceled()
+                    raise ActivityTimeoutError(self._timeout_message())
+                result = task.result()
+                self.check_outputs(result)
+                self._cache_store(cache_key, result)
+            self.run_status = PipelineRunStatus.SUCCEEDED
+            return result
+
+        except ActivityTimeoutError as e:
+            self.run_status = PipelineRunStatus.TIMED_OUT
+            self.failure_reason = str(e)
+            return None
+
+        except OperationCanceledError as e:
+            self.run_status = PipelineRunStatus.CANCELED
+            self.failure_reason = str(e)
+            return None
+
+        except Exception as e:  # pylint: disable=W0718
+            self.run_status = PipelineRunStatus.FAILED
+            self.failure_reason = str(e)
+            return None
+
+        finally:
+            self._finish_metrics(probe, result)
+
+    async def _await_action(self, task: asyncio.Future) -> set:
+        """Await an async action until it is done, times out or the run is canceled."""
+        if self.cancellation_token is None:
+            done, _ = await asyncio.wait({task}, timeout=self.timeout_seconds)
+            return done
+        loop = asyncio.get_running_loop()
+        canceled = loop.create_future()
+        unregister = self.cancellation_token.on_cancel(
+            lambda: loop.call_soon_threadsafe(lambda: canceled.done() or canceled.set_result(None))
+        )
+        try:
+            await asyncio.wait({task, canceled}, timeout=self.timeout_seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            unregister()
+            canceled.cancel()
+        return {task} if task.done() else set()
+
+    def _action_parameters(self, parameters: dict, token: CancellationToken) -> dict:
+        """
+        Check the cancellation token of the run, passing it to actions declaring a cancellation_token parameter.
+
+        Parameters:
+        - parameters (dict): Parameters of the run.
+        - token (CancellationToken): Token of the run, None if it cannot be canceled.
+
+        Raises:
+        - OperationCanceledError: If the run is canceled.
+
+        Returns:
+        dict: The parameters of the action.
+        """
+        if token is None:
+            return parameters
+        token.raise_if_canceled()
+        try:
+            accepts_token = CANCELLATION_TOKEN_PARAMETER in inspect.signature(resolve_action(self.action)).parameters
+        except (TypeError, ValueError):
+            accepts_token = False
+        return {**parameters, CANCELLATION_TOKEN_PARAMETER: token} if accepts_token else parameters
+
+    def _start_run(self):
+        """Reset the run status of the activity at the start of a run."""
+        self.run_status = PipelineRunStatus.RUNNING
+        self.failure_reason = None
+        self.cache_hit = False
+        self.metrics = None
+        self._action_cpu_seconds = None
+
+    def _finish_metrics(self, probe: MetricsProbe, result: Any):
+        """Keep the metrics of the run measured by the probe, if any, and clear the queue timestamp."""
+        if probe is not None:
+            self.metrics = probe.finish(result, self._action_cpu_seconds)
+        self.queued_at = None
+
+    def _call_action_timed(self, parameters: dict, outcome: dict = None) -> Any:
+        """
+        Call the action in the current thread, measuring the CPU time of the thread.
+
+        The CPU time is kept on the activity, or in outcome["cpu_seconds"] when given, for worker threads that may
+        outlive the run.
+        """
+        started = time.thread_time()
+        try:
+            if self.profile is None:
+                return _call_action(self.action, parameters)
+            return self.profile.call(_call_action, self.action, parameters)
+        finally:
+            cpu_seconds = time.thread_time() - started
+            if outcome is None:
+                self._action_cpu_seconds = cpu_seconds
+            else:
+                outcome["cpu_seconds"] = cpu_seconds
+
+    def _cache_lookup(self, parameters: dict) -> tuple:
+        """
+        Look up the output of the activity in its cache.
+
+        Parameters:
+        - parameters (dict): Parameters of the run.
+
+        Returns:
+        tuple: The cache key (None if the activity has no cache or is not cacheable), whether it is a hit,
+        and the cached output.
+        """
+        if self.cache is None:
+            return None, False, None
+        cache_key = ActivityResultCache.fingerprint(resolve_action(self.action), parameters)
+        if cache_key is None:
+            return None, False, None
+        hit, result = self.cache.get(cache_key)
+        return cache_key, hit, result
+
+    def _cache_store(self, cache_key: str, result: Any):
+        """Store the output of a successful run in the cache, if the activity is cacheable."""
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+
+    def _timeout_message(self) -> str:
+        """Failure reason of an activity that timed out."""
+        return f"Activity '{self.name}' timed out after {self.timeout_seconds} seconds."
+
+    def _run_in_thread(self, parameters: dict, token: CancellationToken) -> Any:
+        """
+        Run the action in a daemon worker thread joined by the watchdog for at most timeout_seconds.
+
+        Threads cannot be preempted, on timeout or cancellation the worker is abandoned and its outcome discarded.
+        On timeout the token of the run is canceled, so actions polling it stop; the others keep running until
+        they return. The abandoned worker only writes to its own outcome, never to the activity.
+
+        Parameters:
+        - parameters (dict): Parameters of the run.
+        - token (CancellationToken): Token of the run, child of the cancellation token of the activity.
+
+        Raises:
+        - ActivityTimeoutError: If the action overruns the timeout.
+        - OperationCanceledError: If the run is canceled before the action is done.
+
+        Returns:
+        Any: The output of the action.
+        """
+        outcome = {}
+        wake = threading.Event()
+
+        def target():
+            try:
+                outcome["result"] = self._call_action_timed(parameters, outcome)
+            except BaseException as e:  # pylint: disable=W0718
+                outcome["error"] = e
+            finally:
+                outcome["done"] = True
+                wake.set()
+
+        worker = threading.Thread(target=target, name=f"activity-{self.name}", daemon=True)
+        unregister = token.on_cancel(wake.set)
+        worker.start()
+        try:
+            wake.wait(self.timeout_seconds)
+        finally:
+            unregister()
+        if "done" not in outcome:
+            token.raise_if_canceled()
+            token.cancel(self._timeout_message())
+            raise ActivityTimeoutError(self._timeout_message())
+        self._action_cpu_seconds = outcome.get("cpu_seconds")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def _run_in_process(self, parameters: dict) -> Any:
+        """
+        Run the action in a worker process supervised by the watchdog, terminating it on timeout.
+
+        Parameters:
+        - parameters (dict): Parameters of the run.
+
+        Raises:
+        - ActivityTimeoutError: If the action overruns the timeout.
+        - OperationCanceledError: If the run is canceled, the worker process is then terminated.
+        - RuntimeError: If the action failed or the worker process died without reporting an outcome.
+
+        Returns:
+        Any: The output of the action.
+        """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(
+            target=_run_action_in_process,
+            args=(self.action, parameters, sender, self.profile),
+            name=f"activity-{self.name}",
+        )
+        worker.start()
+        sender.close()
+        try:
+            if not self._poll_worker(receiver):
+                raise ActivityTimeoutError(self._timeout_message())
+            succeeded, payload = receiver.recv()
+        except EOFError as e:
+            worker.join()
+            raise RuntimeError(
+                f"Activity '{self.name}' worker process exited with code {worker.exitcode}."
+            ) from e
+        finally:
+            receiver.close()
+            if worker.is_alive():
+                worker.join(0.1)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(1)
+            if worker.is_alive():
+                worker.kill()
+                worker.join()
+
+        if not succeeded:
+            raise RuntimeError(payload)
+        return payload
+
+    def _poll_worker(self, receiver) -> bool:
+        """Wait for the outcome of a worker process, checking the cancellation token every 100 ms."""
+        if self.cancellation_token is None:
+            return receiver.poll(self.timeout_seconds)
+        deadline = None if self.timeout_seconds is None else time.monotonic() + self.timeout_seconds
+        while not receiver.poll(0.1 if deadline is None else max(0.0, min(0.1, deadline - time.monotonic()))):
+            self.cancellation_token.raise_if_canceled()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def copy(self, parameters: dict = None) -> "Activity":
+        """
+        Copy the activity with its own parameters and a fresh run state, for runs overlapping with its own.
+
+        The copy shares the action and the declarations of the activity.
+
+        Parameters:
+        - parameters (dict, optional): Parameters updating the parameters of the copy.
+
+        Returns:
+        Activity: The copy.
+        """
+        activity = copy.copy(self)
+        activity.parameters = {**self.parameters, **(parameters or {})}
+        activity._reset_run_state()  # pylint: disable=W0212
+        return activity
+
+    def get_run_status(self):
+        """
+        Get the run status of the activity.
+
+        Returns:
+        str: The run status.
+        """
+        return self.run_status
+
+    def get_failure_reason(self):
+        """
+        Get the failure reason of the activity.
+
+        Returns:
+        str: The failure reason.
+        """
+        return self.failure_reason
+
+    def get_cache_hit(self):
+        """
+        Get whether the output of the last run came from the result cache.
+
+        Returns:
+        bool: True if the last run was a cache hit.
+        """
+        return self.cache_hit
+
+    def get_outcome(self) -> tuple:
+        """
+        Get the outcome of the last run, to be sent back from a worker process.
+
+        Returns:
+        tuple: The run status, the failure reason, whether the run was a cache hit and the metrics of the run.
+        """
+        return self.run_status, self.failure_reason, self.cache_hit, self.metrics
+
+    def set_outcome(self, outcome: tuple):
+        """
+        Apply the outcome of a run that happened on a copy of the activity, for instance in a worker process.
+
+        Parameters:
+        - outcome (tuple): The outcome returned by Activity.get_outcome.
+
+        Returns:
+        None
+        """
+        self.run_status, self.failure_reason, self.cache_hit, self.metrics = outcome
+
+
+def _execute_activity(
+    activity: Activity, share_outputs: bool = False, parameters: dict = None
+) -> tuple:
+    """
+    Run an activity inside an executor worker.
+
+    The activity may be a copy living in a worker process, so its outcome is returned to be applied to the
+    original activity.
+
+    Parameters:
+    - activity (Activity): The activity to run.
+    - share_outputs (bool, optional): If True, the activity runs in a worker process: shared memory handles
+      in its parameters are attached and its large named outputs are handed back through shared memory.
+    - parameters (dict, optional): Parameters of this run, defaults to the parameters of the activity.
+
+    Returns:
+    tuple: The outcome and the output of the activity.
+    """
+    if not share_outputs:
+        result = activity.run(parameters)
+        return activity.get_outcome(), result
+    if parameters is None:
+        activity.parameters = SharedMemoryHandoff.resolve(activity.parameters)
+    else:
+        parameters = SharedMemoryHandoff.resolve(parameters)
+    result = SharedMemoryHandoff.export_outputs(activity.run(parameters), activity.outputs)
+    SharedMemoryHandoff.release_attached()
+    return activity.get_outcome(), result
@@ -0,0 +1,317 @@
+"""Module for memoizing activity results"""
+
+import datetime
+import decimal
+import enum
+import hashlib
+import os
+import pathlib
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+from typing import Any
+from data_factory.utils.general_utils import Utils
+
+
+class ActivityResultCache:
+    """
+    Opt-in result cache for activities, keyed by a fingerprint of the action and its resolved parameters.
+
+    Results are kept in an in-memory LRU tier bounded by max_entries, and optionally in an on-disk tier of
+    pickled files shared across runs and processes. Entries older than ttl_seconds are evicted from both tiers.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, ttl_seconds: float = None, disk_path: str = None
+    ) -> None:
+        """
+        Initialize ActivityResultCache instance.
+
+        Parameters:
+        - max_entries (int): Maximum number of results kept in memory, least recently used are evicted first.
+        - ttl_seconds (float, optional): Time to live of an entry, None keeps entries until evicted.
+        - disk_path (str, optional): Directory of the on-disk tier, None disables it.
+          See ActivityResultCache.default_disk_path for a location under the configured data root.
+
+        Returns:
+        None
+        """
+        if max_entries < 0:
+            raise ValueError(f"max_entries must not be negative, got {max_entries}.")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Pickle the cache settings only, copies sent to worker processes start with an empty memory tier."""
+        state = self.__dict__.copy()
+        state["_entries"] = OrderedDict()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        """Restore a pickled cache with a fresh lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_disk_path() -> str:
+        """
+        Get the default location of the on-disk tier, under the configured data root.
+
+        Returns:
+        str: The directory of the on-disk tier.
+        """
+        return os.path.join(Utils.get_config()["path_mount_delta_lake"], "activity_cache")
+
+    @staticmethod
+    def fingerprint(action: callable, parameters: dict) -> str:
+        """
+        Compute the cache key of an action called with the given parameters.
+
+        The key covers the qualified name of the action, its code version (the cache_version attribute of
+        the action if set, otherwise a digest of its bytecode and constants), its default arguments and closure
+        variables, and its parameters. Values are encoded canonically, sets and dict keys sorted, so keys are
+        stable across processes and runs, see _canonical for the supported types.
+
+        Parameters:
+        - action (callable): The action of the activity.
+        - parameters (dict): The resolved parameters of the activity.
+
+        Returns:
+        str: The cache key, or None if the parameters, default arguments or closure variables hold a value
+        without a canonical encoding and the result is not cacheable.
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            f"{getattr(action, '__module__', '')}.{getattr(action, '__qualname__', repr(action))}".encode()
+        )
+        code_version = getattr(action, "cache_version", None)
+        if code_version is not None:
+            digest.update(str(code_version).encode())
+        elif getattr(action, "__code__", None) is not None:
+            _update_code_digest(digest, action.__code__)
+
+        try:
+            digest.update(_canonical(_bound_state(action)))
+            digest.update(_canonical(parameters))
+        except TypeError:
+            return None
+        return digest.hexdigest()
+
+    def get(self, key: str) -> tuple:
+        """
+        Look up a result, from memory first and from disk otherwise.
+
+        Parameters:
+        - key (str): The cache key.
+
+        Returns:
+        tuple: (True, result) on a hit, (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_expired(entry[0]):
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    return True, entry[1]
+
+        if self.disk_path is None:
+            return False, None
+        file_path = self._disk_file_path(key)
+        try:
+            with open(file_path, "rb") as f:
+                created_at, result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        if self._is_expired(created_at):
+            self._remove_file(file_path)
+            return False, None
+        self._set_memory(key, created_at, result)
+        return True, result
+
+    def set(self, key: str, result: Any):
+        """
+        Store a result in memory, and on disk if the on-disk tier is enabled.
+
+        Parameters:
+        - key (str): The cache key.
+        - result (Any): The result of the activity.
+
+        Returns:
+        None
+        """
+        created_at = time.time()
+        self._set_memory(key, created_at, result)
+        if self.disk_path is None:
+            return
+        file_path = self._disk_file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_file_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_file_path, "wb") as f:
+                pickle.dump((created_at, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file_path, file_path)
+        except Exception:  # pylint: disable=W0718
+            # Results that cannot be pickled are only cached in memory
+            self._remove_file(tmp_file_path)
+
+    def clear(self):
+        """
+        Remove every entry from the memory tier.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of results in the memory tier."""
+        return len(self._entries)
+
+    def _set_memory(self, key: str, created_at: float, result: Any):
+        """Store an entry in the memory tier, evicting the least recently used entries over max_entries."""
+        with self._lock:
+            self._entries[key] = (created_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _is_expired(self, created_at: float) -> bool:
+        """Check whether an entry created at created_at is older than ttl_seconds."""
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _disk_file_path(self, key: str) -> str:
+        """Path of the on-disk entry of a key."""
+        return os.path.join(self.disk_path, key[:2], f"{key}.pkl")
+
+    @staticmethod
+    def _remove_file(file_path: str):
+        """Remove a file, ignoring missing files."""
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def _update_code_digest(digest: Any, code: CodeType):
+    """
+    Update a digest with the bytecode and constants of a code object and of its nested code objects.
+
+    Parameters:
+    - digest (hashlib hash): The digest to update.
+    - code (CodeType): The code object.
+
+    Returns:
+    None
+    """
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _update_code_digest(digest, const)
+            continue
+        try:
+            # Frozenset constants, of `in {...}` tests, are not in a stable order
+            digest.update(_canonical(const))
+        except TypeError:
+            digest.update(repr(const).encode())
+
+
+def _bound_state(action: callable) -> tuple:
+    """
+    Get the values an action is bound to besides its parameters: its default arguments and closure variables.
+
+    Parameters:
+    - action (callable): The action of the activity.
+
+    Returns:
+    tuple: The default arguments, the keyword-only default arguments and the closure variable values.
+    """
+    cells = []
+    for cell in getattr(action, "__closure__", None) or ():
+        try:
+            cells.append(cell.cell_contents)
+        except ValueError:
+            # Closure variable not assigned yet
+            cells.append(None)
+    return getattr(action, "__defaults__", None), getattr(action, "__kwdefaults__", None), tuple(cells)
+
+
+# Values encoded as their repr, which is stable across processes for these types
+_REPR_TYPES = (
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    datetime.tzinfo,
+    decimal.Decimal,
+    uuid.UUID,
+    pathlib.PurePath,
+)
+
+
+def _canonical(value: Any) -> bytes:
+    """
+    Encode a value to bytes that only depend on the value, unlike pickles whose set order depends on the hash seed.
+
+    Supported values are None, booleans, numbers, strings, bytes-like objects, dates, times, decimals, UUIDs,
+    paths, enum members, importable functions, classes and modules, and lists, tuples, dicts, sets and
+    frozensets of them. Sets and dicts are encoded in the order of their encoded items and keys.
+
+    Parameters:
+    - value (Any): The value.
+
+    Raises:
+    - TypeError: If the value, or a value it contains, is not supported.
+
+    Returns:
+    bytes: The encoding, prefixed with the type so equal encodings of different types do not collide.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str)):
+        return _tagged(type(value).__name__, repr(value).encode())
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _tagged("bytes", bytes(value))
+    if isinstance(value, enum.Enum):
+        return _tagged("enum", f"{_reference(type(value))}.{value.name}".encode())
+    if isinstance(value, _REPR_TYPES):
+        return _tagged(type(value).__name__, repr(value).encode())
+    if isinstance(value, (list, tuple)):
+        return _tagged(type(value).__name__, b"".join(_canonical(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return _tagged(type(value).__name__, b"".join(sorted(_canonical(item) for item in value)))
+    if isinstance(value, dict):
+        items = sorted(_canonical(key) + _canonical(item) for key, item in value.items())
+        return _tagged("dict", b"".join(items))
+    if isinstance(value, (FunctionType, BuiltinFunctionType, type)):
+        return _tagged("reference", _reference(value).encode())
+    if isinstance(value, ModuleType):
+        return _tagged("module", value.__name__.encode())
+    if hasattr(value, "__array_interface__"):
+        # NumPy arrays and other buffers are encoded with their layout, besides their raw content
+        interface = value.__array_interface__
+        layout = repr((type(value).__qualname__, interface["typestr"], interface["shape"]))
+        try:
+            return _tagged("array", layout.encode() + bytes(memoryview(value)))
+        except (TypeError, ValueError, BufferError) as e:
+            raise TypeError(f"Array of type {type(value).__name__} has no canonical encoding.") from e
+    raise TypeError(f"Values of type {type(value).__name__} have no canonical encoding.")
+
+
+def _tagged(tag: str, payload: bytes) -> bytes:
+    """Prefix an encoding with its type and length, so concatenated encodings are unambiguous."""
+    return f"{tag}:{len(payload)}:".encode() + payload
+
+
+def _reference(value: Any) -> str:
+    """Importable name of a function or class, the way pickle references them."""
+    name = f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', '')}"
+    if "<" in name:
+        raise TypeError(f"{name} is not importable and has no canonical encoding.")
+    return name
@@ -0,0 +1,131 @@
+"""Module for the cooperative cancellation of orchestrator, pipeline and activity runs"""
+
+import threading
+
+# Parameter of the actions receiving the cancellation token of their run
+CANCELLATION_TOKEN_PARAMETER = "cancellation_token"
+
+
+class OperationCanceledError(Exception):
+    """Exception raised by CancellationToken.raise_if_canceled, ending the activity run as CANCELED."""
+
+
+class CancellationToken:
+    """
+    Token signaling that a run is canceled, shared by an orchestrator, its pipelines and their activities.
+
+    Canceling the token drops the pending activities, activities already running end as CANCELED: their
+    watchdog stops waiting for them, terminating their worker process in TimeoutMode.PROCESS. Actions
+    declaring a cancellation_token parameter receive the token and may poll it to stop early.
+
+    Tokens are process local, a copy sent to another process keeps the state it had when it was sent.
+    """
+
+    def __init__(self, parent: "CancellationToken" = None) -> None:
+        """
+        Initialize CancellationToken instance.
+
+        Parameters:
+        - parent (CancellationToken, optional): Token whose cancellation cancels this one, not the other way around.
+          Call detach once the run of this token is done, so a long-lived parent does not keep it alive.
+
+        Returns:
+        None
+        """
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._unregister_parent = (
+            parent.on_cancel(lambda: self.cancel(parent.reason)) if parent is not None else lambda: None
+        )
+
+    def __getstate__(self) -> tuple:
+        return self._event.is_set(), self.reason
+
+    def __setstate__(self, state: tuple):
+        self.__init__()
+        canceled, reason = state
+        if canceled:
+            self.cancel(reason)
+
+    @property
+    def is_canceled(self) -> bool:
+        """Whether the token is canceled."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Canceled by the caller."):
+        """
+        Cancel the token, later calls are ignored.
+
+        Parameters:
+        - reason (str, optional): Why the run is canceled, reported as the failure reason of the canceled activities.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def detach(self):
+        """
+        Stop following the parent token, its later cancellation no longer cancels this one.
+
+        Returns:
+        None
+        """
+        self._unregister_parent()
+
+    def raise_if_canceled(self):
+        """
+        Raise if the token is canceled.
+
+        Raises:
+        - OperationCanceledError: If the token is canceled.
+
+        Returns:
+        None
+        """
+        if self._event.is_set():
+            raise OperationCanceledError(f"Canceled: {self.reason}")
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for the token to be canceled.
+
+        Parameters:
+        - timeout (float, optional): Maximum time to wait, in seconds.
+
+        Returns:
+        bool: True if the token is canceled.
+        """
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: callable) -> callable:
+        """
+        Register a callback called once when the token is canceled, at once if it already is.
+
+        Parameters:
+        - callback (callable): Function without arguments, called in the thread canceling the token.
+
+        Returns:
+        callable: Function unregistering the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: callable):
+        """Unregister a callback, if it was not called yet."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
@@ -0,0 +1,131 @@
+"""Module for checkpointing pipeline runs"""
+
+import os
+import pickle
+import shutil
+import uuid
+from typing import Any
+from data_factory.utils.general_utils import Utils
+
+
+class CheckpointStore:
+    """
+    Store of the succeeded activities of pipeline runs, used to resume failed runs.
+
+    Every succeeded activity is pickled with its parameters and output to
+    <root_path>/<pipeline name>/<run id>/<activity name>.pkl.
+    """
+
+    def __init__(self, root_path: str = None) -> None:
+        """
+        Initialize CheckpointStore instance.
+
+        Parameters:
+        - root_path (str, optional): Root directory of the run directories, defaults to
+          CheckpointStore.default_root_path().
+
+        Returns:
+        None
+        """
+        self.root_path = root_path or self.default_root_path()
+
+    @staticmethod
+    def default_root_path() -> str:
+        """
+        Get the default root directory of the checkpoints, under the configured data root.
+
+        Returns:
+        str: The root directory.
+        """
+        return os.path.join(Utils.get_config()["path_mount_delta_lake"], "checkpoints")
+
+    def run_path(self, pipeline_name: str, run_id: str) -> str:
+        """
+        Get the directory holding the checkpoints of a pipeline run.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the run.
+
+        Returns:
+        str: The run directory.
+        """
+        return os.path.join(self.root_path, pipeline_name, run_id)
+
+    def save(
+        self,
+        pipeline_name: str,
+        run_id: str,
+        activity_name: str,
+        parameters: dict,
+        output: Any,
+    ) -> bool:
+        """
+        Checkpoint a succeeded activity, writing the file atomically.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the run.
+        - activity_name (str): The name of the succeeded activity.
+        - parameters (dict): The parameters the activity was given.
+        - output (Any): The output of the activity.
+
+        Returns:
+        bool: True if the checkpoint was written, False if the parameters or output cannot be pickled.
+        """
+        run_path = self.run_path(pipeline_name, run_id)
+        os.makedirs(run_path, exist_ok=True)
+        file_path = os.path.join(run_path, f"{activity_name}.pkl")
+        tmp_file_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_file_path, "wb") as f:
+                pickle.dump(
+                    {"parameters": parameters, "output": output},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_file_path, file_path)
+            return True
+        except Exception:  # pylint: disable=W0718
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+            return False
+
+    def load(self, pipeline_name: str, run_id: str) -> dict:
+        """
+        Load the checkpoints of a pipeline run.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the run.
+
+        Raises:
+        - ValueError: If the run has no checkpoint directory.
+
+        Returns:
+        dict: Activity name -> {"parameters": ..., "output": ...} for every checkpointed activity.
+        """
+        run_path = self.run_path(pipeline_name, run_id)
+        if not os.path.isdir(run_path):
+            raise ValueError(f"No checkpoints found for pipeline '{pipeline_name}' run '{run_id}'.")
+
+        checkpoints = {}
+        for file_name in os.listdir(run_path):
+            if not file_name.endswith(".pkl"):
+                continue
+            with open(os.path.join(run_path, file_name), "rb") as f:
+                checkpoints[file_name[: -len(".pkl")]] = pickle.load(f)
+        return checkpoints
+
+    def clear(self, pipeline_name: str, run_id: str):
+        """
+        Remove the checkpoints of a pipeline run.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the run.
+
+        Returns:
+        None
+        """
+        shutil.rmtree(self.run_path(pipeline_name, run_id), ignore_errors=True)
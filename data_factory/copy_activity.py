@@ -0,0 +1,309 @@
+"""Module for the Copy activity, moving data from an HttpEndpoint linked service to a FILE dataset"""
+
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from enum import Enum
+from urllib.parse import urlencode
+from data_factory.activity import Activity, TimeoutMode
+from data_factory.cache import ActivityResultCache
+from data_factory.dataset import Dataset, DatasetType
+from data_factory.handoff import OutputType
+from data_factory.http_client import HttpConnectionPool, HttpError
+from data_factory.linked_service import LinkedService
+
+
+class CopyMode(Enum):
+    """Enum representing how a Copy activity requests the source data."""
+
+    # Parallel Range requests, or a single stream when the endpoint does not support ranges
+    RANGED = "Ranged"
+    # Parallel requests of consecutive pages, until an empty page
+    PAGINATED = "Paginated"
+
+
+COPY_OUTPUTS = {
+    "path": OutputType.ANY,
+    "bytes_copied": OutputType.ANY,
+    "duration_seconds": OutputType.ANY,
+    "throughput_bytes_per_second": OutputType.ANY,
+}
+
+
+class CopyActivity(Activity):
+    """
+    Activity copying the data of an HttpEndpoint linked service to the local file of a FILE dataset.
+
+    The data is streamed to a temporary file next to the destination in fixed-size buffers and renamed over
+    the destination once complete, so readers never see a partial file. The activity returns COPY_OUTPUTS,
+    the throughput included, as named outputs.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        name: str,
+        source: LinkedService,
+        sink: Dataset,
+        relative_url: str = "",
+        mode: CopyMode = CopyMode.RANGED,
+        parallel_copies: int = 4,
+        block_size: int = 8 << 20,
+        buffer_size: int = 1 << 16,
+        page_parameter: str = "page",
+        first_page: int = 1,
+        max_pages: int = None,
+        timeout_seconds: int = 3600,
+        parameters: dict = None,
+        depends_on=None,
+        timeout_mode: TimeoutMode = TimeoutMode.THREAD,
+        cache: ActivityResultCache = None,
+        inputs: dict = None,
+    ) -> None:
+        """
+        Initialize CopyActivity instance.
+
+        Parameters:
+        - name (str): The name of the activity.
+        - source (LinkedService): The HttpEndpoint linked service to copy from.
+        - sink (Dataset): The FILE dataset to copy to.
+        - relative_url (str, optional): URL of the data, relative to the connection string of the source.
+        - mode (CopyMode, optional): How the data is requested.
+        - parallel_copies (int, optional): Maximum number of requests in flight.
+        - block_size (int, optional): Size of the byte range of every request, for CopyMode.RANGED.
+        - buffer_size (int, optional): Size of the buffer the data is streamed through.
+        - page_parameter (str, optional): Query parameter holding the page number, for CopyMode.PAGINATED.
+        - first_page (int, optional): Number of the first page, for CopyMode.PAGINATED.
+        - max_pages (int, optional): Maximum number of pages, for CopyMode.PAGINATED.
+        - timeout_seconds (int): The maximum time (in seconds) the copy is allowed to run.
+        - parameters (dict, optional): Key-value pairs to replace placeholders in the data location of the sink.
+        - depends_on (dict | list, optional): Upstream activities, see Activity.
+        - timeout_mode (TimeoutMode, optional): How the action is supervised against the timeout, see TimeoutMode.
+        - cache (ActivityResultCache, optional): Cache of the activity outputs, see Activity.
+        - inputs (dict, optional): Parameters bound to named outputs of upstream activities, see Activity.
+
+        Raises:
+        - ValueError: If the sink is not a FILE dataset or the copy settings are invalid.
+
+        Returns:
+        None
+        """
+        if not isinstance(mode, CopyMode):
+            raise ValueError(
+                f"Invalid mode. Allowed modes are {', '.join(mode_.value for mode_ in CopyMode)}."
+            )
+        if sink.dataset_type != DatasetType.FILE:
+            raise ValueError(f"Dataset '{sink.name}' is not a {DatasetType.FILE.value} dataset.")
+        for setting, value in (
+            ("parallel_copies", parallel_copies),
+            ("block_size", block_size),
+            ("buffer_size", buffer_size),
+        ):
+            if value < 1:
+                raise ValueError(f"{setting} must be a positive integer, got {value}.")
+        copy_parameters = {
+            "source": source,
+            "sink": sink,
+            "relative_url": relative_url,
+            "mode": mode,
+            "parallel_copies": parallel_copies,
+            "block_size": block_size,
+            "buffer_size": buffer_size,
+            "page_parameter": page_parameter,
+            "first_page": first_page,
+            "max_pages": max_pages,
+        }
+        super().__init__(
+            name,
+            copy_http_to_file,
+            timeout_seconds=timeout_seconds,
+            parameters={**copy_parameters, **(parameters or {})},
+            depends_on=depends_on,
+            timeout_mode=timeout_mode,
+            cache=cache,
+            outputs=COPY_OUTPUTS,
+            inputs=inputs,
+        )
+
+
+def copy_http_to_file(
+    source: LinkedService,
+    sink: Dataset,
+    relative_url: str = "",
+    mode: CopyMode = CopyMode.RANGED,
+    parallel_copies: int = 4,
+    block_size: int = 8 << 20,
+    buffer_size: int = 1 << 16,
+    page_parameter: str = "page",
+    first_page: int = 1,
+    max_pages: int = None,
+    **kwargs,
+) -> dict:
+    """
+    Copy the data of an HttpEndpoint linked service to the local file of a FILE dataset, see CopyActivity.
+
+    Parameters:
+    - kwargs: Key-value pairs to replace placeholders in the data location of the sink, others are ignored.
+
+    Raises:
+    - HttpError: If the source answers with an error status.
+    - ValueError: If the source returns less data than announced.
+
+    Returns:
+    dict: The destination path, bytes copied, duration and throughput of the copy.
+    """
+    started = time.perf_counter()
+    path = sink.build_parametrized_data_location(**kwargs)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    pool = source.get_http_client()
+    try:
+        if mode == CopyMode.PAGINATED:
+            bytes_copied = _copy_pages(
+                pool, relative_url, temp_path, parallel_copies, page_parameter, first_page, max_pages, buffer_size
+            )
+        else:
+            bytes_copied = _copy_ranges(
+                pool, relative_url, temp_path, parallel_copies, block_size, buffer_size
+            )
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    duration = time.perf_counter() - started
+    return {
+        "path": path,
+        "bytes_copied": bytes_copied,
+        "duration_seconds": duration,
+        "throughput_bytes_per_second": bytes_copied / duration if duration > 0 else 0.0,
+    }
+
+
+def _copy_ranges(
+    pool: HttpConnectionPool,
+    url: str,
+    temp_path: str,
+    parallel_copies: int,
+    block_size: int,
+    buffer_size: int,
+) -> int:
+    """Copy a resource with parallel Range requests written at their offsets, or as a single stream."""
+    head = pool.request("HEAD", url)
+    head.raise_for_status()
+    size = int(head.headers.get("content-length") or 0)
+    supports_ranges = head.headers.get("accept-ranges", "").lower() == "bytes"
+    if not supports_ranges or size <= block_size:
+        with open(temp_path, "wb", buffering=0) as f:
+            return _stream_to_file(pool, url, None, f, buffer_size)
+
+    with open(temp_path, "wb") as f:
+        f.truncate(size)
+    blocks = [(start, min(start + block_size, size)) for start in range(0, size, block_size)]
+
+    def copy_block(block: tuple) -> int:
+        start, end = block
+        with open(temp_path, "r+b", buffering=0) as f:
+            f.seek(start)
+            return _stream_to_file(pool, url, (start, end), f, buffer_size)
+
+    with ThreadPoolExecutor(max_workers=min(parallel_copies, len(blocks))) as executor:
+        return sum(executor.map(copy_block, blocks))
+
+
+def _stream_to_file(pool: HttpConnectionPool, url: str, byte_range: tuple, f, buffer_size: int) -> int:
+    """Stream a resource, or one byte range of it, to the current position of a file through one buffer."""
+    headers = {"Range": f"bytes={byte_range[0]}-{byte_range[1] - 1}"} if byte_range else None
+    expected_status = 206 if byte_range else 200
+    with pool.stream("GET", url, headers) as response:
+        if response.status != expected_status:
+            raise HttpError(response.status, response.read(200))
+        copied = _copy_body(response, f, buffer_size)
+    if byte_range and copied != byte_range[1] - byte_range[0]:
+        raise ValueError(
+            f"Range {byte_range} of '{url}' returned {copied} bytes, expected {byte_range[1] - byte_range[0]}."
+        )
+    return copied
+
+
+def _copy_body(response, f, buffer_size: int) -> int:
+    """Copy the body of a streamed response to the current position of a file through one buffer."""
+    buffer = memoryview(bytearray(buffer_size))
+    copied = 0
+    while True:
+        read = response.readinto(buffer)
+        if not read:
+            return copied
+        f.write(buffer[:read])
+        copied += read
+
+
+def _stream_page(pool: HttpConnectionPool, url: str, part_path: str, buffer_size: int, required: bool) -> int:
+    """Stream one page to a part file, returning its size, 0 for a missing page unless it is required."""
+    with pool.stream("GET", url) as response:
+        if response.status in (204, 404) and not required:
+            return 0
+        if response.status != 200:
+            raise HttpError(response.status, response.read(200))
+        with open(part_path, "wb", buffering=0) as f:
+            return _copy_body(response, f, buffer_size)
+
+
+def _copy_pages(
+    pool: HttpConnectionPool,
+    url: str,
+    temp_path: str,
+    parallel_copies: int,
+    page_parameter: str,
+    first_page: int,
+    max_pages: int,
+    buffer_size: int,
+) -> int:
+    """
+    Copy consecutive pages, streamed parallel_copies at a time to part files appended in page order.
+
+    Pages are streamed through buffers of buffer_size, no page is held in memory. The copy stops at the first
+    empty or missing page, a missing first page raises HttpError.
+    """
+    separator = "&" if "?" in url else "?"
+    copied = 0
+    page = first_page
+    last_page = first_page + max_pages - 1 if max_pages else None
+    with open(temp_path, "wb") as f, ThreadPoolExecutor(max_workers=parallel_copies) as executor:
+        while last_page is None or page <= last_page:
+            window_end = page + parallel_copies
+            if last_page is not None:
+                window_end = min(window_end, last_page + 1)
+            window = range(page, window_end)
+            parts = [f"{temp_path}.{number}.part" for number in window]
+            futures = [
+                executor.submit(
+                    _stream_page,
+                    pool,
+                    f"{url}{separator}{urlencode({page_parameter: number})}",
+                    part,
+                    buffer_size,
+                    number == first_page,
+                )
+                for number, part in zip(window, parts)
+            ]
+            try:
+                for part, future in zip(parts, futures):
+                    size = future.result()
+                    if not size:
+                        return copied
+                    with open(part, "rb") as page_file:
+                        shutil.copyfileobj(page_file, f, buffer_size)
+                    copied += size
+            finally:
+                # Pages after a missing page or a failed one are still being written
+                wait(futures)
+                for part in parts:
+                    if os.path.exists(part):
+                        os.remove(part)
+            page += len(window)
+    return copied
@@ -0,0 +1,205 @@
+"""Module for the activity dependency graph of a pipeline"""
+
+from collections import deque
+from typing import Any
+
+
+class ActivityDag:
+    """Directed acyclic graph of the activities of a pipeline, built from their depends_on declarations."""
+
+    def __init__(self, activities: list) -> None:
+        """
+        Initialize ActivityDag instance.
+
+        Parameters:
+        - activities (list): List of activities, each optionally declaring depends_on.
+
+        Raises:
+        - ValueError: If activity names are duplicated, a dependency is unknown, the graph has a cycle or an
+          input is bound to an output of an activity that is not upstream.
+
+        Returns:
+        None
+        """
+        self.activities = {}
+        for activity in activities:
+            if activity.name in self.activities:
+                raise ValueError(f"Duplicate activity name found: {activity.name}")
+            self.activities[activity.name] = activity
+
+        self.upstream = {name: list(activity.depends_on) for name, activity in self.activities.items()}
+        self.downstream = {name: [] for name in self.activities}
+        for name, upstream_names in self.upstream.items():
+            for upstream_name in upstream_names:
+                if upstream_name not in self.activities:
+                    raise ValueError(
+                        f"Activity '{name}' depends on unknown activity '{upstream_name}'."
+                    )
+                if upstream_name == name:
+                    raise ValueError(f"Activity '{name}' cannot depend on itself.")
+                self.downstream[upstream_name].append(name)
+
+        self.order = self._topological_order()
+        self.index = {name: i for i, name in enumerate(self.order)}
+        self._validate_input_bindings()
+
+    def _validate_input_bindings(self):
+        """
+        Check that activities only bind outputs of their (transitive) upstream activities, which are done
+        by the time they run.
+
+        Raises:
+        - ValueError: If an input is bound to an activity that is not upstream.
+
+        Returns:
+        None
+        """
+        for name, activity in self.activities.items():
+            if not activity.inputs:
+                continue
+            ancestors = set()
+            stack = list(self.upstream[name])
+            while stack:
+                upstream_name = stack.pop()
+                if upstream_name not in ancestors:
+                    ancestors.add(upstream_name)
+                    stack.extend(self.upstream[upstream_name])
+            for param, (producer, _) in activity.inputs.items():
+                if producer not in ancestors:
+                    raise ValueError(
+                        f"Input '{param}' of activity '{name}' is bound to activity '{producer}', "
+                        "which is not upstream of it."
+                    )
+
+    def _topological_order(self) -> list:
+        """
+        Compute a topological order of the activities (Kahn's algorithm).
+
+        Raises:
+        - ValueError: If the dependency graph contains a cycle.
+
+        Returns:
+        list: Activity names, every activity listed after all of its upstream activities.
+        """
+        in_degree = {name: len(upstream) for name, upstream in self.upstream.items()}
+        ready = deque(name for name, degree in in_degree.items() if degree == 0)
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for downstream_name in self.downstream[name]:
+                in_degree[downstream_name] -= 1
+                if in_degree[downstream_name] == 0:
+                    ready.append(downstream_name)
+
+        if len(order) != len(self.activities):
+            cyclic = sorted(name for name, degree in in_degree.items() if degree > 0)
+            raise ValueError(f"Dependency cycle found between activities: {', '.join(cyclic)}")
+        return order
+
+    def roots(self) -> list:
+        """
+        Get the activities without upstream dependencies.
+
+        Returns:
+        list: Names of the activities that are ready to run at the start of the pipeline.
+        """
+        return [name for name in self.order if not self.upstream[name]]
+
+
+class ActivityDagRun:
+    """
+    Scheduling state of one run of an ActivityDag.
+
+    The output of an activity is kept until all its downstream activities are done, then it is released.
+    """
+
+    def __init__(self, dag: ActivityDag, skipped_status: Any) -> None:
+        """
+        Initialize ActivityDagRun instance.
+
+        Parameters:
+        - dag (ActivityDag): The activity graph being run.
+        - skipped_status (PipelineRunStatus): Status recorded for activities whose dependency conditions are not met.
+
+        Returns:
+        None
+        """
+        self.dag = dag
+        self.skipped_status = skipped_status
+        self.statuses = {}
+        self.outputs = {}
+        self.pending_upstream = {name: len(upstream) for name, upstream in dag.upstream.items()}
+        self.pending_downstream = {name: len(downstream) for name, downstream in dag.downstream.items()}
+        self.ready = deque(dag.roots())
+
+    def previous_output(self, name: str) -> dict:
+        """
+        Merge the outputs of the succeeded upstream activities of an activity.
+
+        Outputs are merged in depends_on order whatever the order the upstream activities finished in. On fan-in,
+        a key output by several upstream activities is silently overwritten: the later entry of depends_on wins.
+        Give the outputs distinct names, or declare inputs, to keep them all.
+
+        Parameters:
+        - name (str): The activity name.
+
+        Returns:
+        dict: The merged outputs, later upstream activities in depends_on overriding earlier ones.
+        """
+        previous_output = {}
+        for upstream_name in self.dag.upstream[name]:
+            previous_output.update(self.outputs.get(upstream_name) or {})
+        return previous_output
+
+    def complete(self, name: str, status: Any, output: Any = None) -> list:
+        """
+        Record the outcome of an activity and release its downstream activities.
+
+        Downstream activities whose upstream activities are all done become ready if their dependency
+        conditions are met, and are skipped otherwise, which in turn may release their own downstream activities.
+
+        Parameters:
+        - name (str): The activity name.
+        - status (PipelineRunStatus): The run status of the activity.
+        - output (dict, optional): The output of the activity, passed on to its downstream activities.
+
+        Returns:
+        list: Names of the activities skipped as a consequence.
+        """
+        self.statuses[name] = status
+        if output is not None and self.pending_downstream[name]:
+            self.outputs[name] = output
+
+        skipped = []
+        done = [name]
+        while done:
+            done_name = done.pop()
+            self._release_upstream_outputs(done_name)
+            for downstream_name in self.dag.downstream[done_name]:
+                self.pending_upstream[downstream_name] -= 1
+                if self.pending_upstream[downstream_name] > 0:
+                    continue
+                if self.dag.activities[downstream_name].dependencies_met(self.statuses):
+                    self.ready.append(downstream_name)
+                else:
+                    self.statuses[downstream_name] = self.skipped_status
+                    skipped.append(downstream_name)
+                    done.append(downstream_name)
+        return skipped
+
+    def _release_upstream_outputs(self, name: str):
+        """Release the outputs of the upstream activities of a done activity that no other activity needs."""
+        for upstream_name in self.dag.upstream[name]:
+            self.pending_downstream[upstream_name] -= 1
+            if not self.pending_downstream[upstream_name]:
+                self.outputs.pop(upstream_name, None)
+
+    def is_done(self) -> bool:
+        """
+        Check whether every activity of the graph has a final status.
+
+        Returns:
+        bool: True if the run is done.
+        """
+        return len(self.statuses) == len(self.dag.activities)
@@ -1,9 +1,17 @@
 """Module for datafactory dataset"""
 
+import itertools
+import os
+import re
 from enum import Enum
+from data_factory.executor import ExecutorFactory, ExecutorType
+from data_factory.utils.file_utils import FileUtils
 from data_factory.utils.validation_utils import StringUtils
 
 
+PLACEHOLDER_PATTERN = re.compile(r"<([A-Z0-9_]+)>")
+
+
 class DatasetType(Enum):
     """Dataset Types"""
 
@@ -11,6 +19,13 @@ class DatasetType(Enum):
     # DATABASE = "Database"
 
 
+class RecordFormat(Enum):
+    """Record layouts supported when splitting FILE datasets into partitions"""
+
+    NEWLINE_DELIMITED = "NewlineDelimited"
+    FIXED_WIDTH = "FixedWidth"
+
+
 class Dataset:
     """Dataset Class"""
 
@@ -34,27 +49,158 @@ class Dataset:
         self.dataset_type = dataset_type
         self.properties = properties or {}
         self.parameters = parameters or {}
+        self._compiled_data_location = None
 
     def build_parametrized_data_location(self, **kwargs):
         """
         Replace placeholders in data_location using key-value pairs in parameters.
 
+        The data_location template is compiled once, placeholders without a matching key are kept as is.
+
         Args:
         - kwargs: Key-value pairs to replace placeholders.
 
         Returns:
         str: The updated data_location.
         """
-        updated_data_location = self.data_location
+        format_string, names = self._compile_data_location()
+        if not names:
+            return self.data_location
+        values = {key.upper(): value for key, value in kwargs.items()}
+        return format_string.format(
+            *(
+                self._placeholder_value(values[name]) if name in values else f"<{name}>"
+                for name in names
+            )
+        )
+
+    def expand_data_locations(self, parameter_grid: dict, existing_only: bool = False) -> list:
+        """
+        Expand a grid of parameter values into data locations in one pass.
+
+        Every combination of the values is expanded, for instance date ranges x regions.
+
+        Args:
+        - parameter_grid (dict): Key -> iterable of values to replace the placeholder of the key with.
+        - existing_only (bool, optional): If True, drop locations that do not exist, checked against cached
+          directory listings so every directory is listed once.
+
+        Returns:
+        list: The data locations, in the order of itertools.product over the grid.
+        """
+        format_string, names = self._compile_data_location()
+        grid = {key.upper(): values for key, values in parameter_grid.items()}
+        value_lists = [
+            [self._placeholder_value(value) for value in grid[name]] if name in grid else [f"<{name}>"]
+            for name in names
+        ]
+        locations = [format_string.format(*combination) for combination in itertools.product(*value_lists)]
+        if existing_only:
+            locations = FileUtils.filter_existing(locations)
+        return locations
+
+    def _compile_data_location(self) -> tuple:
+        """
+        Compile data_location into a positional format string and the placeholder names it holds.
+
+        Returns:
+        tuple: The format string and the placeholder names, in positional order.
+        """
+        if self._compiled_data_location is None or self._compiled_data_location[0] != self.data_location:
+            names = []
+            parts = []
+            position = 0
+            for match in PLACEHOLDER_PATTERN.finditer(self.data_location):
+                parts.append(self._escape_format(self.data_location[position : match.start()]))
+                name = match.group(1)
+                if name not in names:
+                    names.append(name)
+                parts.append(f"{{{names.index(name)}}}")
+                position = match.end()
+            parts.append(self._escape_format(self.data_location[position:]))
+            self._compiled_data_location = (self.data_location, "".join(parts), tuple(names))
+        return self._compiled_data_location[1:]
+
+    @staticmethod
+    def _escape_format(literal: str) -> str:
+        """Escape the braces of a literal part of a format string."""
+        return literal.replace("{", "{{").replace("}", "}}")
+
+    @staticmethod
+    def _placeholder_value(value) -> str:
+        """String a placeholder is replaced with, empty for falsy values."""
+        return str(value) if value else ""
+
+    def partitions(
+        self,
+        num_partitions: int = None,
+        record_format: RecordFormat = RecordFormat.NEWLINE_DELIMITED,
+        record_length: int = None,
+        **kwargs,
+    ) -> list:
+        """
+        Split the local file of a FILE dataset into record-aligned byte ranges.
+
+        Args:
+        - num_partitions (int, optional): Target number of partitions, defaults to the number of CPUs.
+        - record_format (RecordFormat, optional): Record layout of the file.
+        - record_length (int, optional): Length in bytes of every record, for RecordFormat.FIXED_WIDTH.
+        - kwargs: Key-value pairs to replace placeholders in data_location.
 
-        # Replace placeholders using provided key-value pairs
-        for key, value in kwargs.items():
-            placeholder = f"<{key.upper()}>"
-            if placeholder in updated_data_location:
-                if not value:
-                    value = ""
-                updated_data_location = updated_data_location.replace(
-                    placeholder, str(value)
-                )
+        Raises:
+        ValueError: If the dataset is not a FILE dataset or the record format is invalid.
 
-        return updated_data_location
+        Returns:
+        list: (start, end) byte ranges covering the file, each holding whole records.
+        """
+        if self.dataset_type != DatasetType.FILE:
+            raise ValueError(f"Dataset '{self.name}' is not a {DatasetType.FILE.value} dataset.")
+        file_path = self.build_parametrized_data_location(**kwargs)
+        num_partitions = num_partitions or os.cpu_count() or 1
+        if record_format == RecordFormat.NEWLINE_DELIMITED:
+            return FileUtils.split_newline_delimited(file_path, num_partitions)
+        if record_format == RecordFormat.FIXED_WIDTH:
+            return FileUtils.split_fixed_width(file_path, num_partitions, record_length)
+        raise ValueError(
+            f"Invalid record_format. Allowed formats are {', '.join(format_.value for format_ in RecordFormat)}."
+        )
+
+    def map_partitions(
+        self,
+        parser: callable,
+        num_partitions: int = None,
+        max_workers: int = None,
+        record_format: RecordFormat = RecordFormat.NEWLINE_DELIMITED,
+        record_length: int = None,
+        executor_type: ExecutorType = ExecutorType.PROCESS,
+        **kwargs,
+    ) -> list:
+        """
+        Parse the local file of a FILE dataset in parallel, one record-aligned partition per task.
+
+        Every worker memory-maps the file and parses its partition in place, so the whole file is never loaded
+        into memory. The parser receives a memoryview of the partition bytes and must be picklable for the
+        PROCESS executor.
+
+        Args:
+        - parser (callable): Function parsing the bytes of a partition.
+        - num_partitions (int, optional): Target number of partitions, defaults to the number of CPUs.
+        - max_workers (int, optional): Maximum number of partitions parsed at once.
+        - record_format (RecordFormat, optional): Record layout of the file.
+        - record_length (int, optional): Length in bytes of every record, for RecordFormat.FIXED_WIDTH.
+        - executor_type (ExecutorType, optional): Pool parsing the partitions.
+        - kwargs: Key-value pairs to replace placeholders in data_location.
+
+        Returns:
+        list: The output of the parser for every partition, in file order.
+        """
+        file_path = self.build_parametrized_data_location(**kwargs)
+        ranges = self.partitions(num_partitions, record_format, record_length, **kwargs)
+        if not ranges:
+            return []
+        with ExecutorFactory.create(executor_type, max_workers) as executor:
+            futures = [
+                executor.submit(FileUtils.parse_partition, file_path, start, end, parser)
+                for start, end in ranges
+            ]
+            return [future.result() for future in futures]
@@ -0,0 +1,326 @@
+"""Module for loading linked services, datasets and pipelines from JSON or YAML definitions"""
+
+import importlib
+import json
+import os
+from enum import Enum
+from typing import Any
+from data_factory.activity import Activity, DependencyCondition, TimeoutMode
+from data_factory.copy_activity import CopyActivity, CopyMode
+from data_factory.dataset import Dataset, DatasetType
+from data_factory.handoff import OutputType
+from data_factory.linked_service import LinkedService, ServiceType
+from data_factory.pipeline import Pipeline
+
+# File suffix -> format of the definition files
+DEFINITION_FORMATS = {".json": "json", ".yaml": "yaml", ".yml": "yaml"}
+
+
+class ActivityType(Enum):
+    """Enum representing the types of activities in definitions."""
+
+    # Activity running the Python function at its action path
+    PYTHON = "Python"
+    # CopyActivity, its source and sink are names of defined linked services and datasets
+    COPY = "Copy"
+
+
+_COMMON_ACTIVITY_KEYS = {
+    "name",
+    "type",
+    "timeout_seconds",
+    "timeout_mode",
+    "parameters",
+    "depends_on",
+    "inputs",
+}
+_ACTIVITY_KEYS = {
+    ActivityType.PYTHON: _COMMON_ACTIVITY_KEYS | {"action", "outputs"},
+    ActivityType.COPY: _COMMON_ACTIVITY_KEYS
+    | {
+        "source",
+        "sink",
+        "relative_url",
+        "mode",
+        "parallel_copies",
+        "block_size",
+        "buffer_size",
+        "page_parameter",
+        "first_page",
+        "max_pages",
+    },
+}
+_LINKED_SERVICE_KEYS = {"name", "connection_string", "service_type", "properties"}
+_DATASET_KEYS = {"name", "data_location", "dataset_type", "properties", "parameters"}
+_PIPELINE_KEYS = {"name", "parameters", "activities", "compile"}
+_DOCUMENT_KEYS = {"linked_services", "datasets", "pipelines"}
+
+
+class DefinitionLoader:
+    """
+    Loader of linked services, datasets and pipelines declared in JSON or YAML documents.
+
+    A document holds optional "linked_services", "datasets" and "pipelines" lists. Every definition has the
+    arguments of its class, enums are given by value:
+
+        {
+            "linked_services": [{"name": "api", "connection_string": "https://api", "service_type": "HttpEndpoint"}],
+            "datasets": [{"name": "raw", "data_location": "/data/<DAY>/raw.json", "dataset_type": "File"}],
+            "pipelines": [
+                {
+                    "name": "daily",
+                    "activities": [
+                        {"name": "extract", "type": "Copy", "source": "api", "sink": "raw"},
+                        {"name": "load", "action": "jobs.load.run", "depends_on": ["extract"]}
+                    ]
+                }
+            ]
+        }
+
+    Actions are dotted paths, imported when their activity first runs, see LazyAction. Definitions may refer to
+    linked services and datasets of any document loaded in the same call, so a directory of definitions can
+    be loaded in any file order. YAML documents require PyYAML.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize DefinitionLoader instance.
+
+        Returns:
+        None
+        """
+        self.linked_services = {}
+        self.datasets = {}
+        self.pipelines = {}
+
+    def load(self, path: str) -> dict:
+        """
+        Load the definitions of a file, or of every definition file of a directory.
+
+        Parameters:
+        - path (str): Path of a .json, .yaml or .yml file, or of a directory holding such files.
+
+        Raises:
+        - ValueError: If a definition is invalid, refers to an unknown name or redefines a name.
+
+        Returns:
+        dict: The pipelines loaded, name -> Pipeline.
+        """
+        if os.path.isdir(path):
+            paths = [
+                os.path.join(path, file_name)
+                for file_name in sorted(os.listdir(path))
+                if os.path.splitext(file_name)[1].lower() in DEFINITION_FORMATS
+            ]
+        else:
+            paths = [path]
+        return self.load_documents([(self.read_document(path_), path_) for path_ in paths])
+
+    def load_documents(self, documents: list) -> dict:
+        """
+        Load the definitions of parsed documents.
+
+        Parameters:
+        - documents (list): (document, source) pairs, the source naming the document in error messages.
+
+        Raises:
+        - ValueError: If a definition is invalid, refers to an unknown name or redefines a name.
+
+        Returns:
+        dict: The pipelines loaded, name -> Pipeline.
+        """
+        for document, source in documents:
+            if not isinstance(document, dict):
+                raise ValueError(f"The definitions of {source} must be a mapping.")
+            self._check_keys(document, _DOCUMENT_KEYS, f"the definitions of {source}")
+        # Every kind is loaded across all documents before the kinds referring to it
+        for document, source in documents:
+            for definition in document.get("linked_services") or []:
+                self._add(self.linked_services, self._build_linked_service(definition, source))
+        for document, source in documents:
+            for definition in document.get("datasets") or []:
+                self._add(self.datasets, self._build_dataset(definition, source))
+        loaded = {}
+        for document, source in documents:
+            for definition in document.get("pipelines") or []:
+                pipeline = self._build_pipeline(definition, source)
+                self._add(self.pipelines, pipeline)
+                loaded[pipeline.name] = pipeline
+        return loaded
+
+    @staticmethod
+    def read_document(path: str) -> Any:
+        """
+        Parse a definition file.
+
+        Parameters:
+        - path (str): Path of a .json, .yaml or .yml file.
+
+        Raises:
+        - ValueError: If the file is not a definition file.
+        - ImportError: If the file is YAML and PyYAML is not installed.
+
+        Returns:
+        Any: The parsed document.
+        """
+        definition_format = DEFINITION_FORMATS.get(os.path.splitext(path)[1].lower())
+        if definition_format is None:
+            raise ValueError(
+                f"Unsupported definition file '{path}', expected one of {', '.join(DEFINITION_FORMATS)}."
+            )
+        with open(path, "r", encoding="utf-8") as f:
+            if definition_format == "json":
+                return json.load(f)
+            try:
+                yaml = importlib.import_module("yaml")
+            except ImportError as e:
+                raise ImportError(f"PyYAML is required to load the YAML definitions of '{path}'.") from e
+            return yaml.safe_load(f)
+
+    @staticmethod
+    def _add(registry: dict, item: Any):
+        """Register a loaded item, names are unique per kind."""
+        if item.name in registry:
+            raise ValueError(f"Duplicate definition of '{item.name}'.")
+        registry[item.name] = item
+
+    @staticmethod
+    def _check_keys(definition: Any, allowed_keys: set, description: str, required_keys: tuple = ()):
+        """Reject definitions that are not mappings, miss a required key or have unknown keys."""
+        if not isinstance(definition, dict):
+            raise ValueError(f"Invalid {description}, expected a mapping.")
+        unknown = sorted(definition.keys() - allowed_keys)
+        if unknown:
+            raise ValueError(
+                f"Invalid {description}, unknown key '{unknown[0]}'. Allowed keys are {', '.join(sorted(allowed_keys))}."
+            )
+        missing = [key for key in required_keys if key not in definition]
+        if missing:
+            raise ValueError(f"Invalid {description}, missing '{missing[0]}'.")
+
+    @staticmethod
+    def _enum(enum_type: type, value: Any, description: str) -> Enum:
+        """Convert the value of an enum member, with an error listing the allowed values."""
+        try:
+            return enum_type(value)
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid {description} '{value}'. Allowed values are {', '.join(member.value for member in enum_type)}."
+            ) from e
+
+    def _lookup(self, registry: dict, name: str, kind: str, description: str) -> Any:
+        """Get a loaded item by name."""
+        if name not in registry:
+            raise ValueError(f"Invalid {description}, unknown {kind} '{name}'.")
+        return registry[name]
+
+    def _build_linked_service(self, definition: Any, source: str) -> LinkedService:
+        """Build a linked service from its definition."""
+        description = f"linked service definition in {source}"
+        self._check_keys(
+            definition, _LINKED_SERVICE_KEYS, description, ("name", "connection_string", "service_type")
+        )
+        return LinkedService(
+            definition["name"],
+            definition["connection_string"],
+            self._enum(ServiceType, definition["service_type"], f"service_type of {description}"),
+            properties=definition.get("properties"),
+        )
+
+    def _build_dataset(self, definition: Any, source: str) -> Dataset:
+        """Build a dataset from its definition."""
+        description = f"dataset definition in {source}"
+        self._check_keys(definition, _DATASET_KEYS, description, ("name", "data_location", "dataset_type"))
+        return Dataset(
+            definition["name"],
+            definition["data_location"],
+            self._enum(DatasetType, definition["dataset_type"], f"dataset_type of {description}"),
+            properties=definition.get("properties"),
+            parameters=definition.get("parameters"),
+        )
+
+    def _build_pipeline(self, definition: Any, source: str) -> Pipeline:
+        """Build a pipeline and its activities from its definition."""
+        description = f"pipeline definition in {source}"
+        self._check_keys(definition, _PIPELINE_KEYS, description, ("name",))
+        description = f"definition of pipeline '{definition['name']}' in {source}"
+        pipeline = Pipeline(
+            definition["name"],
+            activities=[
+                self._build_activity(activity_definition, description)
+                for activity_definition in definition.get("activities") or []
+            ],
+            parameters=definition.get("parameters"),
+        )
+        if definition.get("compile"):
+            pipeline.compile()
+        return pipeline
+
+    def _build_activity(self, definition: Any, pipeline_description: str) -> Activity:
+        """Build an activity from its definition."""
+        description = f"activity definition of the {pipeline_description}"
+        if not isinstance(definition, dict):
+            raise ValueError(f"Invalid {description}, expected a mapping.")
+        activity_type = self._enum(
+            ActivityType, definition.get("type", ActivityType.PYTHON.value), f"type of {description}"
+        )
+        required_keys = ("name", "action") if activity_type == ActivityType.PYTHON else ("name", "source", "sink")
+        self._check_keys(definition, _ACTIVITY_KEYS[activity_type], description, required_keys)
+        arguments = {
+            key: definition[key]
+            for key in ("timeout_seconds", "parameters", "inputs")
+            if key in definition
+        }
+        if "timeout_mode" in definition:
+            arguments["timeout_mode"] = self._enum(
+                TimeoutMode, definition["timeout_mode"], f"timeout_mode of {description}"
+            )
+        if "depends_on" in definition:
+            arguments["depends_on"] = self._depends_on(definition["depends_on"], description)
+
+        if activity_type == ActivityType.PYTHON:
+            if not isinstance(definition["action"], str):
+                raise ValueError(f"Invalid {description}, action must be a dotted path.")
+            if "outputs" in definition:
+                arguments["outputs"] = {
+                    output_name: self._enum(OutputType, output_type, f"output type of {description}")
+                    for output_name, output_type in definition["outputs"].items()
+                }
+            return Activity(definition["name"], definition["action"], **arguments)
+
+        for key in ("relative_url", "parallel_copies", "block_size", "buffer_size", "page_parameter", "first_page", "max_pages"):
+            if key in definition:
+                arguments[key] = definition[key]
+        if "mode" in definition:
+            arguments["mode"] = self._enum(CopyMode, definition["mode"], f"mode of {description}")
+        return CopyActivity(
+            definition["name"],
+            self._lookup(self.linked_services, definition["source"], "linked service", description),
+            self._lookup(self.datasets, definition["sink"], "dataset", description),
+            **arguments,
+        )
+
+    def _depends_on(self, depends_on: Any, description: str) -> Any:
+        """Convert the conditions of a depends_on definition, given by value."""
+        if not isinstance(depends_on, dict):
+            return depends_on
+        return {
+            upstream: [
+                self._enum(DependencyCondition, condition, f"dependency condition of {description}")
+                for condition in (conditions if isinstance(conditions, list) else [conditions])
+            ]
+            for upstream, conditions in depends_on.items()
+        }
+
+
+def load_definitions(path: str) -> dict:
+    """
+    Load the pipelines declared in a definition file or directory, see DefinitionLoader.
+
+    Parameters:
+    - path (str): Path of a .json, .yaml or .yml file, or of a directory holding such files.
+
+    Returns:
+    dict: The pipelines, name -> Pipeline.
+    """
+    return DefinitionLoader().load(path)
@@ -0,0 +1,40 @@
+"""Module for datafactory executors"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+
+
+class ExecutorType(Enum):
+    """Enum representing the supported executor pool types."""
+
+    THREAD = "Thread"
+    PROCESS = "Process"
+
+
+class ExecutorFactory:
+    """Factory for the bounded pools used to run activities and pipelines concurrently."""
+
+    @staticmethod
+    def create(executor_type: ExecutorType, max_workers: int = None) -> Executor:
+        """
+        Create a bounded executor pool.
+
+        Parameters:
+        - executor_type (ExecutorType): The type of pool to create.
+        - max_workers (int, optional): Maximum number of workers, defaults to the pool's own default.
+
+        Raises:
+        - ValueError: If executor_type is not a valid ExecutorType or max_workers is not positive.
+
+        Returns:
+        Executor: The created executor pool.
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be a positive integer, got {max_workers}.")
+        if executor_type == ExecutorType.THREAD:
+            return ThreadPoolExecutor(max_workers=max_workers)
+        if executor_type == ExecutorType.PROCESS:
+            return ProcessPoolExecutor(max_workers=max_workers)
+        raise ValueError(
+            f"Invalid executor_type. Allowed types are {', '.join(type_.value for type_ in ExecutorType)}."
+        )
@@ -0,0 +1,200 @@
+"""Module for the ForEach activity, running an inner activity or pipeline once per item"""
+
+from typing import Any
+from data_factory.activity import Activity, TimeoutMode
+from data_factory.cancellation import CancellationToken
+from data_factory.dataset import Dataset
+from data_factory.executor import ExecutorFactory, ExecutorType
+from data_factory.handoff import OutputType
+from data_factory.pipeline import Pipeline
+from data_factory.spill import SpillStore
+from data_factory.status import PipelineRunStatus
+
+FOR_EACH_OUTPUTS = {
+    "item_count": OutputType.ANY,
+    "succeeded_count": OutputType.ANY,
+    "failed_count": OutputType.ANY,
+    "statuses": OutputType.ANY,
+    "outputs": OutputType.ANY,
+    "failures": OutputType.ANY,
+}
+
+
+class ForEachActivity(Activity):
+    """
+    Activity running an inner activity or pipeline once per item, up to batch_count items at once.
+
+    The items are a list, the data locations a dataset expands to, or the named output of an upstream activity
+    bound with inputs={"items": "<activity name>.<output name>"}. Every item runs on its own copy of the inner
+    activity or pipeline, with the item passed as the item_parameter parameter. The activity returns
+    FOR_EACH_OUTPUTS as named outputs, the statuses and outputs of the items in item order.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        name: str,
+        inner: Any,
+        items: list = None,
+        dataset: Dataset = None,
+        parameter_grid: dict = None,
+        existing_only: bool = False,
+        item_parameter: str = "item",
+        batch_count: int = 20,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        fail_on_item_failure: bool = True,
+        timeout_seconds: int = 3600,
+        parameters: dict = None,
+        depends_on=None,
+        timeout_mode: TimeoutMode = TimeoutMode.THREAD,
+        inputs: dict = None,
+    ) -> None:
+        """
+        Initialize ForEachActivity instance.
+
+        Parameters:
+        - name (str): The name of the activity.
+        - inner (Activity | Pipeline): The activity or pipeline run for every item.
+        - items (list, optional): The items.
+        - dataset (Dataset, optional): Dataset whose data locations are the items, expanded when the activity
+          runs with Dataset.expand_data_locations.
+        - parameter_grid (dict, optional): Placeholder -> values expanded into the data locations of the dataset.
+        - existing_only (bool, optional): If True, only the existing data locations of the dataset are items.
+        - item_parameter (str, optional): Name of the parameter of the inner activity, or of the pipeline
+          parameter, receiving the item.
+        - batch_count (int, optional): Maximum number of items running at once, 1 runs them sequentially.
+        - executor_type (ExecutorType, optional): Pool the items run on, the inner activity or pipeline, the
+          items and the outputs must be picklable for PROCESS.
+        - fail_on_item_failure (bool, optional): If True, the activity fails when an item does not succeed.
+        - timeout_seconds (int): The maximum time (in seconds) all the items are allowed to run.
+        - parameters (dict, optional): Parameters passed to every item run, besides the item.
+        - depends_on (dict | list, optional): Upstream activities, see Activity.
+        - timeout_mode (TimeoutMode, optional): How the action is supervised against the timeout, see TimeoutMode.
+        - inputs (dict, optional): Parameters bound to named outputs of upstream activities, see Activity.
+
+        Raises:
+        - ValueError: If inner is neither an Activity nor a Pipeline, both or none of items, dataset and an
+          items input are set, or batch_count is not positive.
+
+        Returns:
+        None
+        """
+        if not isinstance(inner, (Activity, Pipeline)):
+            raise ValueError(f"The inner of ForEach activity '{name}' must be an Activity or a Pipeline.")
+        if sum(source is not None for source in (items, dataset, (inputs or {}).get("items"))) != 1:
+            raise ValueError(
+                f"ForEach activity '{name}' needs exactly one of items, dataset and an 'items' input."
+            )
+        if batch_count < 1:
+            raise ValueError(f"batch_count must be a positive integer, got {batch_count}.")
+        for_each_parameters = {
+            "inner": inner,
+            "items": None if items is None else list(items),
+            "dataset": dataset,
+            "parameter_grid": parameter_grid or {},
+            "existing_only": existing_only,
+            "item_parameter": item_parameter,
+            "batch_count": batch_count,
+            "executor_type": executor_type,
+            "fail_on_item_failure": fail_on_item_failure,
+        }
+        super().__init__(
+            name,
+            run_for_each,
+            timeout_seconds=timeout_seconds,
+            parameters={**for_each_parameters, **(parameters or {})},
+            depends_on=depends_on,
+            timeout_mode=timeout_mode,
+            outputs=FOR_EACH_OUTPUTS,
+            inputs=inputs,
+        )
+
+
+def _run_item(inner: Any, parameters: dict, cancellation_token: CancellationToken = None) -> tuple:
+    """
+    Run one item on a copy of the inner activity or pipeline, canceled with the ForEach activity.
+
+    Returns:
+    tuple: The run status, the failure reason and the output of the item, the named outputs of the run for a
+    pipeline.
+    """
+    if isinstance(inner, Pipeline):
+        pipeline = inner.copy(parameters)
+        pipeline.run(cancellation_token=cancellation_token)
+        # The copy runs once, its spilled named outputs are read back before its spill files are deleted
+        named_outputs = {
+            name: SpillStore.materialize(outputs) for name, outputs in pipeline.get_named_outputs().items()
+        }
+        pipeline.discard_spilled_outputs()
+        return pipeline.get_run_status(), pipeline.get_failure_reason(), named_outputs
+    activity = inner.copy(parameters)
+    activity.cancellation_token = cancellation_token
+    output = activity.run()
+    return activity.get_run_status(), activity.get_failure_reason(), output
+
+
+def run_for_each(
+    inner: Any,
+    items: list = None,
+    dataset: Dataset = None,
+    parameter_grid: dict = None,
+    existing_only: bool = False,
+    item_parameter: str = "item",
+    batch_count: int = 20,
+    executor_type: ExecutorType = ExecutorType.THREAD,
+    fail_on_item_failure: bool = True,
+    cancellation_token: CancellationToken = None,
+    **kwargs,
+) -> dict:
+    """
+    Run an inner activity or pipeline once per item, see ForEachActivity.
+
+    Parameters:
+    - cancellation_token (CancellationToken, optional): Token of the run of the ForEach activity, passed to the
+      item runs so the items not started yet are canceled with it.
+    - kwargs: Parameters passed to every item run, besides the item.
+
+    Raises:
+    - ValueError: If the items are not a list, or an item does not succeed and fail_on_item_failure is set.
+    - OperationCanceledError: If the run is canceled.
+
+    Returns:
+    dict: The item count, succeeded and failed counts, statuses and outputs of the items in item order, and
+    the failure reasons by item index.
+    """
+    if items is None and dataset is not None:
+        items = dataset.expand_data_locations(parameter_grid or {}, existing_only=existing_only)
+    if not isinstance(items, (list, tuple)):
+        raise ValueError(f"The items of a ForEach activity must be a list, got {type(items).__name__}.")
+
+    item_parameters = [{**kwargs, item_parameter: item} for item in items]
+    if batch_count == 1 or len(items) <= 1:
+        results = [_run_item(inner, parameters, cancellation_token) for parameters in item_parameters]
+    else:
+        with ExecutorFactory.create(executor_type, min(batch_count, len(items))) as executor:
+            results = list(
+                executor.map(_run_item, [inner] * len(items), item_parameters, [cancellation_token] * len(items))
+            )
+    if cancellation_token is not None:
+        cancellation_token.raise_if_canceled()
+
+    statuses = [status for status, _, _ in results]
+    failures = {
+        index: reason
+        for index, (status, reason, _) in enumerate(results)
+        if status != PipelineRunStatus.SUCCEEDED
+    }
+    if failures and fail_on_item_failure:
+        index = min(failures)
+        raise ValueError(
+            f"{len(failures)} of {len(items)} items failed, item {index} ({items[index]!r}): {failures[index]}"
+        )
+    return {
+        "item_count": len(items),
+        "succeeded_count": len(items) - len(failures),
+        "failed_count": len(failures),
+        "statuses": [getattr(status, "value", status) for status in statuses],
+        "outputs": [output for _, _, output in results],
+        "failures": failures,
+    }
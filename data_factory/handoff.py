@@ -0,0 +1,231 @@
+"""Module for handing typed activity outputs over to downstream activities"""
+
+import importlib
+from enum import Enum
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+
+class OutputType(Enum):
+    """Enum representing the types an activity can declare for its named outputs."""
+
+    ANY = "Any"
+    BYTES = "Bytes"
+    NUMPY = "NumPy"
+    ARROW = "Arrow"
+    PANDAS = "Pandas"
+
+
+def _module_root(value: Any) -> str:
+    """Top level package of the type of a value, checked without importing optional dependencies."""
+    return type(value).__module__.split(".", 1)[0]
+
+
+OUTPUT_TYPE_CHECKS = {
+    OutputType.ANY: lambda value: True,
+    OutputType.BYTES: lambda value: isinstance(value, (bytes, bytearray, memoryview)),
+    OutputType.NUMPY: lambda value: _module_root(value) == "numpy" and hasattr(value, "nbytes"),
+    OutputType.ARROW: lambda value: _module_root(value) == "pyarrow",
+    OutputType.PANDAS: lambda value: _module_root(value) == "pandas",
+}
+
+
+class SharedBufferHandle:
+    """
+    Picklable reference to an output buffer placed in shared memory.
+
+    Sending the handle to another process costs a few bytes, the process attaches the shared memory segment
+    and reads the buffer in place instead of unpickling a copy.
+    """
+
+    def __init__(
+        self, name: str, nbytes: int, output_type: OutputType, dtype: str = None, shape: tuple = None
+    ) -> None:
+        """
+        Initialize SharedBufferHandle instance.
+
+        Parameters:
+        - name (str): Name of the shared memory segment.
+        - nbytes (int): Size of the buffer.
+        - output_type (OutputType): OutputType.BYTES or OutputType.NUMPY.
+        - dtype (str, optional): NumPy dtype of the buffer.
+        - shape (tuple, optional): NumPy shape of the buffer.
+
+        Returns:
+        None
+        """
+        self.name = name
+        self.nbytes = nbytes
+        self.output_type = output_type
+        self.dtype = dtype
+        self.shape = shape
+
+    def __repr__(self) -> str:
+        return f"SharedBufferHandle(name={self.name!r}, nbytes={self.nbytes}, output_type={self.output_type})"
+
+
+def _untrack(segment: shared_memory.SharedMemory):
+    """
+    Stop the resource tracker of this process from unlinking a segment at exit.
+
+    Segments are owned by the pipeline that unlinks them once the run is done, not by the process that created
+    or attached them, which would otherwise report them as leaked.
+    """
+    resource_tracker.unregister(segment._name, "shared_memory")  # pylint: disable=W0212
+
+
+class SharedMemoryHandoff:
+    """Export and attach of activity outputs through multiprocessing.shared_memory."""
+
+    # Segments attached by this process, kept open while their buffers are referenced
+    _attached = {}
+
+    @staticmethod
+    def export_outputs(result: Any, outputs: dict, min_bytes: int = 1 << 20) -> Any:
+        """
+        Place the large BYTES and NUMPY named outputs of an activity in shared memory.
+
+        Parameters:
+        - result (dict): The output of the activity.
+        - outputs (dict): The declared named outputs of the activity, name -> OutputType.
+        - min_bytes (int, optional): Buffers smaller than this are left to be pickled.
+
+        Returns:
+        dict: The output with large buffers replaced by SharedBufferHandle instances.
+        """
+        if not isinstance(result, dict) or not outputs:
+            return result
+        exported = dict(result)
+        for name, output_type in outputs.items():
+            value = result.get(name)
+            if output_type == OutputType.BYTES and OUTPUT_TYPE_CHECKS[output_type](value):
+                buffer = memoryview(value).cast("B")
+                if buffer.nbytes >= min_bytes:
+                    exported[name] = SharedMemoryHandoff._export(buffer, output_type)
+            elif output_type == OutputType.NUMPY and OUTPUT_TYPE_CHECKS[output_type](value):
+                if value.nbytes >= min_bytes and value.flags["C_CONTIGUOUS"]:
+                    handle = SharedMemoryHandoff._export(memoryview(value).cast("B"), output_type)
+                    handle.dtype = value.dtype.str
+                    handle.shape = value.shape
+                    exported[name] = handle
+        return exported
+
+    @staticmethod
+    def _export(buffer: memoryview, output_type: OutputType) -> SharedBufferHandle:
+        """Copy a flat buffer into a new shared memory segment."""
+        segment = shared_memory.SharedMemory(create=True, size=max(buffer.nbytes, 1))
+        segment.buf[: buffer.nbytes] = buffer
+        handle = SharedBufferHandle(segment.name, buffer.nbytes, output_type)
+        segment.close()
+        _untrack(segment)
+        return handle
+
+    @staticmethod
+    def attach(handle: SharedBufferHandle) -> Any:
+        """
+        Attach the buffer of a handle, without copying it.
+
+        Parameters:
+        - handle (SharedBufferHandle): The handle.
+
+        Returns:
+        memoryview | numpy.ndarray: The buffer, backed by the shared memory segment.
+        """
+        segment = SharedMemoryHandoff._attached.get(handle.name)
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=handle.name)
+            _untrack(segment)
+            SharedMemoryHandoff._attached[handle.name] = segment
+        buffer = segment.buf[: handle.nbytes]
+        if handle.output_type == OutputType.NUMPY:
+            numpy = importlib.import_module("numpy")
+            return numpy.ndarray(handle.shape, dtype=numpy.dtype(handle.dtype), buffer=buffer)
+        return buffer
+
+    @staticmethod
+    def resolve(parameters: dict) -> dict:
+        """
+        Attach every SharedBufferHandle passed as a parameter.
+
+        Parameters:
+        - parameters (dict): Parameters of an activity.
+
+        Returns:
+        dict: The parameters with handles replaced by their buffers.
+        """
+        return {
+            key: SharedMemoryHandoff.attach(value) if isinstance(value, SharedBufferHandle) else value
+            for key, value in parameters.items()
+        }
+
+    @staticmethod
+    def materialize(result: Any) -> Any:
+        """
+        Copy the buffers of the handles of an activity output out of shared memory, for instance to persist them.
+
+        Parameters:
+        - result (dict): The output of an activity.
+
+        Returns:
+        dict: The output with handles replaced by bytes or NumPy array copies.
+        """
+        if not SharedMemoryHandoff.handles(result):
+            return result
+        materialized = {}
+        for key, value in result.items():
+            if isinstance(value, SharedBufferHandle):
+                buffer = SharedMemoryHandoff.attach(value)
+                value = buffer.copy() if value.output_type == OutputType.NUMPY else bytes(buffer)
+                del buffer
+            materialized[key] = value
+        SharedMemoryHandoff.release_attached()
+        return materialized
+
+    @staticmethod
+    def release_attached():
+        """
+        Close the attached segments whose buffers are no longer referenced.
+
+        Returns:
+        None
+        """
+        for name, segment in list(SharedMemoryHandoff._attached.items()):
+            try:
+                segment.close()
+            except BufferError:
+                continue
+            del SharedMemoryHandoff._attached[name]
+
+    @staticmethod
+    def handles(result: Any) -> list:
+        """
+        Get the SharedBufferHandle instances of an activity output.
+
+        Parameters:
+        - result (dict): The output of an activity.
+
+        Returns:
+        list: The handles.
+        """
+        if not isinstance(result, dict):
+            return []
+        return [value for value in result.values() if isinstance(value, SharedBufferHandle)]
+
+    @staticmethod
+    def unlink(handles: list):
+        """
+        Free the shared memory segments of handles, once no activity needs them anymore.
+
+        Parameters:
+        - handles (list): The handles.
+
+        Returns:
+        None
+        """
+        for handle in handles:
+            try:
+                segment = shared_memory.SharedMemory(name=handle.name)
+            except FileNotFoundError:
+                continue
+            segment.close()
+            segment.unlink()
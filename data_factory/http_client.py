@@ -0,0 +1,461 @@
+"""Module for the pooled HTTP client of HttpEndpoint linked services"""
+
+import asyncio
+import http.client
+import json
+import threading
+import time
+from typing import Any
+from urllib.parse import urljoin, urlsplit
+
+
+class RetryPolicy:
+    """Retry policy of an HTTP client, with exponential backoff."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.1,
+        backoff_factor: float = 2.0,
+        retry_statuses: tuple = (429, 500, 502, 503, 504),
+        retry_methods: tuple = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS"),
+    ) -> None:
+        """
+        Initialize RetryPolicy instance.
+
+        Parameters:
+        - max_retries (int): Maximum number of retries after the first attempt.
+        - backoff_seconds (float): Delay before the first retry.
+        - backoff_factor (float): Factor the delay is multiplied with after every retry.
+        - retry_statuses (tuple): Response statuses that are retried.
+        - retry_methods (tuple): Methods that are retried, the idempotent ones by default.
+
+        Returns:
+        None
+        """
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(method.upper() for method in retry_methods)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the delay before a retry.
+
+        Parameters:
+        - attempt (int): Number of the attempt that failed, starting at 0.
+
+        Returns:
+        float: The delay in seconds.
+        """
+        return self.backoff_seconds * self.backoff_factor**attempt
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """
+        Check whether a failed attempt may be retried.
+
+        Parameters:
+        - method (str): The request method.
+        - attempt (int): Number of the attempt that failed, starting at 0.
+
+        Returns:
+        bool: True if the request may be retried.
+        """
+        return attempt < self.max_retries and method.upper() in self.retry_methods
+
+
+class HttpResponse:
+    """Response of an HTTP request, read in full."""
+
+    def __init__(self, status: int, headers: dict, body: bytes) -> None:
+        """
+        Initialize HttpResponse instance.
+
+        Parameters:
+        - status (int): The response status.
+        - headers (dict): The response headers, with lower case names.
+        - body (bytes): The response body.
+
+        Returns:
+        None
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        """Decode the response body as JSON."""
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        """
+        Raise an error for 4xx and 5xx responses.
+
+        Raises:
+        - HttpError: If the response status is an error status.
+
+        Returns:
+        None
+        """
+        if self.status >= 400:
+            raise HttpError(self.status, self.body[:200])
+
+
+class HttpError(Exception):
+    """Raised for HTTP error statuses."""
+
+    def __init__(self, status: int, body: bytes = b"") -> None:
+        super().__init__(f"HTTP error {status}: {body!r}")
+        self.status = status
+
+
+class HttpStreamResponse:
+    """Response of an HTTP request whose body is streamed, returned by HttpConnectionPool.stream."""
+
+    def __init__(self, pool, host_key: tuple, connection, response, slot=None) -> None:
+        """
+        Initialize HttpStreamResponse instance.
+
+        Parameters:
+        - pool (HttpConnectionPool): The pool the connection is returned to.
+        - host_key (tuple): The (scheme, host, port) of the connection.
+        - connection (HTTPConnection): The connection the response is read from.
+        - response (HTTPResponse): The response.
+        - slot (threading.BoundedSemaphore, optional): Host slot released with the connection.
+
+        Returns:
+        None
+        """
+        self.status = response.status
+        self.headers = {name.lower(): value for name, value in response.getheaders()}
+        self._pool = pool
+        self._host_key = host_key
+        self._connection = connection
+        self._response = response
+        self._slot = slot
+
+    def read(self, amount: int = None) -> bytes:
+        """
+        Read from the response body.
+
+        Parameters:
+        - amount (int, optional): Maximum number of bytes to read, None reads the rest of the body.
+
+        Returns:
+        bytes: The bytes read, empty at the end of the body.
+        """
+        return self._response.read(amount)
+
+    def readinto(self, buffer: Any) -> int:
+        """
+        Read from the response body into a buffer, without allocating.
+
+        Parameters:
+        - buffer (bytearray | memoryview): The buffer to fill.
+
+        Returns:
+        int: The number of bytes read, 0 at the end of the body.
+        """
+        return self._response.readinto(buffer)
+
+    def iter_chunks(self, chunk_size: int = 1 << 16):
+        """
+        Iterate the response body in chunks.
+
+        Parameters:
+        - chunk_size (int, optional): Maximum size of a chunk.
+
+        Returns:
+        Iterator: The chunks of the body.
+        """
+        while True:
+            chunk = self._response.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        """
+        Release the connection, back to the pool if the body was read in full and it can be kept alive.
+
+        Returns:
+        None
+        """
+        if self._connection is None:
+            return
+        reusable = self._response.isclosed() and not self._response.will_close
+        self._pool.release(self._host_key, self._connection, reusable)
+        self._connection = None
+        if self._slot is not None:
+            self._slot.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class HttpConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP connections, with per-host concurrency limits and retries.
+
+    Relative URLs are resolved against base_url, absolute URLs to other hosts get their own connections.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        max_per_host: int = None,
+        timeout_seconds: float = 30,
+        retry_policy: RetryPolicy = None,
+        headers: dict = None,
+    ) -> None:
+        """
+        Initialize HttpConnectionPool instance.
+
+        Parameters:
+        - base_url (str): Base URL relative URLs are resolved against.
+        - pool_size (int): Maximum number of idle keep-alive connections kept per host.
+        - max_per_host (int, optional): Maximum number of requests in flight per host, defaults to pool_size.
+        - timeout_seconds (float): Socket timeout of the connections.
+        - retry_policy (RetryPolicy, optional): Retry policy, defaults to RetryPolicy().
+        - headers (dict, optional): Headers sent with every request.
+
+        Returns:
+        None
+        """
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be a positive integer, got {pool_size}.")
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host or pool_size
+        self.timeout_seconds = timeout_seconds
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.headers = headers or {}
+        self.connections_opened = 0
+        self._idle = {}
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self, method: str, url: str, headers: dict = None, body: bytes = None
+    ) -> HttpResponse:
+        """
+        Send a request and read its response in full, retrying according to the retry policy.
+
+        Parameters:
+        - method (str): The request method.
+        - url (str): The URL, absolute or relative to base_url.
+        - headers (dict, optional): Headers of the request.
+        - body (bytes, optional): Body of the request.
+
+        Raises:
+        - OSError, http.client.HTTPException: If the request fails after all retries.
+
+        Returns:
+        HttpResponse: The response, error statuses included once retries are exhausted.
+        """
+        with self.stream(method, url, headers, body) as response:
+            return HttpResponse(response.status, response.headers, response.read())
+
+    def get(self, url: str, headers: dict = None) -> HttpResponse:
+        """Send a GET request, see HttpConnectionPool.request."""
+        return self.request("GET", url, headers)
+
+    def stream(
+        self, method: str, url: str, headers: dict = None, body: bytes = None
+    ) -> HttpStreamResponse:
+        """
+        Send a request and return its response with the body left to be streamed.
+
+        Connection errors and retry statuses are retried before the body is read. Use the response as a
+        context manager so its connection is released.
+
+        Parameters:
+        - method (str): The request method.
+        - url (str): The URL, absolute or relative to base_url.
+        - headers (dict, optional): Headers of the request.
+        - body (bytes, optional): Body of the request.
+
+        Raises:
+        - OSError, http.client.HTTPException: If the request fails after all retries.
+
+        Returns:
+        HttpStreamResponse: The response.
+        """
+        host_key, path = self.split_url(url)
+        request_headers = {**self.headers, **(headers or {})}
+        attempt = 0
+        while True:
+            slot = self._host_slot(host_key)
+            slot.acquire()
+            try:
+                connection, response = self._send(host_key, method, path, request_headers, body)
+            except (OSError, http.client.HTTPException):
+                slot.release()
+                if not self.retry_policy.can_retry(method, attempt):
+                    raise
+            else:
+                stream = HttpStreamResponse(self, host_key, connection, response, slot)
+                if stream.status not in self.retry_policy.retry_statuses or not self.retry_policy.can_retry(
+                    method, attempt
+                ):
+                    return stream
+                stream.close()
+            time.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    def _send(
+        self, host_key: tuple, method: str, path: str, headers: dict, body: bytes
+    ) -> tuple:
+        """
+        Send a request on an idle connection of the host, or on a new one.
+
+        A pooled connection closed by the server while idle is replaced by a new one without counting as an
+        attempt of the retry policy.
+
+        Returns:
+        tuple: The connection and its response, with the body left to be read.
+        """
+        connection, reused = self._acquire(host_key)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            if not reused:
+                raise
+            connection, _ = self._acquire(host_key, new=True)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                raise
+        return connection, response
+
+    def split_url(self, url: str) -> tuple:
+        """
+        Resolve a URL against base_url.
+
+        Parameters:
+        - url (str): The URL, absolute or relative to base_url.
+
+        Raises:
+        - ValueError: If the URL scheme is not http or https.
+
+        Returns:
+        tuple: The (scheme, host, port) of the URL and its path with query.
+        """
+        parts = urlsplit(urljoin(self.base_url, url))
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme in '{url}', expected http or https.")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return (parts.scheme, parts.hostname, port), path
+
+    def _host_slot(self, host_key: tuple) -> threading.BoundedSemaphore:
+        """Semaphore bounding the requests in flight to a host."""
+        with self._lock:
+            slot = self._host_slots.get(host_key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host_key] = slot
+            return slot
+
+    def _acquire(self, host_key: tuple, new: bool = False) -> tuple:
+        """Take an idle connection to a host, or open a new one. Returns the connection and whether it is reused."""
+        if not new:
+            with self._lock:
+                idle = self._idle.get(host_key)
+                if idle:
+                    return idle.pop(), True
+        scheme, host, port = host_key
+        connection_class = (
+            http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        )
+        with self._lock:
+            self.connections_opened += 1
+        return connection_class(host, port, timeout=self.timeout_seconds), False
+
+    def release(self, host_key: tuple, connection, reusable: bool):
+        """
+        Return a connection to the pool, or close it.
+
+        Parameters:
+        - host_key (tuple): The (scheme, host, port) of the connection.
+        - connection (HTTPConnection): The connection.
+        - reusable (bool): Whether the connection can be kept alive.
+
+        Returns:
+        None
+        """
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(host_key, [])
+                if len(idle) < self.pool_size:
+                    idle.append(connection)
+                    return
+        connection.close()
+
+    def close(self):
+        """
+        Close every idle connection of the pool.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class AsyncHttpClient:
+    """
+    Asyncio variant of HttpConnectionPool.
+
+    Requests run on the shared pool in the default executor, bounded per host by asyncio semaphores so
+    waiting requests do not hold executor threads.
+    """
+
+    def __init__(self, pool: HttpConnectionPool) -> None:
+        """
+        Initialize AsyncHttpClient instance.
+
+        Parameters:
+        - pool (HttpConnectionPool): The connection pool the requests are sent with.
+
+        Returns:
+        None
+        """
+        self.pool = pool
+        self._host_semaphores = {}
+
+    async def request(
+        self, method: str, url: str, headers: dict = None, body: bytes = None
+    ) -> HttpResponse:
+        """
+        Send a request and read its response in full, see HttpConnectionPool.request.
+
+        Returns:
+        HttpResponse: The response.
+        """
+        host_key, _ = self.pool.split_url(url)
+        semaphore = self._host_semaphores.get(host_key)
+        if semaphore is None:
+            semaphore = self._host_semaphores.setdefault(
+                host_key, asyncio.Semaphore(self.pool.max_per_host)
+            )
+        async with semaphore:
+            return await asyncio.to_thread(self.pool.request, method, url, headers, body)
+
+    async def get(self, url: str, headers: dict = None) -> HttpResponse:
+        """Send a GET request, see AsyncHttpClient.request."""
+        return await self.request("GET", url, headers)
@@ -1,6 +1,11 @@
 """Linked Service Module."""
 
+import asyncio
+import os
+import threading
+import weakref
 from enum import Enum
+from data_factory.http_client import AsyncHttpClient, HttpConnectionPool, RetryPolicy
 from data_factory.utils.validation_utils import StringUtils
 
 
@@ -11,6 +16,17 @@ class ServiceType(Enum):
     # SQL_SERVER = "SqlServer"
 
 
+def _frozen(value):
+    """Hashable view of a property value, dicts and lists included, for the client cache key."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _frozen(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_frozen(item) for item in value)
+    return value
+
+
 class LinkedService:
     """
     Represents a linked service.
@@ -20,8 +36,17 @@ class LinkedService:
         connection_string (str): The connection string for the linked service.
         service_type (ServiceType): The type of the linked service.
         properties (dict): Additional properties for the linked service.
+
+    HttpEndpoint services read these optional properties to configure their HTTP client: pool_size,
+    max_per_host, timeout_seconds, max_retries, backoff_seconds and headers.
     """
 
+    # (process id, name, connection string, properties) -> HttpConnectionPool shared by every activity of the
+    # process, and the same key -> event loop -> AsyncHttpClient sharing the per-host semaphores of that loop
+    _http_clients = {}
+    _async_http_clients = {}
+    _http_clients_lock = threading.Lock()
+
     def __init__(
         self,
         name: str,
@@ -52,3 +77,76 @@ class LinkedService:
             )
         self.service_type = service_type
         self.properties = properties or {}
+
+    def get_http_client(self) -> HttpConnectionPool:
+        """
+        Get the pooled HTTP client of the linked service, shared by every activity in the process.
+
+        The pool is created on first use, from the connection string as base URL and the properties of the
+        linked service. Linked services with other properties, or whose properties changed since, get their own
+        pool. Processes forked from a parent get their own pool, sockets are never shared.
+
+        Raises:
+            ValueError: If the linked service is not an HttpEndpoint.
+
+        Returns:
+            HttpConnectionPool: The connection pool.
+        """
+        key = self._http_client_key()
+        with LinkedService._http_clients_lock:
+            client = LinkedService._http_clients.get(key)
+            if client is None:
+                retry_policy = RetryPolicy(
+                    max_retries=self.properties.get("max_retries", 3),
+                    backoff_seconds=self.properties.get("backoff_seconds", 0.1),
+                )
+                client = HttpConnectionPool(
+                    self.connection_string,
+                    pool_size=self.properties.get("pool_size", 10),
+                    max_per_host=self.properties.get("max_per_host"),
+                    timeout_seconds=self.properties.get("timeout_seconds", 30),
+                    retry_policy=retry_policy,
+                    headers=self.properties.get("headers"),
+                )
+                LinkedService._http_clients[key] = client
+            return client
+
+    def get_async_http_client(self) -> AsyncHttpClient:
+        """
+        Get the asyncio HTTP client of the linked service, sending its requests through the shared pool.
+
+        Called from a running event loop, the client is shared by every activity of that loop, so its per-host
+        limits hold across them. Called outside of one, a new client is returned, not shared.
+
+        Raises:
+            ValueError: If the linked service is not an HttpEndpoint.
+
+        Returns:
+            AsyncHttpClient: The client.
+        """
+        pool = self.get_http_client()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return AsyncHttpClient(pool)
+        key = self._http_client_key()
+        with LinkedService._http_clients_lock:
+            clients = LinkedService._async_http_clients.setdefault(key, weakref.WeakKeyDictionary())
+            client = clients.get(loop)
+            if client is None:
+                client = clients[loop] = AsyncHttpClient(pool)
+            return client
+
+    def _http_client_key(self) -> tuple:
+        """
+        Key of the shared HTTP clients of the linked service.
+
+        Raises:
+            ValueError: If the linked service is not an HttpEndpoint.
+
+        Returns:
+            tuple: The process id, name, connection string and a frozen view of the properties.
+        """
+        if self.service_type != ServiceType.HTTP_ENDPOINT:
+            raise ValueError(f"Linked service '{self.name}' is not an {ServiceType.HTTP_ENDPOINT.value}.")
+        return os.getpid(), self.name, self.connection_string, _frozen(self.properties)
@@ -0,0 +1,419 @@
+"""Module for the per-activity metrics of pipeline runs and their exporters"""
+
+import abc
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Named outputs counted as rows and bytes processed by an activity, the first one returned is used
+ROWS_OUTPUT_NAMES = ("rows_processed", "row_count")
+BYTES_OUTPUT_NAMES = ("bytes_processed", "bytes_copied")
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def process_rss_bytes() -> int:
+    """
+    Get the current resident set size of the process.
+
+    Returns:
+    int: The resident set size in bytes, None where /proc/self/statm is not available.
+    """
+    if resource is None:
+        return None
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_peak_rss_bytes(children: bool = False) -> int:
+    """
+    Get the peak resident set size of the process, or of its terminated child processes.
+
+    The peak is a high-water mark over the lifetime of the process, it is not reset between activity runs.
+
+    Parameters:
+    - children (bool, optional): If True, get the peak of the largest terminated child process.
+
+    Returns:
+    int: The peak resident set size in bytes, None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss * _MAXRSS_UNIT
+
+
+def children_cpu_seconds() -> float:
+    """
+    Get the CPU time used by the terminated child processes of the process.
+
+    Returns:
+    float: The user and system CPU time in seconds, 0.0 where the resource module is not available.
+    """
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _first_count(result: Any, names: tuple) -> int:
+    """First integer output of an activity among names, None if there is none."""
+    if not isinstance(result, dict):
+        return None
+    for name in names:
+        value = result.get(name)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+class ActivityMetrics:
+    """Metrics of one activity run."""
+
+    def __init__(
+        self,
+        started_at: float,
+        wall_seconds: float,
+        cpu_seconds: float = None,
+        process_peak_rss_bytes: int = None,
+        rows: int = None,
+        bytes_processed: int = None,
+        queue_wait_seconds: float = 0.0,
+        rss_delta_bytes: int = None,
+    ) -> None:
+        """
+        Initialize ActivityMetrics instance.
+
+        Parameters:
+        - started_at (float): Start of the run, as a Unix timestamp.
+        - wall_seconds (float): Wall time of the run.
+        - cpu_seconds (float, optional): CPU time of the action, None if it cannot be attributed.
+        - process_peak_rss_bytes (int, optional): Peak resident set size of the process running the action over
+          its lifetime, which covers the earlier activities of the process and those running alongside.
+        - rows (int, optional): Rows processed, from the ROWS_OUTPUT_NAMES outputs.
+        - bytes_processed (int, optional): Bytes processed, from the BYTES_OUTPUT_NAMES outputs.
+        - queue_wait_seconds (float, optional): Time spent waiting for a worker or on stream queues.
+        - rss_delta_bytes (int, optional): Growth of the resident set size of the process during the run, None
+          where it cannot be measured or when the action ran in a child process.
+
+        Returns:
+        None
+        """
+        self.started_at = started_at
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.process_peak_rss_bytes = process_peak_rss_bytes
+        self.rows = rows
+        self.bytes_processed = bytes_processed
+        self.queue_wait_seconds = queue_wait_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+
+    def to_dict(self) -> dict:
+        """
+        Get the metrics as a dict.
+
+        Returns:
+        dict: Metric name -> value.
+        """
+        return {
+            "started_at": self.started_at,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "process_peak_rss_bytes": self.process_peak_rss_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "rows": self.rows,
+            "bytes": self.bytes_processed,
+            "queue_wait_seconds": self.queue_wait_seconds,
+        }
+
+
+class MetricsProbe:
+    """
+    Measurement of one activity run in progress.
+
+    Probes are only created for activities whose metrics are collected, so disabled metrics cost one
+    attribute check per run.
+    """
+
+    def __init__(self, queued_at: float = None) -> None:
+        """
+        Start measuring a run.
+
+        Parameters:
+        - queued_at (float, optional): Unix timestamp the activity was queued at, to measure its queue wait.
+
+        Returns:
+        None
+        """
+        self.started_at = time.time()
+        self.queue_wait_seconds = max(0.0, self.started_at - queued_at) if queued_at else 0.0
+        self._wall_start = time.perf_counter()
+        self._children_cpu_start = children_cpu_seconds()
+        self._rss_start = process_rss_bytes()
+
+    def finish(
+        self, result: Any = None, cpu_seconds: float = None, queue_wait_seconds: float = 0.0
+    ) -> ActivityMetrics:
+        """
+        Stop measuring the run.
+
+        Parameters:
+        - result (dict, optional): The output of the activity, for the rows and bytes processed.
+        - cpu_seconds (float, optional): CPU time of the thread that ran the action. Without it, the CPU time of
+          the child processes that terminated during the run is used, if any.
+        - queue_wait_seconds (float, optional): Queue wait measured during the run, added to the initial one.
+
+        Returns:
+        ActivityMetrics: The metrics of the run.
+        """
+        children = cpu_seconds is None
+        if children:
+            cpu_seconds = children_cpu_seconds() - self._children_cpu_start or None
+        in_children = children and cpu_seconds is not None
+        rss = None if in_children or self._rss_start is None else process_rss_bytes()
+        return ActivityMetrics(
+            started_at=self.started_at,
+            wall_seconds=time.perf_counter() - self._wall_start,
+            cpu_seconds=cpu_seconds,
+            process_peak_rss_bytes=process_peak_rss_bytes(children=in_children),
+            rows=_first_count(result, ROWS_OUTPUT_NAMES),
+            bytes_processed=_first_count(result, BYTES_OUTPUT_NAMES),
+            queue_wait_seconds=self.queue_wait_seconds + queue_wait_seconds,
+            rss_delta_bytes=None if rss is None else rss - self._rss_start,
+        )
+
+
+class MetricsExporter(abc.ABC):
+    """Base class of metrics exporters, receiving the events of every recorded pipeline run."""
+
+    @abc.abstractmethod
+    def export(self, events: list):
+        """
+        Export the events of a pipeline run.
+
+        Parameters:
+        - events (list): Event dicts, one per activity and one for the pipeline.
+
+        Returns:
+        None
+        """
+
+
+class JsonLinesExporter(MetricsExporter):
+    """Exporter appending every event as one JSON line to a file or a stream."""
+
+    def __init__(self, path: str = None, stream: Any = None) -> None:
+        """
+        Initialize JsonLinesExporter instance.
+
+        Parameters:
+        - path (str, optional): Path of the file the events are appended to.
+        - stream (file-like, optional): Stream the events are written to, instead of a file.
+
+        Raises:
+        - ValueError: If neither or both of path and stream are set.
+
+        Returns:
+        None
+        """
+        if (path is None) == (stream is None):
+            raise ValueError("Exactly one of path and stream must be set.")
+        self.path = path
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, events: list):
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        with self._lock:
+            if self.stream is not None:
+                self.stream.write(lines)
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+class PrometheusTextExporter(MetricsExporter):
+    """
+    Exporter aggregating the events into counters rendered in the Prometheus text exposition format.
+
+    Write the rendered text to a file read by the node_exporter textfile collector, or serve it from an
+    endpoint of the application.
+    """
+
+    _ACTIVITY_COUNTERS = (
+        ("data_factory_activity_runs_total", None, "Activity runs."),
+        ("data_factory_activity_wall_seconds_total", "wall_seconds", "Wall time of activity runs."),
+        ("data_factory_activity_cpu_seconds_total", "cpu_seconds", "CPU time of activity actions."),
+        ("data_factory_activity_queue_wait_seconds_total", "queue_wait_seconds", "Time activities waited to run."),
+        ("data_factory_activity_rows_total", "rows", "Rows processed by activities."),
+        ("data_factory_activity_bytes_total", "bytes", "Bytes processed by activities."),
+    )
+
+    def __init__(self) -> None:
+        """
+        Initialize PrometheusTextExporter instance.
+
+        Returns:
+        None
+        """
+        # (metric name, labels) -> value
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def export(self, events: list):
+        with self._lock:
+            for event in events:
+                labels = (("pipeline", event["pipeline"]),)
+                if event["event"] == "pipeline":
+                    labels += (("status", event["status"]),)
+                    self._add("data_factory_pipeline_runs_total", labels, 1)
+                    self._add("data_factory_pipeline_wall_seconds_total", labels, event["wall_seconds"])
+                    continue
+                labels += (("activity", event["activity"]), ("status", event["status"]))
+                for metric, field, _ in self._ACTIVITY_COUNTERS:
+                    self._add(metric, labels, 1 if field is None else event.get(field))
+                rss = event.get("process_peak_rss_bytes")
+                if rss is not None:
+                    key = ("data_factory_process_peak_rss_bytes", labels[:2])
+                    self._values[key] = max(self._values.get(key, 0), rss)
+
+    def _add(self, metric: str, labels: tuple, value: Any):
+        """Add a value to a counter, ignoring missing values."""
+        if value is not None:
+            key = (metric, labels)
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> str:
+        """
+        Render the aggregated metrics.
+
+        Returns:
+        str: The metrics in the Prometheus text exposition format.
+        """
+        help_texts = {metric: text for metric, _, text in self._ACTIVITY_COUNTERS}
+        help_texts["data_factory_process_peak_rss_bytes"] = (
+            "Lifetime peak resident set size of the processes that ran the activity."
+        )
+        help_texts["data_factory_pipeline_runs_total"] = "Pipeline runs."
+        help_texts["data_factory_pipeline_wall_seconds_total"] = "Wall time of pipeline runs."
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        current = None
+        for (metric, labels), value in values:
+            if metric != current:
+                current = metric
+                metric_type = "gauge" if metric.endswith("_bytes") else "counter"
+                lines.append(f"# HELP {metric} {help_texts[metric]}")
+                lines.append(f"# TYPE {metric} {metric_type}")
+            label_text = ",".join(f'{name}="{_escape_label(value_)}"' for name, value_ in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Write the rendered metrics to a file, atomically so scrapers never read a partial file.
+
+        Parameters:
+        - path (str): Path of the file.
+
+        Returns:
+        None
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRecorder:
+    """
+    Recorder of the metrics of pipeline runs, handing them to its exporters.
+
+    A pipeline with a recorder collects the metrics of its activities and records them at the end of every
+    run. A recorder sent to a worker process leaves its exporters behind, the run is recorded by the process
+    that gets the outcome back, see PipelineOrchestrator.
+    """
+
+    def __init__(self, exporters: list = None) -> None:
+        """
+        Initialize MetricsRecorder instance.
+
+        Parameters:
+        - exporters (list, optional): The MetricsExporter instances receiving the events.
+
+        Returns:
+        None
+        """
+        self.exporters = list(exporters or [])
+
+    def __getstate__(self) -> dict:
+        return {"exporters": []}
+
+    def __setstate__(self, state: dict):
+        self.exporters = state["exporters"]
+
+    def record_run(self, pipeline):
+        """
+        Record the metrics of the last run of a pipeline.
+
+        Parameters:
+        - pipeline (Pipeline): The pipeline that is done.
+
+        Returns:
+        None
+        """
+        if not self.exporters:
+            return
+        events = []
+        for activity in pipeline.activities:
+            if activity.metrics is None:
+                continue
+            status = activity.get_run_status()
+            event = {
+                "event": "activity",
+                "pipeline": pipeline.name,
+                "run_id": pipeline.run_id,
+                "activity": activity.name,
+                "status": getattr(status, "value", status),
+                "cache_hit": activity.get_cache_hit(),
+                "failure_reason": activity.get_failure_reason(),
+            }
+            event.update(activity.metrics.to_dict())
+            events.append(event)
+        status = pipeline.get_run_status()
+        failure_reason = pipeline.get_failure_reason()
+        events.append(
+            {
+                "event": "pipeline",
+                "pipeline": pipeline.name,
+                "run_id": pipeline.run_id,
+                "status": getattr(status, "value", status),
+                "started_at": time.time() - (pipeline.run_seconds or 0.0),
+                "wall_seconds": pipeline.run_seconds,
+                "failure_reason": getattr(failure_reason, "value", failure_reason),
+                "failure_message": pipeline.get_failure_message(),
+            }
+        )
+        for exporter in self.exporters:
+            exporter.export(events)
@@ -1,25 +1,46 @@
 """"Modules for Pipeline and Activity"""
 
+import asyncio
+import contextlib
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
 from enum import Enum
 from typing import Any
+from data_factory.activity import (
+    Activity,
+    ActivityTimeoutError,
+    DependencyCondition,
+    TimeoutMode,
+    _execute_activity,
+)
+from data_factory.cancellation import CancellationToken, OperationCanceledError
+from data_factory.checkpoint import CheckpointStore
+from data_factory.dag import ActivityDag, ActivityDagRun
+from data_factory.executor import ExecutorFactory, ExecutorType
+from data_factory.handoff import OutputType, SharedBufferHandle, SharedMemoryHandoff
+from data_factory.metrics import MetricsRecorder
+from data_factory.pipeline_async import AsyncPipelineRunMixin
+from data_factory.plan import PipelinePlan
+from data_factory.profiling import ActivityProfiler
+from data_factory.resources import ResourceBudget
+from data_factory.spill import SpillStore
+from data_factory.status import PipelineFailureReason, PipelineRunStatus
+from data_factory.streaming import StreamingRun
 from data_factory.utils.validation_utils import StringUtils
 
-
-class PipelineRunStatus(Enum):
-    """Enum representing the possible run statuses of a pipeline."""
-
-    SUCCEEDED = "Succeeded"
-    FAILED = "Failed"
-    CANCELED = "Canceled"
-    RUNNING = "Running"
-
-
-class PipelineFailureReason(Enum):
-    """Enum representing the possible failure reasons of a pipeline."""
-
-    ACTIVITY_FAILED = "One or more activities failed"
-    TIMEOUT = "Pipeline execution timed out"
-    INVALID_CONFIGURATION = "Invalid pipeline configuration"
+__all__ = [
+    "Activity",
+    "ActivityTimeoutError",
+    "DependencyCondition",
+    "OutputType",
+    "Pipeline",
+    "PipelineFailureReason",
+    "PipelineRunStatus",
+    "SharedBufferHandle",
+    "SupportedPreviousActivityOutcomeVariable",
+    "TimeoutMode",
+]
 
 
 class SupportedPreviousActivityOutcomeVariable(Enum):
@@ -28,24 +49,60 @@ class SupportedPreviousActivityOutcomeVariable(Enum):
     DF_SPARK = "df_spark"
 
 
-class Activity:
-    """Class representing an activity in a pipeline."""
+class Pipeline(AsyncPipelineRunMixin):
+    """Class representing a pipeline."""
+
+    # Compact records, orchestrators of generated backfills hold 100k+ pipelines
+    __slots__ = (
+        "name",
+        "activities",
+        "parameters",
+        "checkpoint_store",
+        "metrics_recorder",
+        "profiler",
+        "resource_budget",
+        "spill_store",
+        "run_id",
+        "run_status",
+        "failure_reason",
+        "failure_message",
+        "run_seconds",
+        "_log_stream",
+        "_checkpoints",
+        "_named_outputs",
+        "_run_started",
+        "_plan",
+        "_bound_parameters",
+        "_cancellation_token",
+    )
 
     def __init__(
         self,
         name: str,
-        action: callable,
-        timeout_seconds: int = 3600,
+        activities: list = None,
         parameters: dict = None,
+        checkpoint_store: CheckpointStore = None,
+        metrics_recorder: MetricsRecorder = None,
+        profiler: ActivityProfiler = None,
+        resource_budget: ResourceBudget = None,
+        spill_store: SpillStore = None,
     ) -> None:
         """
-        Initialize Activity instance.
+        Initialize Pipeline instance.
 
         Parameters:
-        - name (str): The name of the activity.
-        - action (callable): The Python function to be executed as the activity.
-        - timeout_seconds (int): The maximum time (in seconds) the activity is allowed to run before timing out.
-        - parameters (dict): The parameters to be passed to the activity.
+        - name (str): The name of the pipeline.
+        - activities (list): List of activities in the pipeline.
+        - parameters (dict): Pipeline parameters, passed to the activities declaring a parameter of the same name.
+        - checkpoint_store (CheckpointStore, optional): If set, every succeeded activity is checkpointed so a
+          failed run can be resumed with Pipeline.resume.
+        - metrics_recorder (MetricsRecorder, optional): If set, the metrics of the activities are collected
+          and recorded at the end of every run.
+        - profiler (ActivityProfiler, optional): If set, the activity runs it selects are profiled.
+        - resource_budget (ResourceBudget, optional): If set, every activity waits for the resources it declares
+          before it runs, see Activity(resources=...).
+        - spill_store (SpillStore, optional): If set, activity output values larger than its memory budget are
+          spilled to disk and read back by the activities consuming them.
 
         Returns:
         None
@@ -53,190 +110,794 @@ class Activity:
         if not StringUtils.validate_snake_case(name):
             raise ValueError(f"The name '{name}' is not in snake_case.")
         self.name = name
-        self.action = action
-        self.timeout_seconds = timeout_seconds
+        self.activities = activities or []
         self.parameters = parameters or {}
+        self.checkpoint_store = checkpoint_store
+        self.metrics_recorder = metrics_recorder
+        self.profiler = profiler
+        self.resource_budget = resource_budget
+        self.spill_store = spill_store
+        self.run_id = None
+        self.run_seconds = None
         self.run_status = None
         self.failure_reason = None
+        self.failure_message = None
+        self._log_stream = None
+        self._checkpoints = {}
+        self._named_outputs = {}
+        self._run_started = None
+        self._plan = None
+        self._bound_parameters = {}
+        self._cancellation_token = None
+
+    def copy(self, parameters: dict = None) -> "Pipeline":
+        """
+        Copy the pipeline with copies of its activities and a fresh run state, for runs overlapping with its own.
 
-    def _handle_timeout(self, signum, frame):
-        """Handler for activity execution timeout."""
-        raise TimeoutError("Activity execution timed out")
+        Parameters:
+        - parameters (dict, optional): Pipeline parameters updating the parameters of the copy.
+
+        Returns:
+        Pipeline: The copy, compiled if the pipeline is.
+        """
+        pipeline = Pipeline(
+            self.name,
+            activities=[activity.copy() for activity in self.activities],
+            parameters={**self.parameters, **(parameters or {})},
+            checkpoint_store=self.checkpoint_store,
+            metrics_recorder=self.metrics_recorder,
+            profiler=self.profiler,
+            resource_budget=self.resource_budget,
+            spill_store=self.spill_store,
+        )
+        if self._plan is not None:
+            pipeline.compile()
+        return pipeline
 
-    def run(self):
+    def add_activity(self, activity: Activity):
         """
-        Run the activity.
+        Add an activity to the pipeline.
 
-        Executes the associated Python function (activity) and updates the run status and failure reason.
+        Parameters:
+        - activity (Activity): The activity to be added.
 
         Returns:
         None
         """
-        try:
-            self.run_status = PipelineRunStatus.RUNNING
-            result = self.action(**self.parameters)
-            self.run_status = PipelineRunStatus.SUCCEEDED
-            return result
+        self.activities.append(activity)
+        self._plan = None
 
-        except Exception as e:  # pylint: disable=W0718
-            self.run_status = PipelineRunStatus.FAILED
-            self.failure_reason = str(e)
-            return None
+    def compile(self) -> PipelinePlan:
+        """
+        Compile the pipeline into an execution plan reused by all its following runs.
 
-    def get_run_status(self):
+        Parameter bindings, previous output wiring and the dependency graph are resolved once. Compiled runs pass
+        every activity its own parameters dict instead of updating activity.parameters, so runs do not leak
+        state into each other. Compile again after changing the activities or parameters of the pipeline.
+
+        Raises:
+        - ValueError: If the dependency graph is invalid, see ActivityDag.
+
+        Returns:
+        PipelinePlan: The plan.
+        """
+        self._plan = PipelinePlan(
+            self, tuple(var.value for var in SupportedPreviousActivityOutcomeVariable)
+        )
+        return self._plan
+
+    def run(
+        self,
+        verbose: bool = False,
+        max_workers: int = None,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        log_stream: Any = None,
+        cancellation_token: CancellationToken = None,
+    ):
         """
-        Get the run status of the activity.
+        Run the pipeline.
+
+        If no activity declares depends_on, executes each activity in list order, passing the output of the
+        previous activity as parameters to the current activity. Otherwise the activities are run as a DAG:
+        every activity whose dependencies are met is submitted at once to a bounded executor pool.
+        Updates the run status and failure reason.
+
+        Parameters:
+        - verbose (bool, optional): If True, print verbose information.
+        - max_workers (int, optional): Maximum number of activities running at once in DAG mode.
+        - executor_type (ExecutorType, optional): Pool used in DAG mode, activities must be picklable for PROCESS.
+        - log_stream (file-like, optional): Stream for the verbose output, defaults to sys.stdout.
+        - cancellation_token (CancellationToken, optional): Token canceling the run, see CancellationToken.
 
         Returns:
-        str: The run status.
+            None
         """
-        return self.run_status
+        self._start_run(verbose, log_stream, uuid.uuid4().hex, {}, cancellation_token)
+        if self._is_dag():
+            self._run_dag(verbose, max_workers, executor_type)
+        else:
+            self._run_sequential(verbose)
+        self._end_run(verbose)
 
-    def get_failure_reason(self):
+    def resume(
+        self,
+        run_id: str,
+        verbose: bool = False,
+        max_workers: int = None,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        log_stream: Any = None,
+        cancellation_token: CancellationToken = None,
+    ):
         """
-        Get the failure reason of the activity.
+        Resume a previous run of the pipeline from its checkpoints.
+
+        Activities checkpointed in the run are not run again: their parameters and output are restored from
+        the checkpoint store, and the remaining activities run as in Pipeline.run, under the same run id.
+
+        Parameters:
+        - run_id (str): The id of the run to resume, see Pipeline.run_id.
+        - verbose (bool, optional): If True, print verbose information.
+        - max_workers (int, optional): Maximum number of activities running at once in DAG mode.
+        - executor_type (ExecutorType, optional): Pool used in DAG mode, activities must be picklable for PROCESS.
+        - log_stream (file-like, optional): Stream for the verbose output, defaults to sys.stdout.
+        - cancellation_token (CancellationToken, optional): Token canceling the run, see CancellationToken.
+
+        Raises:
+        - ValueError: If the pipeline has no checkpoint store or the run has no checkpoints.
 
         Returns:
-        str: The failure reason.
+            None
         """
-        return self.failure_reason
+        if self.checkpoint_store is None:
+            raise ValueError(f"Pipeline '{self.name}' has no checkpoint_store to resume from.")
+        checkpoints = self.checkpoint_store.load(self.name, run_id)
+        self._start_run(verbose, log_stream, run_id, checkpoints, cancellation_token)
+        if self._is_dag():
+            self._run_dag(verbose, max_workers, executor_type)
+        else:
+            self._run_sequential(verbose)
+        self._end_run(verbose)
 
+    async def arun(
+        self,
+        verbose: bool = False,
+        max_concurrency: int = None,
+        executor: Executor = None,
+        log_stream: Any = None,
+        semaphore: asyncio.Semaphore = None,
+        cancellation_token: CancellationToken = None,
+    ):
+        """
+        Run the pipeline on the running event loop.
 
-class Pipeline:
-    """Class representing a pipeline."""
+        Same execution modes as Pipeline.run, activities are run with Activity.arun: async actions are awaited
+        on the loop and sync actions are offloaded to the executor. In DAG mode every ready activity is
+        started at once, the number of activities running at once is bounded by a semaphore.
 
-    def __init__(
-        self, name: str, activities: list = None, parameters: dict = None
-    ) -> None:
+        Parameters:
+        - verbose (bool, optional): If True, print verbose information.
+        - max_concurrency (int, optional): Maximum number of activities running at once in DAG mode.
+        - executor (Executor, optional): Executor for sync actions, defaults to the loop's default executor.
+        - log_stream (file-like, optional): Stream for the verbose output, defaults to sys.stdout.
+        - semaphore (asyncio.Semaphore, optional): Semaphore shared with other pipelines, overrides max_concurrency.
+        - cancellation_token (CancellationToken, optional): Token canceling the run, see CancellationToken.
+
+        Returns:
+            None
         """
-        Initialize Pipeline instance.
+        if semaphore is None and max_concurrency is not None:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._start_run(verbose, log_stream, uuid.uuid4().hex, {}, cancellation_token)
+        if self._is_dag():
+            await self._arun_dag(verbose, executor, semaphore)
+        else:
+            await self._arun_sequential(verbose, executor, semaphore)
+        self._end_run(verbose)
+
+    def run_streaming(
+        self, verbose: bool = False, queue_size: int = 8, log_stream: Any = None
+    ):
+        """
+        Run the pipeline as concurrent streaming stages.
+
+        The activities are generators: the first one yields chunks, every following one receives the chunks of
+        the previous one as an iterator in its 'chunks' parameter and yields its own, the last one consumes
+        them. All activities run at once, connected by bounded queues that apply backpressure, so data flows
+        through in constant memory. If an activity fails, the other ones are canceled and the pipeline fails.
+        Activity timeouts, caches and checkpoints do not apply to streaming runs.
 
         Parameters:
-        - name (str): The name of the pipeline.
-        - activities (list): List of activities in the pipeline.
+        - verbose (bool, optional): If True, print verbose information.
+        - queue_size (int, optional): Maximum number of chunks buffered between two activities.
+        - log_stream (file-like, optional): Stream for the verbose output, defaults to sys.stdout.
 
         Returns:
-        None
+            None
         """
-        if not StringUtils.validate_snake_case(name):
-            raise ValueError(f"The name '{name}' is not in snake_case.")
-        self.name = name
-        self.activities = activities or []
-        self.parameters = parameters or {}
-        self.run_status = None
+        self._start_run(verbose, log_stream, uuid.uuid4().hex, {})
+        for i, activity in enumerate(self.activities):
+            self._start_sequential_activity(i, activity, {}, verbose)
+
+        failed_activities = StreamingRun(
+            self.activities,
+            queue_size,
+            [self._bound_parameters.get(activity.name) for activity in self.activities],
+        ).run()
+
+        for i, activity in enumerate(self.activities):
+            if verbose:
+                self._log(
+                    f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Done with status = {activity.get_run_status()}."
+                )
+        if failed_activities:
+            self._fail(failed_activities[0], verbose)
+        else:
+            self.run_status = PipelineRunStatus.SUCCEEDED
+        self._end_run(verbose)
+
+    def _is_dag(self) -> bool:
+        """Check whether the pipeline runs as a DAG, that is whether any activity declares depends_on."""
+        if self._plan is not None:
+            return self._plan.is_dag
+        return any(activity.depends_on for activity in self.activities)
+
+    def _start_run(
+        self,
+        verbose: bool,
+        log_stream: Any,
+        run_id: str,
+        checkpoints: dict,
+        cancellation_token: CancellationToken = None,
+    ):
+        """
+        Reset the run status of the pipeline at the start of a run.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - log_stream (file-like): Stream for the verbose output of the run.
+        - run_id (str): The id of the run.
+        - checkpoints (dict): Checkpoints of the activities to restore instead of running them.
+        - cancellation_token (CancellationToken, optional): Token canceling the run.
+
+        Returns:
+            None
+        """
+        self._log_stream = log_stream
+        self.discard_spilled_outputs()
+        self.run_id = run_id
+        self._checkpoints = checkpoints
+        self._named_outputs = {}
+        self._bound_parameters = {}
+        self.run_status = PipelineRunStatus.RUNNING
         self.failure_reason = None
         self.failure_message = None
+        self.run_seconds = None
+        self._run_started = time.perf_counter()
+        self._cancellation_token = cancellation_token
+        for activity in self.activities:
+            activity.collect_metrics = self.metrics_recorder is not None
+            activity.cancellation_token = cancellation_token
+            activity.profile = None if self.profiler is None else self.profiler.activity_profile(
+                self.name, run_id, activity.name
+            )
+        if verbose:
+            self._log(f"\n[Pipeline: {self.name}] -> Starting...]")
 
-    def add_activity(self, activity: Activity):
+    def _end_run(self, verbose: bool):
         """
-        Add an activity to the pipeline.
+        Report the run status of the pipeline at the end of a run, and record its metrics.
 
         Parameters:
-        - activity (Activity): The activity to be added.
+        - verbose (bool): If True, print verbose information.
 
         Returns:
-        None
+            None
         """
-        self.activities.append(activity)
+        self.run_seconds = time.perf_counter() - self._run_started
+        if self.spill_store is not None:
+            self.spill_store.discard(
+                self.name,
+                self.run_id,
+                keep=[*self._named_outputs.values(), *(activity.parameters for activity in self.activities)],
+            )
+        if self.metrics_recorder is not None:
+            self.metrics_recorder.record_run(self)
+        if verbose:
+            status = self.get_run_status()
+            self._log(f"[Pipeline: {self.name}] -> Done with status = {status}.]\n")
+        self._log_stream = None
+        self._checkpoints = {}
+        self._bound_parameters = {}
+        self._cancellation_token = None
 
-    def run(self, verbose: bool = False):
+    def _run_sequential(self, verbose: bool):
         """
-        Run the pipeline.
+        Run the activities one after another in list order, stopping at the first failure.
 
-        Executes each activity in the pipeline, passing the output of the previous activity
-        as parameters to the current activity. Updates the run status and failure reason.
+        Parameters:
+        - verbose (bool): If True, print verbose information.
 
         Returns:
             None
         """
-        self.run_status = PipelineRunStatus.RUNNING
-        if verbose:
-            print(f"\n[Pipeline: {self.name}] -> Starting...]")
         previous_output = {}
 
         for i, activity in enumerate(self.activities):
-            if verbose:
-                print(
-                    f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Initializing..."
-                )
-            if previous_output:
-                self._validate_previous_output(previous_output)
-                # Update the previous_output variable with the current activity's output, currently supported values
-                vars_from_previous_output = [
-                    str(var.value)
-                    for var in SupportedPreviousActivityOutcomeVariable
-                    if var.value in previous_output
-                ]
-                if verbose:
-                    print(f"vars_from_previous_output={vars_from_previous_output}")
-                # If exists, Instantiate new activity with parameters from previous
-                if len(vars_from_previous_output) > 0:
-                    for _, var_prev_out in enumerate(vars_from_previous_output):
-                        if verbose:
-                            print(
-                                f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Inheriting output variable from past activity run: {var_prev_out}]"
-                            )
-                        activity.parameters[var_prev_out] = previous_output[
-                            var_prev_out
-                        ]
-                        if verbose:
-                            print(
-                                f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] activity.parameters = {activity.parameters}]"
+            if activity.name in self._checkpoints:
+                previous_output = self._restore_checkpoint(activity, verbose)
+                continue
+            position = self._start_sequential_activity(i, activity, previous_output, verbose)
+            activity.queued_at = time.time()
+            try:
+                with self._reserve(activity):
+                    previous_output = self._spill(activity.run(self._bound_parameters.get(activity.name)))
+            except OperationCanceledError as e:
+                # Canceled while waiting for its resources
+                activity.set_outcome((PipelineRunStatus.CANCELED, str(e), False, None))
+                previous_output = None
+            if not self._complete_sequential_activity(activity, previous_output, position, verbose):
+                break
+        else:
+            self.run_status = PipelineRunStatus.SUCCEEDED
+
+    def _start_sequential_activity(
+        self, i: int, activity: Activity, previous_output: Any, verbose: bool
+    ) -> str:
+        """
+        Bind the parameters of the next activity of a sequential run.
+
+        Parameters:
+        - i (int): Index of the activity in the pipeline.
+        - activity (Activity): The activity about to run.
+        - previous_output (dict): The output of the previous activity.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+        str: Position of the activity in the pipeline, used for verbose output.
+        """
+        position = f"({i+1}/{len(self.activities)})"
+        if verbose:
+            self._log(
+                f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Initializing..."
+            )
+        self._bind_activity_parameters(activity, previous_output, position, verbose)
+
+        if verbose:
+            self._log(
+                f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Starting..."
+            )
+        return position
+
+    def _complete_sequential_activity(
+        self, activity: Activity, result: Any, position: str, verbose: bool
+    ) -> bool:
+        """
+        Check the outcome of an activity of a sequential run, failing the pipeline if the activity did not succeed.
+
+        Parameters:
+        - activity (Activity): The activity that is done.
+        - result (dict): The output of the activity.
+        - position (str): Position of the activity in the pipeline, used for verbose output.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+        bool: True if the run should continue with the next activity.
+        """
+        if verbose:
+            status = activity.get_run_status()
+            self._log(
+                f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Done with status = {status}{' (cache hit)' if activity.get_cache_hit() else ''}."
+            )
+
+        if activity.get_run_status() in (
+            PipelineRunStatus.FAILED,
+            PipelineRunStatus.TIMED_OUT,
+        ):
+            self._fail(activity, verbose)
+            return False
+        if activity.get_run_status() == PipelineRunStatus.CANCELED:
+            self._cancel(activity, self.activities[self.activities.index(activity) + 1:], verbose)
+            return False
+        self._record_named_outputs(activity, result)
+        self._save_checkpoint(activity, result)
+        self._bound_parameters.pop(activity.name, None)
+        return True
+
+    def _record_named_outputs(self, activity: Activity, result: Any):
+        """
+        Keep the named outputs of a succeeded activity for the activities binding them as inputs.
+
+        Parameters:
+        - activity (Activity): The succeeded activity.
+        - result (dict): The output of the activity.
+
+        Returns:
+            None
+        """
+        if activity.outputs:
+            self._named_outputs[activity.name] = {
+                output_name: result[output_name] for output_name in activity.outputs
+            }
+
+    def _save_checkpoint(self, activity: Activity, result: Any):
+        """
+        Checkpoint a succeeded activity, if the pipeline has a checkpoint store.
+
+        Parameters:
+        - activity (Activity): The succeeded activity.
+        - result (dict): The output of the activity.
+
+        Returns:
+            None
+        """
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.save(
+                self.name,
+                self.run_id,
+                activity.name,
+                self._bound_parameters.get(activity.name, activity.parameters),
+                SharedMemoryHandoff.materialize(SpillStore.materialize(result)),
+            )
+
+    def _restore_checkpoint(self, activity: Activity, verbose: bool) -> Any:
+        """
+        Restore an activity checkpointed in the run being resumed, instead of running it.
+
+        Parameters:
+        - activity (Activity): The checkpointed activity.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+        dict: The checkpointed output of the activity.
+        """
+        checkpoint = self._checkpoints[activity.name]
+        if self._plan is not None:
+            self._bound_parameters[activity.name] = checkpoint["parameters"]
+        else:
+            activity.parameters = checkpoint["parameters"]
+        activity.set_outcome((PipelineRunStatus.SUCCEEDED, None, False, None))
+        self._record_named_outputs(activity, checkpoint["output"])
+        if verbose:
+            self._log(
+                f"[Pipeline: {self.name}] --> [Activity: {activity.name}] Restored from checkpoint of run {self.run_id}."
+            )
+        return checkpoint["output"]
+
+    def _run_dag(self, verbose: bool, max_workers: int, executor_type: ExecutorType):
+        """
+        Run the activities as a DAG, submitting every ready activity to a bounded executor pool.
+
+        An activity is ready once all its upstream activities are done, it runs if its dependency conditions
+        are met and is skipped otherwise. Its previous output is the merged output of its succeeded upstream
+        activities. The pipeline fails if any activity fails.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - max_workers (int): Maximum number of activities running at once.
+        - executor_type (ExecutorType): The executor pool type.
+
+        Returns:
+            None
+        """
+        dag_run = ActivityDagRun(self._activity_dag(), PipelineRunStatus.SKIPPED)
+        failed_activities = []
+        share_outputs = executor_type == ExecutorType.PROCESS
+        shared_handles = []
+
+        try:
+            with ExecutorFactory.create(executor_type, max_workers) as executor:
+                running = {}
+                while dag_run.ready or running:
+                    while dag_run.ready:
+                        activity = self._start_dag_activity(dag_run, failed_activities, verbose)
+                        if activity is not None:
+                            activity.queued_at = time.time()
+                            future = self._submit(
+                                executor,
+                                _execute_activity,
+                                activity,
+                                share_outputs,
+                                self._bound_parameters.get(activity.name),
                             )
+                            running[future] = activity
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        activity = running.pop(future)
+                        if future.cancelled():
+                            # Canceled while waiting for its resources
+                            reason = f"Canceled: {self._cancellation_token.reason}"
+                            outcome, result = (PipelineRunStatus.CANCELED, reason, False, None), None
+                        else:
+                            outcome, result = future.result()
+                        activity.set_outcome(outcome)
+                        result = self._spill(result)
+                        shared_handles.extend(SharedMemoryHandoff.handles(result))
+                        self._complete_dag_activity(dag_run, activity, result, failed_activities, verbose)
+        finally:
+            # Named outputs outlive the run, their shared memory segments do not
+            if shared_handles:
+                self._named_outputs = {
+                    name: SharedMemoryHandoff.materialize(outputs) for name, outputs in self._named_outputs.items()
+                }
+            SharedMemoryHandoff.unlink(shared_handles)
+
+        self._finish_dag(failed_activities, verbose)
+
+    def _spill(self, result: Any) -> Any:
+        """Spill the large values of an activity output, if the pipeline has a spill store."""
+        if self.spill_store is None:
+            return result
+        return self.spill_store.spill(self.name, self.run_id, result)
+
+    def _submit(self, executor: Executor, function: callable, activity: Activity, *args: Any) -> Future:
+        """Submit the runner of an activity to the executor, once the resource budget grants its resources."""
+        if self.resource_budget is None:
+            return executor.submit(function, activity, *args)
+        return self.resource_budget.submit(
+            executor, activity.resources, function, activity, *args, cancellation_token=self._cancellation_token
+        )
+
+    def _reserve(self, activity: Activity):
+        """Context manager holding the resources of an activity of a sequential run, if the pipeline has a budget."""
+        if self.resource_budget is None:
+            return contextlib.nullcontext()
+        return self.resource_budget.reserve(activity.resources, self._cancellation_token)
+
+    def _start_dag_activity(
+        self, dag_run: ActivityDagRun, failed_activities: list, verbose: bool
+    ) -> Activity:
+        """
+        Pop the next ready activity of a DAG run and bind its parameters.
 
-            # If exists, parameter variable that also exists in activity variable is passed through to activity level for execution
-            params_in_act_params = [
-                param
-                for param in list(self.parameters.keys())
-                if param in list(activity.parameters.keys())
-            ]
-            if len(params_in_act_params) > 0:
-                for param in params_in_act_params:
+        Activities checkpointed in the run being resumed are restored and completed instead, activities of a
+        canceled run are canceled.
 
-                    if verbose:
-                        print(
-                            f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Inheriting parameter from pipeline into activity: {param}]"
-                        )
-                    # Overwrite activity param with param inherited from pipeline
-                    activity.parameters[param] = self.parameters[param]
-                    if verbose:
-                        print(
-                            f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] activity.parameters = {activity.parameters}]"
-                        )
+        Parameters:
+        - dag_run (ActivityDagRun): The DAG run.
+        - failed_activities (list): Failed activities of the run.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+        Activity: The activity, ready to be run, or None if it was restored from a checkpoint or canceled.
+        """
+        name = dag_run.ready.popleft()
+        activity = dag_run.dag.activities[name]
+        if name in self._checkpoints:
+            result = self._restore_checkpoint(activity, verbose)
+            self._complete_dag_activity(dag_run, activity, result, failed_activities, verbose)
+            return None
+        if self._cancellation_token is not None and self._cancellation_token.is_canceled:
+            activity.set_outcome((PipelineRunStatus.CANCELED, f"Canceled: {self._cancellation_token.reason}", False, None))
+            self._complete_dag_activity(dag_run, activity, None, failed_activities, verbose)
+            return None
+        position = self._dag_position(dag_run, name)
+        self._bind_activity_parameters(activity, dag_run.previous_output(name), position, verbose)
+        if verbose:
+            self._log(f"[Pipeline: {self.name}] --> {position} [Activity: {name}] Starting...")
+        activity.run_status = PipelineRunStatus.RUNNING
+        return activity
+
+    def _complete_dag_activity(
+        self,
+        dag_run: ActivityDagRun,
+        activity: Activity,
+        result: Any,
+        failed_activities: list,
+        verbose: bool,
+    ):
+        """
+        Record the outcome of a DAG activity, marking the downstream activities it skips.
+
+        Parameters:
+        - dag_run (ActivityDagRun): The DAG run.
+        - activity (Activity): The activity that is done, with its run status set.
+        - result (dict): The output of the activity.
+        - failed_activities (list): Failed activities of the run, appended to if the activity did not succeed.
+        - verbose (bool): If True, print verbose information.
 
+        Returns:
+            None
+        """
+        succeeded = activity.run_status == PipelineRunStatus.SUCCEEDED
+        if not succeeded:
+            failed_activities.append(activity)
+        elif activity.name not in self._checkpoints:
+            self._record_named_outputs(activity, result)
+            self._save_checkpoint(activity, result)
+        self._bound_parameters.pop(activity.name, None)
+        if verbose:
+            self._log(
+                f"[Pipeline: {self.name}] --> {self._dag_position(dag_run, activity.name)} [Activity: {activity.name}] Done with status = {activity.run_status}{' (cache hit)' if activity.get_cache_hit() else ''}."
+            )
+        # Downstream activities of a canceled activity are canceled rather than skipped
+        skipped_status = (
+            PipelineRunStatus.CANCELED
+            if activity.run_status == PipelineRunStatus.CANCELED
+            else PipelineRunStatus.SKIPPED
+        )
+        for skipped_name in dag_run.complete(
+            activity.name, activity.run_status, result if succeeded else None
+        ):
+            dag_run.dag.activities[skipped_name].run_status = skipped_status
             if verbose:
-                print(
-                    f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Starting..."
+                self._log(
+                    f"[Pipeline: {self.name}] --> {self._dag_position(dag_run, skipped_name)} [Activity: {skipped_name}] Skipped, dependency conditions not met."
                 )
 
-            previous_output = activity.run()
+    def _finish_dag(self, failed_activities: list, verbose: bool):
+        """
+        Set the pipeline run status at the end of a DAG run, failing it on the first failed activity.
+
+        Runs canceled without a failed activity are canceled.
+
+        Parameters:
+        - failed_activities (list): Activities of the run that did not succeed, in completion order.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+            None
+        """
+        failed = [activity for activity in failed_activities if activity.run_status != PipelineRunStatus.CANCELED]
+        if failed:
+            self._fail(failed[0], verbose)
+        elif failed_activities:
+            self._cancel(failed_activities[0], [], verbose)
+        else:
+            self.run_status = PipelineRunStatus.SUCCEEDED
+
+    def _activity_dag(self) -> ActivityDag:
+        """Dependency graph of the activities, built once by the compiled plan or for every run otherwise."""
+        if self._plan is not None:
+            return self._plan.dag
+        return ActivityDag(self.activities)
+
+    @staticmethod
+    def _dag_position(dag_run: ActivityDagRun, name: str) -> str:
+        """Position of an activity in the topological order of a DAG run, used for verbose output."""
+        return f"({dag_run.dag.index[name]+1}/{len(dag_run.dag.order)})"
 
+    def _log(self, message: str):
+        """
+        Print a verbose message to the log stream of the current run.
+
+        Parameters:
+        - message (str): The message to print.
+
+        Returns:
+            None
+        """
+        print(message, file=self._log_stream)
+
+    def _bind_activity_parameters(
+        self, activity: Activity, previous_output: Any, position: str, verbose: bool
+    ):
+        """
+        Pass the supported previous output variables and the matching pipeline parameters into the activity parameters.
+
+        Compiled pipelines bind a new parameters dict for the run instead, see Pipeline.compile.
+
+        Parameters:
+        - activity (Activity): The activity about to run.
+        - previous_output (dict): The output of the previous activity.
+        - position (str): Position of the activity in the pipeline, used for verbose output.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+            None
+        """
+        if self._plan is not None:
+            self._bound_parameters[activity.name] = self._plan.bind(
+                activity.name, previous_output, self._named_outputs
+            )
             if verbose:
-                status = activity.get_run_status()
-                print(
-                    f"[Pipeline: {self.name}] --> ({i+1}/{len(self.activities)}) [Activity: {activity.name}] Done with status = {status}."
+                self._log(
+                    f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Bound parameters {sorted(self._bound_parameters[activity.name])} from the compiled plan]"
                 )
+            return
+
+        if previous_output:
+            self._validate_previous_output(previous_output)
+            # Update the previous_output variable with the current activity's output, currently supported values
+            vars_from_previous_output = [
+                str(var.value)
+                for var in SupportedPreviousActivityOutcomeVariable
+                if var.value in previous_output
+            ]
+            if verbose:
+                self._log(f"vars_from_previous_output={vars_from_previous_output}")
+            # If exists, Instantiate new activity with parameters from previous
+            if len(vars_from_previous_output) > 0:
+                for _, var_prev_out in enumerate(vars_from_previous_output):
+                    if verbose:
+                        self._log(
+                            f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Inheriting output variable from past activity run: {var_prev_out}]"
+                        )
+                    activity.parameters[var_prev_out] = previous_output[var_prev_out]
+                    if verbose:
+                        self._log(
+                            f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] activity.parameters = {sorted(activity.parameters)}]"
+                        )
+
+        # If exists, parameter variable that also exists in activity variable is passed through to activity level for execution
+        params_in_act_params = [
+            param
+            for param in list(self.parameters.keys())
+            if param in list(activity.parameters.keys())
+        ]
+        if len(params_in_act_params) > 0:
+            for param in params_in_act_params:
 
-            if activity.get_run_status() == PipelineRunStatus.FAILED:
-                self.run_status = PipelineRunStatus.FAILED
-                self.failure_reason = PipelineFailureReason.ACTIVITY_FAILED
-                self.failure_message = activity.get_failure_reason()
                 if verbose:
-                    status = self.get_run_status()
-                    print(f"\n[Pipeline: {self.name}] -> Failed!!! ")
-                    print(
-                        f"[Pipeline: {self.name}] -> failure_reason={self.failure_reason} "
+                    self._log(
+                        f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Inheriting parameter from pipeline into activity: {param}]"
                     )
-                    print(
-                        f"[Pipeline: {self.name}] -> failure_message={self.failure_message} \n"
+                # Overwrite activity param with param inherited from pipeline
+                activity.parameters[param] = self.parameters[param]
+                if verbose:
+                    self._log(
+                        f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] activity.parameters = {sorted(activity.parameters)}]"
                     )
-                break
+
+        # Bind the named outputs of earlier activities declared as inputs
+        for param, (producer, output_name) in activity.inputs.items():
+            if output_name not in self._named_outputs.get(producer, {}):
+                raise ValueError(
+                    f"Input '{param}' of activity '{activity.name}' is bound to '{producer}.{output_name}', "
+                    "which is not a named output of a succeeded earlier activity."
+                )
+            if verbose:
+                self._log(
+                    f"[Pipeline: {self.name}] --> {position} [Activity: {activity.name}] Binding input {param} to output {producer}.{output_name}]"
+                )
+            activity.parameters[param] = self._named_outputs[producer][output_name]
+
+    def _fail(self, activity: Activity, verbose: bool):
+        """
+        Mark the pipeline as failed because of a failed activity.
+
+        Parameters:
+        - activity (Activity): The failed activity.
+        - verbose (bool): If True, print verbose information.
+
+        Returns:
+            None
+        """
+        self.run_status = PipelineRunStatus.FAILED
+        if activity.get_run_status() == PipelineRunStatus.TIMED_OUT:
+            self.failure_reason = PipelineFailureReason.TIMEOUT
         else:
-            self.run_status = PipelineRunStatus.SUCCEEDED
+            self.failure_reason = PipelineFailureReason.ACTIVITY_FAILED
+        self.failure_message = activity.get_failure_reason()
+        if verbose:
+            self._log(f"\n[Pipeline: {self.name}] -> Failed!!! ")
+            self._log(
+                f"[Pipeline: {self.name}] -> failure_reason={self.failure_reason} "
+            )
+            self._log(
+                f"[Pipeline: {self.name}] -> failure_message={self.failure_message} \n"
+            )
+
+    def _cancel(self, activity: Activity, pending_activities: list, verbose: bool):
+        """
+        Mark the pipeline as canceled because of a canceled activity, along with the activities that did not start.
+
+        Parameters:
+        - activity (Activity): The first canceled activity.
+        - pending_activities (list): Activities of the run that did not start.
+        - verbose (bool): If True, print verbose information.
 
+        Returns:
+            None
+        """
+        self.run_status = PipelineRunStatus.CANCELED
+        self.failure_reason = PipelineFailureReason.CANCELED
+        self.failure_message = activity.get_failure_reason()
+        for activity in pending_activities:
+            activity.set_outcome((PipelineRunStatus.CANCELED, self.failure_message, False, None))
         if verbose:
-            status = self.get_run_status()
-            print(f"[Pipeline: {self.name}] -> Done with status = {status}.]\n")
+            self._log(f"\n[Pipeline: {self.name}] -> Canceled, {self.failure_message}\n")
 
     def get_run_status(self):
         """
@@ -256,6 +917,15 @@ class Pipeline:
         """
         return self.failure_reason
 
+    def get_run_id(self):
+        """
+        Get the id of the last run of the pipeline, used to resume it.
+
+        Returns:
+        str: The run id.
+        """
+        return self.run_id
+
     def get_failure_message(self):
         """
         Get the failure message of the pipeline run.
@@ -265,6 +935,26 @@ class Pipeline:
         """
         return self.failure_message
 
+    def discard_spilled_outputs(self):
+        """
+        Delete the spill files kept after the last run, for pipelines run once such as the copies run by a
+        TriggerScheduler or a ForEachActivity. Spilled named outputs of the run can no longer be read.
+
+        Returns:
+        None
+        """
+        if self.spill_store is not None and self.run_id is not None:
+            self.spill_store.discard(self.name, self.run_id)
+
+    def get_named_outputs(self) -> dict:
+        """
+        Get the named outputs of the succeeded activities of the last run, kept until the next run starts.
+
+        Returns:
+        dict: Activity name -> output name -> value.
+        """
+        return self._named_outputs
+
     def _validate_previous_output(self, previous_output: Any) -> bool:
         """
         Validate the keys of the 'previous_output' dictionary.
@@ -273,15 +963,24 @@ class Pipeline:
         - previous_output (dict): The dictionary to be validated.
 
         Raises:
-        - ValueError: If the keys are not valid according to the enum.
-        """
-        valid_keys = {var.value for var in SupportedPreviousActivityOutcomeVariable}
+        - ValueError: If the keys are neither valid according to the enum nor declared named outputs.
 
+        Returns:
+        bool: True if the keys are valid.
+        """
         if not isinstance(previous_output, dict):
             raise ValueError(f"Previous output must be a dictionary. current previous_output = {previous_output}")
 
+        valid_keys = {var.value for var in SupportedPreviousActivityOutcomeVariable}
+        if previous_output.keys() <= valid_keys:
+            return True
+        # Only scan the declared named outputs of all activities when the output has other keys
+        valid_keys.update(
+            output_name for activity in self.activities for output_name in activity.outputs
+        )
         for key in previous_output.keys():
             if key not in valid_keys:
                 raise ValueError(
                     f"Invalid key in previous_output: {key}. Allowed keys are: {valid_keys}."
                 )
+        return True
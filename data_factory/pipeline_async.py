@@ -0,0 +1,93 @@
+"""Module for the async execution of pipelines on an event loop, see Pipeline.arun"""
+
+import asyncio
+import contextlib
+import time
+from concurrent.futures import Executor
+from data_factory.activity import Activity
+from data_factory.dag import ActivityDagRun
+from data_factory.status import PipelineRunStatus
+
+
+class AsyncPipelineRunMixin:
+    """
+    Sequential and DAG runners of Pipeline.arun, sharing the activity bookkeeping of Pipeline.run.
+
+    Pipeline provides the run state and the helpers starting and completing activities. Resource budgets do not
+    apply to async runs, the semaphore of Pipeline.arun bounds them instead.
+    """
+
+    __slots__ = ()
+
+    async def _arun_sequential(
+        self, verbose: bool, executor: Executor, semaphore: asyncio.Semaphore
+    ):
+        """
+        Run the activities one after another in list order on the event loop, stopping at the first failure.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - executor (Executor): Executor for sync actions.
+        - semaphore (asyncio.Semaphore): Semaphore bounding the activities running at once, or None.
+
+        Returns:
+            None
+        """
+        previous_output = {}
+
+        for i, activity in enumerate(self.activities):
+            if activity.name in self._checkpoints:
+                previous_output = self._restore_checkpoint(activity, verbose)
+                continue
+            position = self._start_sequential_activity(i, activity, previous_output, verbose)
+            activity.queued_at = time.time()
+            async with semaphore or contextlib.nullcontext():
+                previous_output = self._spill(
+                    await activity.arun(executor, self._bound_parameters.get(activity.name))
+                )
+            if not self._complete_sequential_activity(activity, previous_output, position, verbose):
+                break
+        else:
+            self.run_status = PipelineRunStatus.SUCCEEDED  # pylint: disable=E0237
+
+    async def _arun_dag(
+        self, verbose: bool, executor: Executor, semaphore: asyncio.Semaphore
+    ):
+        """
+        Run the activities as a DAG on the event loop, starting every ready activity at once.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - executor (Executor): Executor for sync actions.
+        - semaphore (asyncio.Semaphore): Semaphore bounding the activities running at once, or None.
+
+        Returns:
+            None
+        """
+        dag_run = ActivityDagRun(self._activity_dag(), PipelineRunStatus.SKIPPED)
+        failed_activities = []
+
+        async def arun_activity(activity: Activity) -> tuple:
+            activity.queued_at = time.time()
+            async with semaphore or contextlib.nullcontext():
+                return activity, await activity.arun(
+                    executor, self._bound_parameters.get(activity.name)
+                )
+
+        running = set()
+        while dag_run.ready or running:
+            while dag_run.ready:
+                activity = self._start_dag_activity(dag_run, failed_activities, verbose)
+                if activity is not None:
+                    running.add(asyncio.ensure_future(arun_activity(activity)))
+
+            # Every ready activity may have been canceled or restored from a checkpoint
+            if not running:
+                continue
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                activity, result = task.result()
+                result = self._spill(result)
+                self._complete_dag_activity(dag_run, activity, result, failed_activities, verbose)
+
+        self._finish_dag(failed_activities, verbose)
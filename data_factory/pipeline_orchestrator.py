@@ -1,21 +1,103 @@
 """ Methods for Orchestrating Pipelines """
 
+import asyncio
+import io
+from collections import Counter
+from concurrent.futures import Executor, Future, as_completed
+from data_factory.cancellation import CancellationToken
+from data_factory.executor import ExecutorFactory, ExecutorType
+from data_factory.profiling import ActivityProfiler
+from data_factory.resources import ResourceBudget
+from data_factory.status import PipelineFailureReason, PipelineRunStatus
+
+
+def _run_pipeline(pipeline, verbose: bool, cancellation_token: CancellationToken = None) -> tuple:
+    """
+    Run a pipeline inside an executor worker, buffering its verbose output.
+
+    The pipeline may be a copy living in a worker process, so its outcome is returned to be applied to the
+    original pipeline.
+
+    Parameters:
+    - pipeline (Pipeline): The pipeline to run.
+    - verbose (bool): If True, collect verbose information.
+    - cancellation_token (CancellationToken, optional): Token canceling the run.
+
+    Returns:
+    tuple: The run id, run status, failure reason, failure message and duration of the pipeline, the outcome of
+    each of its activities, and the buffered verbose output.
+    """
+    log_stream = io.StringIO()
+    pipeline.run(verbose=verbose, log_stream=log_stream, cancellation_token=cancellation_token)
+    activity_outcomes = [activity.get_outcome() for activity in pipeline.activities]
+    return (
+        pipeline.get_run_id(),
+        pipeline.get_run_status(),
+        pipeline.get_failure_reason(),
+        pipeline.get_failure_message(),
+        pipeline.run_seconds,
+        activity_outcomes,
+        log_stream.getvalue(),
+    )
+
+
+def _apply_run_outcome(pipeline, outcome: tuple, executor_type: ExecutorType) -> str:
+    """
+    Apply the outcome returned by _run_pipeline to the original pipeline and its activities.
+
+    Pipelines run in worker processes have their metrics recorded here, the copy that ran left its exporters
+    behind.
+
+    Parameters:
+    - pipeline (Pipeline): The pipeline that was run.
+    - outcome (tuple): The outcome returned by _run_pipeline.
+    - executor_type (ExecutorType): The executor pool type the pipeline was run on.
+
+    Returns:
+    str: The buffered verbose output of the pipeline.
+    """
+    (
+        pipeline.run_id,
+        pipeline.run_status,
+        pipeline.failure_reason,
+        pipeline.failure_message,
+        pipeline.run_seconds,
+        activity_outcomes,
+        log,
+    ) = outcome
+    for activity, activity_outcome in zip(pipeline.activities, activity_outcomes):
+        activity.set_outcome(activity_outcome)
+    if executor_type == ExecutorType.PROCESS and pipeline.metrics_recorder is not None:
+        pipeline.metrics_recorder.record_run(pipeline)
+    return log
+
 
 class PipelineOrchestrator:
     """Class representing an orchestrator for managing multiple pipelines."""
 
-    def __init__(self, pipelines: list) -> None:
+    def __init__(
+        self, pipelines: list, profiler: ActivityProfiler = None, resource_budget: ResourceBudget = None
+    ) -> None:
         """
         Initialize PipelineOrchestrator instance.
 
         Parameters:
         - pipelines (list): List of pipeline instances to be orchestrated.
+        - profiler (ActivityProfiler, optional): If set, profiles the activities of the pipelines that have no
+          profiler of their own.
+        - resource_budget (ResourceBudget, optional): If set, the activities of the pipelines that have no
+          budget of their own share it, across the pipelines running at once.
 
         Returns:
         None
         """
         self.pipelines = pipelines
         self.validate_unique_pipeline_names()
+        for pipeline in pipelines:
+            if pipeline.profiler is None:
+                pipeline.profiler = profiler
+            if pipeline.resource_budget is None:
+                pipeline.resource_budget = resource_budget
 
     def validate_unique_pipeline_names(self):
         """
@@ -24,22 +106,61 @@ class PipelineOrchestrator:
         Raises:
         ValueError: If duplicate pipeline names are found.
         """
-        pipeline_names = [pipeline.name for pipeline in self.pipelines]
-        duplicate_names = set(
-            name for name in pipeline_names if pipeline_names.count(name) > 1
-        )
+        name_counts = Counter(pipeline.name for pipeline in self.pipelines)
+        duplicate_names = [name for name, count in name_counts.items() if count > 1]
 
         if duplicate_names:
             raise ValueError(
                 f"Duplicate pipeline names found: {', '.join(duplicate_names)}"
             )
 
-    def run_pipelines(self, verbose: bool = False):
+    def run_pipelines(
+        self,
+        verbose: bool = False,
+        max_workers: int = None,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        cancellation_token: CancellationToken = None,
+        fail_fast: bool = False,
+    ):
         """
-        Run multiple pipelines sequentially.
+        Run multiple pipelines, sequentially or concurrently on a bounded executor pool.
+
+        With fail_fast, the first pipeline that fails or times out cancels the other ones: pipelines not started
+        yet are canceled without running, running pipelines cancel their activities, see CancellationToken.
+        Pipelines running in worker processes of a PROCESS pool do not see the cancellation and run to the end.
 
         Parameters:
         - verbose (bool, optional): If True, print verbose information.
+        - max_workers (int, optional): If set, run up to max_workers pipelines at once instead of sequentially.
+        - executor_type (ExecutorType, optional): Pool used in concurrent mode, pipelines must be picklable for PROCESS.
+        - cancellation_token (CancellationToken, optional): Token canceling the pipelines.
+        - fail_fast (bool, optional): If True, a failed pipeline cancels the other ones, the cancellation does
+          not cancel cancellation_token itself.
+
+        Returns:
+        None
+        """
+        if fail_fast:
+            cancellation_token = CancellationToken(parent=cancellation_token)
+        try:
+            if max_workers is not None:
+                self._run_pipelines_concurrently(verbose, max_workers, executor_type, cancellation_token, fail_fast)
+            else:
+                self._run_pipelines_sequentially(verbose, cancellation_token, fail_fast)
+        finally:
+            if fail_fast:
+                cancellation_token.detach()
+
+    def _run_pipelines_sequentially(
+        self, verbose: bool, cancellation_token: CancellationToken = None, fail_fast: bool = False
+    ):
+        """
+        Run the pipelines one after another in list order.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - cancellation_token (CancellationToken, optional): Token canceling the pipelines.
+        - fail_fast (bool, optional): If True, a failed pipeline cancels cancellation_token.
 
         Returns:
         None
@@ -49,12 +170,212 @@ class PipelineOrchestrator:
                 print(
                     f"\n[Orchestrator] --> ({i+1}/{len(self.pipelines)}) [Running Pipeline: {pipeline.name}]"
                 )
-            pipeline.run(verbose=verbose)
+            pipeline.run(verbose=verbose, cancellation_token=cancellation_token)
             if verbose:
                 status = pipeline.get_run_status()
                 print(
                     f"[Orchestrator] --> ({i+1}/{len(self.pipelines)}) [Pipeline: {pipeline.name}] Done with status = {status}.\n"
                 )
+            if fail_fast:
+                self._cancel_if_failed(pipeline, cancellation_token)
+
+    def _run_pipelines_concurrently(
+        self,
+        verbose: bool,
+        max_workers: int,
+        executor_type: ExecutorType,
+        cancellation_token: CancellationToken = None,
+        fail_fast: bool = False,
+    ):
+        """
+        Run the pipelines concurrently on a bounded executor pool.
+
+        The verbose output of each pipeline is buffered in its worker and printed as one block once the
+        pipeline is done, so the output of concurrent pipelines does not interleave.
+
+        Parameters:
+        - verbose (bool): If True, print verbose information.
+        - max_workers (int): Maximum number of pipelines running at once.
+        - executor_type (ExecutorType): The executor pool type.
+        - cancellation_token (CancellationToken, optional): Token canceling the pipelines.
+        - fail_fast (bool, optional): If True, a failed pipeline cancels cancellation_token.
+
+        Returns:
+        None
+        """
+        with ExecutorFactory.create(executor_type, max_workers) as executor:
+            futures = {
+                executor.submit(_run_pipeline, pipeline, verbose, cancellation_token): i
+                for i, pipeline in enumerate(self.pipelines)
+            }
+            if fail_fast:
+                for future, i in futures.items():
+                    future.add_done_callback(
+                        lambda future, pipeline=self.pipelines[i]: self._cancel_if_failed(
+                            pipeline, cancellation_token, future
+                        )
+                    )
+            # Pipelines not started yet are dropped from the pool as soon as the token is canceled
+            unregister = (
+                cancellation_token.on_cancel(lambda: [future.cancel() for future in futures])
+                if cancellation_token is not None
+                else lambda: None
+            )
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    pipeline = self.pipelines[i]
+                    if future.cancelled():
+                        # Runs locally with the canceled token, which cancels every activity without running it
+                        pipeline.run(verbose=verbose, cancellation_token=cancellation_token)
+                        log = ""
+                    else:
+                        log = _apply_run_outcome(pipeline, future.result(), executor_type)
+                    if verbose:
+                        self._print_pipeline_log(i, pipeline, log)
+            finally:
+                unregister()
+
+    @staticmethod
+    def _cancel_if_failed(pipeline, cancellation_token: CancellationToken, future: Future = None):
+        """
+        Cancel the token if the pipeline failed or timed out, for fail-fast runs.
+
+        Concurrent runs check the outcome in the future of the pipeline as soon as it is done, before its worker
+        starts the next pipeline.
+
+        Parameters:
+        - pipeline (Pipeline): The pipeline that is done.
+        - cancellation_token (CancellationToken): The token of the run.
+        - future (Future, optional): The future of _run_pipeline, for concurrent runs.
+
+        Returns:
+        None
+        """
+        if future is None:
+            status = pipeline.get_run_status()
+        elif future.cancelled() or future.exception() is not None:
+            return
+        else:
+            status = future.result()[1]
+        if status in (PipelineRunStatus.FAILED, PipelineRunStatus.TIMED_OUT):
+            cancellation_token.cancel(f"Pipeline '{pipeline.name}' ended with status {status.value}.")
+
+    def run_distributed(
+        self,
+        task_queue,
+        verbose: bool = False,
+        timeout: float = None,
+        poll_seconds: float = 0.5,
+    ):
+        """
+        Run the pipelines on the workers of a task queue, see SqliteTaskQueue and TaskWorker.
+
+        Every pipeline is enqueued as one task and run by whichever worker leases it. The outcomes reported by the
+        workers are applied to the pipelines as they arrive. Pipelines whose task failed on every attempt end
+        FAILED with PipelineFailureReason.TASK_FAILED, pipelines not done within the timeout end TIMED_OUT and
+        their tasks that are still queued are canceled.
+
+        Parameters:
+        - task_queue (SqliteTaskQueue): The queue, the pipelines must be picklable.
+        - verbose (bool, optional): If True, print verbose information.
+        - timeout (float, optional): Maximum time to wait for the pipelines, in seconds.
+        - poll_seconds (float, optional): Time between two checks of the queue.
+
+        Returns:
+        None
+        """
+        task_ids = {task_queue.enqueue_pipeline(pipeline): i for i, pipeline in enumerate(self.pipelines)}
+        if verbose:
+            print(f"[Orchestrator] --> Enqueued {len(task_ids)} pipelines in {task_queue.path}.")
+        tasks = task_queue.wait(list(task_ids), timeout=timeout, poll_seconds=poll_seconds)
+        task_queue.cancel([task_id for task_id in task_ids if task_id not in tasks])
+        for task_id, i in task_ids.items():
+            pipeline = self.pipelines[i]
+            task = tasks.get(task_id)
+            log = ""
+            if task is None:
+                pipeline.run_status = PipelineRunStatus.TIMED_OUT
+                pipeline.failure_reason = PipelineFailureReason.TIMEOUT
+                pipeline.failure_message = f"Task {task_id} was not done after {timeout} seconds."
+            elif task["result"] is None:
+                pipeline.run_status = PipelineRunStatus.FAILED
+                pipeline.failure_reason = PipelineFailureReason.TASK_FAILED
+                pipeline.failure_message = f"Task {task_id} failed: {task['error']}"
+            else:
+                log = _apply_run_outcome(pipeline, task["result"], ExecutorType.PROCESS)
+            if verbose:
+                self._print_pipeline_log(i, pipeline, log)
+
+    async def arun(
+        self,
+        verbose: bool = False,
+        max_concurrency: int = None,
+        executor: Executor = None,
+        cancellation_token: CancellationToken = None,
+        fail_fast: bool = False,
+    ):
+        """
+        Run all pipelines concurrently on the running event loop.
+
+        Every pipeline is run with Pipeline.arun, the activities of all pipelines share one semaphore so at most
+        max_concurrency activities run at once. The verbose output of each pipeline is printed as one block
+        once the pipeline is done.
+
+        Parameters:
+        - verbose (bool, optional): If True, print verbose information.
+        - max_concurrency (int, optional): Maximum number of activities running at once across all pipelines.
+        - executor (Executor, optional): Executor for sync actions, defaults to the loop's default executor.
+        - cancellation_token (CancellationToken, optional): Token canceling the pipelines.
+        - fail_fast (bool, optional): If True, a failed pipeline cancels the other ones, see run_pipelines.
+
+        Returns:
+        None
+        """
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        if fail_fast:
+            cancellation_token = CancellationToken(parent=cancellation_token)
+
+        async def arun_pipeline(i: int, pipeline):
+            log_stream = io.StringIO()
+            await pipeline.arun(
+                verbose=verbose,
+                executor=executor,
+                log_stream=log_stream,
+                semaphore=semaphore,
+                cancellation_token=cancellation_token,
+            )
+            if verbose:
+                self._print_pipeline_log(i, pipeline, log_stream.getvalue())
+            if fail_fast:
+                self._cancel_if_failed(pipeline, cancellation_token)
+
+        try:
+            await asyncio.gather(
+                *(arun_pipeline(i, pipeline) for i, pipeline in enumerate(self.pipelines))
+            )
+        finally:
+            if fail_fast:
+                cancellation_token.detach()
+
+    def _print_pipeline_log(self, i: int, pipeline, log: str):
+        """
+        Print the buffered verbose output of a pipeline as one block.
+
+        Parameters:
+        - i (int): Index of the pipeline in the orchestrator.
+        - pipeline (Pipeline): The pipeline that is done.
+        - log (str): The buffered verbose output of the pipeline.
+
+        Returns:
+        None
+        """
+        status = pipeline.get_run_status()
+        print(
+            f"\n[Orchestrator] --> ({i+1}/{len(self.pipelines)}) [Running Pipeline: {pipeline.name}]"
+            f"{log}"
+            f"[Orchestrator] --> ({i+1}/{len(self.pipelines)}) [Pipeline: {pipeline.name}] Done with status = {status}.\n"
+        )
 
     def get_run_statuses(self):
         """
@@ -0,0 +1,143 @@
+"""Module for the compiled execution plan of a pipeline"""
+
+from types import MappingProxyType
+from typing import Any
+from data_factory.dag import ActivityDag
+
+
+class ActivityBinding:
+    """Parameter bindings of one activity, resolved when the pipeline is compiled."""
+
+    __slots__ = ("name", "base_parameters", "forwarded_outputs", "inputs")
+
+    def __init__(
+        self, name: str, base_parameters: dict, forwarded_outputs: tuple, inputs: tuple
+    ) -> None:
+        """
+        Initialize ActivityBinding instance.
+
+        Parameters:
+        - name (str): The name of the activity.
+        - base_parameters (dict): The parameters of the activity, with the matching pipeline parameters applied.
+        - forwarded_outputs (tuple): (output name, is overridden, override) of the previous outputs passed on to
+          the activity, overridden when the pipeline has a parameter of the same name.
+        - inputs (tuple): (parameter, producer, output name) of the inputs bound to named outputs.
+
+        Returns:
+        None
+        """
+        self.name = name
+        self.base_parameters = MappingProxyType(base_parameters)
+        self.forwarded_outputs = forwarded_outputs
+        self.inputs = inputs
+
+    def __getstate__(self) -> tuple:
+        return self.name, dict(self.base_parameters), self.forwarded_outputs, self.inputs
+
+    def __setstate__(self, state: tuple):
+        self.__init__(*state)
+
+
+class PipelinePlan:
+    """
+    Execution plan of a pipeline, compiled once and reused by every run.
+
+    The plan resolves which pipeline parameters, previous outputs and named outputs each activity receives, and
+    builds the dependency graph of DAG pipelines, so runs only merge the outputs that change from run to run.
+    Runs of the plan hand every activity its own parameters dict instead of updating activity.parameters, so no
+    state leaks from one run to the next. The plan is a snapshot: compile the pipeline again after changing its
+    activities or parameters.
+    """
+
+    def __init__(self, pipeline, forwarded_output_names: tuple) -> None:
+        """
+        Compile the plan of a pipeline.
+
+        Parameters:
+        - pipeline (Pipeline): The pipeline.
+        - forwarded_output_names (tuple): Names of the previous outputs passed on to the next activities.
+
+        Raises:
+        - ValueError: If the dependency graph of a DAG pipeline is invalid, see ActivityDag.
+
+        Returns:
+        None
+        """
+        self.pipeline_name = pipeline.name
+        self.is_dag = any(activity.depends_on for activity in pipeline.activities)
+        self.dag = ActivityDag(pipeline.activities) if self.is_dag else None
+        self.valid_output_names = frozenset(forwarded_output_names).union(
+            output_name for activity in pipeline.activities for output_name in activity.outputs
+        )
+        pipeline_parameters = pipeline.parameters
+        forwarded_outputs = tuple(
+            (output_name, output_name in pipeline_parameters, pipeline_parameters.get(output_name))
+            for output_name in forwarded_output_names
+        )
+        self.bindings = MappingProxyType(
+            {
+                activity.name: ActivityBinding(
+                    activity.name,
+                    {
+                        key: pipeline_parameters.get(key, value)
+                        for key, value in activity.parameters.items()
+                    },
+                    forwarded_outputs,
+                    tuple(
+                        (parameter, producer, output_name)
+                        for parameter, (producer, output_name) in activity.inputs.items()
+                    ),
+                )
+                for activity in pipeline.activities
+            }
+        )
+
+    def __getstate__(self) -> dict:
+        # Mapping proxies cannot be pickled, plans are sent to worker processes with their pipeline
+        state = dict(self.__dict__)
+        state["bindings"] = dict(self.bindings)
+        return state
+
+    def __setstate__(self, state: dict):
+        state["bindings"] = MappingProxyType(state["bindings"])
+        self.__dict__.update(state)
+
+    def bind(self, activity_name: str, previous_output: Any, named_outputs: dict) -> dict:
+        """
+        Build the parameters of one activity run.
+
+        Parameters:
+        - activity_name (str): The name of the activity.
+        - previous_output (dict): The output of the previous activity, or the merged upstream outputs in a DAG.
+        - named_outputs (dict): Named outputs of the succeeded activities of the run, activity -> output -> value.
+
+        Raises:
+        - ValueError: If the previous output has unknown keys or a bound input is missing.
+
+        Returns:
+        dict: The parameters of the run, a new dict.
+        """
+        binding = self.bindings[activity_name]
+        parameters = dict(binding.base_parameters)
+        if previous_output:
+            if not isinstance(previous_output, dict):
+                raise ValueError(
+                    f"Previous output must be a dictionary. current previous_output type = {type(previous_output).__name__}"
+                )
+            unknown = previous_output.keys() - self.valid_output_names
+            if unknown:
+                raise ValueError(
+                    f"Invalid key in previous_output: {sorted(unknown)[0]}. Allowed keys are: {set(self.valid_output_names)}."
+                )
+            for output_name, overridden, override in binding.forwarded_outputs:
+                if output_name in previous_output:
+                    parameters[output_name] = override if overridden else previous_output[output_name]
+        for parameter, producer, output_name in binding.inputs:
+            outputs = named_outputs.get(producer, {})
+            if output_name not in outputs:
+                raise ValueError(
+                    f"Input '{parameter}' of activity '{activity_name}' is bound to '{producer}.{output_name}', "
+                    "which is not a named output of a succeeded earlier activity."
+                )
+            parameters[parameter] = outputs[output_name]
+        return parameters
@@ -0,0 +1,284 @@
+"""Module for the opt-in profiling of activity runs with cProfile and tracemalloc"""
+
+import cProfile
+import heapq
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+from enum import Enum
+from typing import Any
+
+# Maximum depth of the collapsed stacks, deeper calls are folded into their ancestor at this depth
+MAX_STACK_DEPTH = 256
+# Subtrees taking less time on a stack are dropped from the collapsed stacks
+MIN_STACK_SECONDS = 1e-6
+# Maximum number of frames visited when collapsing stacks, the cheapest subtrees left are dropped
+MAX_STACK_FRAMES = 100_000
+
+
+class ProfileMode(Enum):
+    """Enum representing what the profiling of an activity run measures."""
+
+    # cProfile of the action: profile.pstats, profile.txt and profile.collapsed
+    CPU = "cpu"
+    # tracemalloc of the action: allocations.txt
+    MEMORY = "memory"
+
+
+class ActivityProfiler:
+    """
+    Profiler of the activities of pipeline runs, off unless a pipeline or an orchestrator is given one.
+
+    Every profiled run writes its reports to <output_dir>/<pipeline name>/<run id>/<activity name>/:
+    - profile.pstats: cProfile statistics, for pstats or snakeviz.
+    - profile.txt: the functions taking the most cumulative time.
+    - profile.collapsed: collapsed stacks in microseconds, the input of flamegraph.pl or speedscope.
+    - allocations.txt: the peak traced memory and the lines allocating the most memory.
+
+    Only the action is profiled, in the thread or worker process running it. Async actions awaited on the event
+    loop of Pipeline.arun are not profiled. tracemalloc is process wide, so the allocations of activities
+    running at the same time in one process are reported by each of them.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        activities: list = None,
+        sample_rate: float = 1.0,
+        modes: tuple = (ProfileMode.CPU,),
+        top: int = 30,
+        seed: int = None,
+    ) -> None:
+        """
+        Initialize ActivityProfiler instance.
+
+        Parameters:
+        - output_dir (str): Directory the reports are written under.
+        - activities (list, optional): Names of the activities to profile, defaults to all of them.
+        - sample_rate (float, optional): Fraction of the runs of these activities that are profiled.
+        - modes (tuple, optional): ProfileMode members to measure.
+        - top (int, optional): Number of functions and allocation sites in the text reports.
+        - seed (int, optional): Seed of the sampling, for reproducible selections.
+
+        Raises:
+        - ValueError: If sample_rate is not between 0 and 1, or modes is empty or holds a non ProfileMode.
+
+        Returns:
+        None
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}.")
+        if not modes or not all(isinstance(mode, ProfileMode) for mode in modes):
+            raise ValueError(
+                f"Invalid modes. Allowed modes are {', '.join(mode.value for mode in ProfileMode)}."
+            )
+        self.output_dir = output_dir
+        self.activities = None if activities is None else frozenset(activities)
+        self.sample_rate = sample_rate
+        self.modes = frozenset(modes)
+        self.top = top
+        self._random = random.Random(seed)
+
+    def activity_profile(self, pipeline_name: str, run_id: str, activity_name: str) -> "ActivityProfile":
+        """
+        Select whether a run of an activity is profiled.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the pipeline run.
+        - activity_name (str): The name of the activity.
+
+        Returns:
+        ActivityProfile: The profile of the run, None if the run is not profiled.
+        """
+        if self.activities is not None and activity_name not in self.activities:
+            return None
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return None
+        directory = os.path.join(self.output_dir, pipeline_name, str(run_id), activity_name)
+        return ActivityProfile(directory, self.modes, self.top)
+
+
+class ActivityProfile:
+    """Profiling of one activity run, carried by the activity to the thread or process running its action."""
+
+    __slots__ = ("directory", "modes", "top")
+
+    def __init__(self, directory: str, modes: frozenset, top: int) -> None:
+        """
+        Initialize ActivityProfile instance.
+
+        Parameters:
+        - directory (str): Directory the reports of the run are written to.
+        - modes (frozenset): ProfileMode members to measure.
+        - top (int): Number of functions and allocation sites in the text reports.
+
+        Returns:
+        None
+        """
+        self.directory = directory
+        self.modes = modes
+        self.top = top
+
+    def __getstate__(self) -> tuple:
+        return self.directory, self.modes, self.top
+
+    def __setstate__(self, state: tuple):
+        self.directory, self.modes, self.top = state
+
+    def call(self, function: callable, *args: Any) -> Any:
+        """
+        Call a function under the profilers, writing their reports even if it raises.
+
+        Parameters:
+        - function (callable): The function, the action runner of the activity.
+        - args: Its arguments.
+
+        Returns:
+        Any: The output of the function.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        memory = ProfileMode.MEMORY in self.modes
+        baseline = _start_tracing() if memory else None
+        profiler = None
+        if ProfileMode.CPU in self.modes:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Python 3.12+ allows a single active profiler per process
+                self._write("profile.txt", f"Not profiled: {e}\n")
+                profiler = None
+        try:
+            return function(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._write_cpu_reports(profiler)
+            if memory:
+                self._write_allocations(baseline)
+
+    def _write(self, file_name: str, text: str):
+        """Write a text report of the run."""
+        with open(os.path.join(self.directory, file_name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def _write_cpu_reports(self, profiler: cProfile.Profile):
+        """Write the statistics, the top functions and the collapsed stacks of a cProfile run."""
+        profiler.dump_stats(os.path.join(self.directory, "profile.pstats"))
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        self._write("profile.txt", text.getvalue())
+        stacks = collapsed_stacks(stats)
+        self._write("profile.collapsed", "".join(f"{stack} {microseconds}\n" for stack, microseconds in stacks))
+
+    def _write_allocations(self, baseline: tracemalloc.Snapshot):
+        """Write the peak traced memory and the top allocation sites since the baseline snapshot."""
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        _stop_tracing()
+        filters = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+        differences = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+        lines = [f"Peak traced memory: {peak} bytes", f"Top {self.top} allocation sites by size:"]
+        lines.extend(
+            str(difference) for difference in differences[: self.top] if difference.size_diff > 0
+        )
+        self._write("allocations.txt", "\n".join(lines) + "\n")
+
+
+# tracemalloc is process wide, it is started by the first profiled run and stopped by the last one
+_TRACING_LOCK = threading.Lock()
+_TRACING = {"runs": 0, "owned": False}
+
+
+def _start_tracing() -> tracemalloc.Snapshot:
+    """Start tracing allocations, if not traced yet, and take the baseline snapshot of a run."""
+    with _TRACING_LOCK:
+        if _TRACING["runs"] == 0:
+            _TRACING["owned"] = not tracemalloc.is_tracing()
+            if _TRACING["owned"]:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _TRACING["runs"] += 1
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracing():
+    """Stop tracing allocations when the last profiled run is done, unless tracing was started elsewhere."""
+    with _TRACING_LOCK:
+        _TRACING["runs"] -= 1
+        if _TRACING["runs"] == 0 and _TRACING["owned"]:
+            tracemalloc.stop()
+
+
+def _function_label(function: tuple) -> str:
+    """Frame label of a pstats function key, semicolons being the separator of collapsed stacks."""
+    file_name, line, name = function
+    if file_name == "~":
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(file_name)}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> list:
+    """
+    Convert cProfile statistics into collapsed stacks.
+
+    cProfile keeps the time of every caller -> callee edge, not full stacks, so the time of a function is split
+    between its callers in proportion to the time of each edge, as flameprof does. Recursive calls are folded
+    into their first occurrence on the stack. The number of stacks grows with the number of paths of the call
+    graph, so subtrees are walked most expensive first, those under MIN_STACK_SECONDS are dropped and the walk
+    stops after MAX_STACK_FRAMES frames.
+
+    Parameters:
+    - stats (pstats.Stats): The statistics.
+
+    Returns:
+    list: (stack, microseconds) pairs, the stack being the frame labels from the root joined by semicolons.
+    """
+    entries = stats.stats  # pylint: disable=E1101
+    callees = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((function, caller_cumulative))
+    # The profiler's own disable call is the only root besides the profiled function
+    roots = [
+        function for function, entry in entries.items() if not entry[4] and "_lsprof.Profiler" not in function[2]
+    ]
+    stacks = {}
+    # Most expensive first walk of (-seconds on the stack, tie breaker, function, share of its time, stack so
+    # far, functions on the stack)
+    order = itertools.count()
+    pending = [(-entries[root][3], next(order), root, 1.0, (), frozenset()) for root in roots]
+    heapq.heapify(pending)
+    for _ in range(MAX_STACK_FRAMES):
+        if not pending:
+            break
+        _, _, function, share, stack, on_stack = heapq.heappop(pending)
+        _, _, own_time, cumulative, _ = entries[function]
+        stack = stack + (_function_label(function),)
+        microseconds = int(own_time * share * 1_000_000)
+        if microseconds:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + microseconds
+        if len(stack) >= MAX_STACK_DEPTH or not cumulative:
+            continue
+        on_stack = on_stack | {function}
+        for callee, edge_cumulative in callees.get(function, ()):
+            callee_cumulative = entries[callee][3]
+            seconds = share * edge_cumulative
+            if callee not in on_stack and callee_cumulative and seconds >= MIN_STACK_SECONDS:
+                heapq.heappush(
+                    pending,
+                    (-seconds, next(order), callee, seconds / callee_cumulative, stack, on_stack),
+                )
+    return sorted(stacks.items())
@@ -0,0 +1,339 @@
+"""Module for the resource-aware scheduling of activities against CPU, memory and resource class budgets"""
+
+import contextlib
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any
+from data_factory.cancellation import CancellationToken, OperationCanceledError
+
+
+class ResourceRequest:
+    """Resources an activity holds while it runs, declared with Activity(resources=...)."""
+
+    __slots__ = ("cpu_slots", "memory_mb", "resource_class", "priority")
+
+    def __init__(
+        self,
+        cpu_slots: int = 1,
+        memory_mb: int = 0,
+        resource_class: str = None,
+        priority: int = 0,
+    ) -> None:
+        """
+        Initialize ResourceRequest instance.
+
+        Parameters:
+        - cpu_slots (int, optional): Number of CPU slots of the budget the activity holds.
+        - memory_mb (int, optional): Memory of the budget the activity holds, in MB.
+        - resource_class (str, optional): Named resource the activity holds one slot of, for instance 'spark'
+          or 'http', bounded by the class_slots of the budget.
+        - priority (int, optional): Higher priorities are granted first among the activities waiting.
+
+        Raises:
+        - ValueError: If cpu_slots or memory_mb is negative.
+
+        Returns:
+        None
+        """
+        if cpu_slots < 0 or memory_mb < 0:
+            raise ValueError(
+                f"cpu_slots and memory_mb must not be negative, got {cpu_slots} and {memory_mb}."
+            )
+        self.cpu_slots = cpu_slots
+        self.memory_mb = memory_mb
+        self.resource_class = resource_class
+        self.priority = priority
+
+    def __getstate__(self) -> tuple:
+        return self.cpu_slots, self.memory_mb, self.resource_class, self.priority
+
+    def __setstate__(self, state: tuple):
+        self.cpu_slots, self.memory_mb, self.resource_class, self.priority = state
+
+    def __repr__(self) -> str:
+        return (
+            f"ResourceRequest(cpu_slots={self.cpu_slots}, memory_mb={self.memory_mb}, "
+            f"resource_class={self.resource_class!r}, priority={self.priority})"
+        )
+
+
+# Request of the activities declaring no resources
+DEFAULT_RESOURCE_REQUEST = ResourceRequest()
+
+
+class _Waiter:
+    """Request waiting for its resources, with the callback starting its work once they are granted."""
+
+    __slots__ = ("request", "sequence", "enqueued", "on_grant")
+
+    def __init__(self, request: ResourceRequest, sequence: int, on_grant: callable) -> None:
+        self.request = request
+        self.sequence = sequence
+        self.enqueued = time.monotonic()
+        self.on_grant = on_grant
+
+
+class ResourceBudget:
+    """
+    Global CPU, memory and resource class budget shared by the activities of pipelines and orchestrators.
+
+    Activities wait for the resources they request before they run and release them when they are done.
+    Waiting activities are granted by effective priority, their priority plus one per aging_seconds they have
+    waited, then in arrival order. Activities that do not fit are passed over by smaller ones that do, so the
+    budget stays packed, unless they have waited starvation_seconds: the budget then holds back every activity
+    behind them until they fit, so large requests are not starved by a stream of small ones.
+
+    Budgets are process local, a copy sent to another process budgets the activities of that process only.
+    """
+
+    def __init__(
+        self,
+        cpu_slots: int = None,
+        memory_mb: int = None,
+        class_slots: dict = None,
+        aging_seconds: float = 10.0,
+        starvation_seconds: float = 60.0,
+    ) -> None:
+        """
+        Initialize ResourceBudget instance.
+
+        Parameters:
+        - cpu_slots (int, optional): Number of CPU slots held at once, unbounded if None.
+        - memory_mb (int, optional): Memory held at once, in MB, unbounded if None.
+        - class_slots (dict, optional): Resource class -> number of activities of the class running at once.
+          Classes missing from the dict are unbounded.
+        - aging_seconds (float, optional): Waiting time raising the effective priority of a request by one.
+        - starvation_seconds (float, optional): Waiting time after which a request holds back the requests
+          behind it until it fits.
+
+        Raises:
+        - ValueError: If a budget is negative, or aging_seconds is not positive.
+
+        Returns:
+        None
+        """
+        class_slots = dict(class_slots or {})
+        budgets = [cpu_slots, memory_mb, starvation_seconds, *class_slots.values()]
+        if any(budget is not None and budget < 0 for budget in budgets) or aging_seconds <= 0:
+            raise ValueError("Resource budgets must not be negative and aging_seconds must be positive.")
+        self.cpu_slots = cpu_slots
+        self.memory_mb = memory_mb
+        self.class_slots = class_slots
+        self.aging_seconds = aging_seconds
+        self.starvation_seconds = starvation_seconds
+        self._lock = threading.Lock()
+        self._used_cpu_slots = 0
+        self._used_memory_mb = 0
+        self._used_class_slots = {}
+        self._waiters = []
+        self._sequence = itertools.count()
+        # Grants are started by a dispatcher thread, not by the executor threads releasing resources
+        self._grants = queue.SimpleQueue()
+        self._dispatcher = None
+
+    def __getstate__(self) -> tuple:
+        return self.cpu_slots, self.memory_mb, self.class_slots, self.aging_seconds, self.starvation_seconds
+
+    def __setstate__(self, state: tuple):
+        self.__init__(*state)
+
+    def usage(self) -> dict:
+        """
+        Get the resources held by running activities and the number of waiting activities.
+
+        Returns:
+        dict: cpu_slots, memory_mb, class_slots (resource class -> slots held) and waiting.
+        """
+        with self._lock:
+            return {
+                "cpu_slots": self._used_cpu_slots,
+                "memory_mb": self._used_memory_mb,
+                "class_slots": dict(self._used_class_slots),
+                "waiting": len(self._waiters),
+            }
+
+    def submit(
+        self,
+        executor: Executor,
+        request: ResourceRequest,
+        function: callable,
+        *args: Any,
+        cancellation_token: CancellationToken = None,
+    ) -> Future:
+        """
+        Submit a function to an executor once the resources it requests are granted.
+
+        Parameters:
+        - executor (Executor): The executor running the function.
+        - request (ResourceRequest): The resources held while the function runs, None for the default request.
+        - function (callable): The function.
+        - args: Its arguments.
+        - cancellation_token (CancellationToken, optional): Token whose cancellation withdraws the request and
+          cancels the future, if the resources are not granted yet.
+
+        Raises:
+        - ValueError: If the request exceeds the budget, it could never be granted.
+
+        Returns:
+        Future: Future of the output of the function. Canceling it before the resources are granted drops it.
+        """
+        request = request or DEFAULT_RESOURCE_REQUEST
+        future = Future()
+
+        def start():
+            if not future.set_running_or_notify_cancel():
+                self._release(request)
+                return
+            try:
+                inner = executor.submit(function, *args)
+            except BaseException as e:  # pylint: disable=W0718
+                self._release(request)
+                future.set_exception(e)
+                return
+            inner.add_done_callback(lambda inner: self._complete(inner, future, request))
+
+        def withdraw():
+            # Waiters of concurrent.futures.wait only learn of the cancellation from set_running_or_notify_cancel
+            if self._withdraw(waiter) and future.cancel():
+                future.set_running_or_notify_cancel()
+
+        waiter = self._acquire(request, start)
+        if cancellation_token is not None:
+            unregister = cancellation_token.on_cancel(withdraw)
+            future.add_done_callback(lambda _: unregister())
+        return future
+
+    @contextlib.contextmanager
+    def reserve(self, request: ResourceRequest, cancellation_token: CancellationToken = None):
+        """
+        Hold the resources of a request for the duration of a with block, waiting until they are granted.
+
+        Parameters:
+        - request (ResourceRequest): The resources, None for the default request.
+        - cancellation_token (CancellationToken, optional): Token whose cancellation withdraws the request,
+          if the resources are not granted yet.
+
+        Raises:
+        - ValueError: If the request exceeds the budget, it could never be granted.
+        - OperationCanceledError: If the token is canceled before the resources are granted.
+
+        Returns:
+        Context manager holding the resources.
+        """
+        request = request or DEFAULT_RESOURCE_REQUEST
+        granted = threading.Event()
+        withdrawn = threading.Event()
+
+        def withdraw():
+            if self._withdraw(waiter):
+                withdrawn.set()
+                granted.set()
+
+        waiter = self._acquire(request, granted.set)
+        unregister = None if cancellation_token is None else cancellation_token.on_cancel(withdraw)
+        granted.wait()
+        if unregister is not None:
+            unregister()
+        if withdrawn.is_set():
+            raise OperationCanceledError(f"Canceled: {cancellation_token.reason}")
+        try:
+            yield
+        finally:
+            self._release(request)
+
+    def _complete(self, inner: Future, future: Future, request: ResourceRequest):
+        """Release the resources of a function that is done and pass its outcome to the submitted future."""
+        self._release(request)
+        if inner.cancelled():
+            future.cancel()
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+
+    def _acquire(self, request: ResourceRequest, on_grant: callable) -> _Waiter:
+        """Queue a request, on_grant is called by the dispatcher thread once it is granted."""
+        self._validate(request)
+        waiter = _Waiter(request, next(self._sequence), on_grant)
+        with self._lock:
+            self._waiters.append(waiter)
+            self._schedule()
+        return waiter
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Drop a request that is still waiting, returning False if its resources are already granted."""
+        with self._lock:
+            if waiter not in self._waiters:
+                return False
+            self._waiters.remove(waiter)
+            # A starving request held back the requests behind it
+            self._schedule()
+            return True
+
+    def _release(self, request: ResourceRequest):
+        """Give the resources of a request back, granting the waiting requests that now fit."""
+        with self._lock:
+            self._used_cpu_slots -= request.cpu_slots
+            self._used_memory_mb -= request.memory_mb
+            if request.resource_class is not None:
+                self._used_class_slots[request.resource_class] -= 1
+            self._schedule()
+
+    def _validate(self, request: ResourceRequest):
+        """Check that a request fits in the empty budget."""
+        class_budget = self.class_slots.get(request.resource_class)
+        if (
+            (self.cpu_slots is not None and request.cpu_slots > self.cpu_slots)
+            or (self.memory_mb is not None and request.memory_mb > self.memory_mb)
+            or class_budget == 0
+        ):
+            raise ValueError(f"{request} exceeds the resource budget, it can never be granted.")
+
+    def _fits(self, request: ResourceRequest) -> bool:
+        """Check whether a request fits in the free resources, the lock being held."""
+        if self.cpu_slots is not None and self._used_cpu_slots + request.cpu_slots > self.cpu_slots:
+            return False
+        if self.memory_mb is not None and self._used_memory_mb + request.memory_mb > self.memory_mb:
+            return False
+        class_budget = self.class_slots.get(request.resource_class)
+        return class_budget is None or self._used_class_slots.get(request.resource_class, 0) < class_budget
+
+    def _schedule(self):
+        """Grant the waiting requests that fit, by effective priority, the lock being held."""
+        if not self._waiters:
+            return
+        now = time.monotonic()
+        self._waiters.sort(
+            key=lambda waiter: (
+                -(waiter.request.priority + (now - waiter.enqueued) / self.aging_seconds),
+                waiter.sequence,
+            )
+        )
+        waiting = []
+        for index, waiter in enumerate(self._waiters):
+            request = waiter.request
+            if not self._fits(request):
+                waiting.append(waiter)
+                if now - waiter.enqueued >= self.starvation_seconds:
+                    waiting.extend(self._waiters[index + 1:])
+                    break
+                continue
+            self._used_cpu_slots += request.cpu_slots
+            self._used_memory_mb += request.memory_mb
+            if request.resource_class is not None:
+                self._used_class_slots[request.resource_class] = (
+                    self._used_class_slots.get(request.resource_class, 0) + 1
+                )
+            self._grants.put(waiter.on_grant)
+        self._waiters = waiting
+        if self._dispatcher is None and not self._grants.empty():
+            self._dispatcher = threading.Thread(target=self._dispatch, name="resource-budget", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        """Start the granted requests, in grant order."""
+        while True:
+            self._grants.get()()
@@ -0,0 +1,342 @@
+"""Module for the SQLite run history of pipelines and activities"""
+
+import atexit
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+from data_factory.metrics import MetricsExporter
+from data_factory.status import PipelineRunStatus
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS pipeline_runs (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        pipeline TEXT NOT NULL,
+        status TEXT,
+        started_at REAL NOT NULL,
+        wall_seconds REAL,
+        failure_reason TEXT,
+        failure_message TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_runs (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        pipeline TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        status TEXT,
+        started_at REAL NOT NULL,
+        wall_seconds REAL,
+        cpu_seconds REAL,
+        queue_wait_seconds REAL,
+        rows INTEGER,
+        bytes INTEGER,
+        cache_hit INTEGER,
+        failure_reason TEXT
+    )
+    """,
+    # Last run of a pipeline, optionally with a given status
+    "CREATE INDEX IF NOT EXISTS pipeline_runs_by_status ON pipeline_runs (pipeline, status, started_at)",
+    "CREATE INDEX IF NOT EXISTS pipeline_runs_by_time ON pipeline_runs (pipeline, started_at)",
+    "CREATE INDEX IF NOT EXISTS pipeline_runs_by_run_id ON pipeline_runs (run_id)",
+    # Covering index of the duration statistics of an activity over a time range
+    "CREATE INDEX IF NOT EXISTS activity_runs_by_time ON activity_runs "
+    "(pipeline, activity, started_at, status, wall_seconds)",
+    "CREATE INDEX IF NOT EXISTS activity_runs_by_run_id ON activity_runs (run_id)",
+)
+
+_PIPELINE_COLUMNS = ("run_id", "pipeline", "status", "started_at", "wall_seconds", "failure_reason", "failure_message")
+_ACTIVITY_COLUMNS = (
+    "run_id",
+    "pipeline",
+    "activity",
+    "status",
+    "started_at",
+    "wall_seconds",
+    "cpu_seconds",
+    "queue_wait_seconds",
+    "rows",
+    "bytes",
+    "cache_hit",
+    "failure_reason",
+)
+
+
+def _insert_statement(table: str, columns: tuple) -> str:
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+class RunHistoryStore(MetricsExporter):
+    """
+    SQLite history of pipeline and activity runs, persisted across processes.
+
+    The store is a metrics exporter: pipelines record their runs in it through a MetricsRecorder. Recording a run
+    only buffers its rows, a background thread writes them in batches, one transaction per batch. Queries flush
+    the buffer first, so they see every recorded run. The database uses write-ahead logging, so several
+    processes can read it while one writes. Queries search indexes by pipeline, activity, status and start
+    time, their cost grows with the runs they match rather than with the size of the history.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_seconds: float = 1.0) -> None:
+        """
+        Initialize RunHistoryStore instance, creating the database if needed.
+
+        Parameters:
+        - path (str): Path of the SQLite database file.
+        - batch_size (int, optional): Number of buffered rows that triggers a write before flush_seconds.
+        - flush_seconds (float, optional): Maximum time rows stay buffered.
+
+        Returns:
+        None
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        self._pipeline_rows = []
+        self._activity_rows = []
+        self._buffer_lock = threading.Condition()
+        # Serializes the writes and queries sharing the connection
+        self._connection_lock = threading.Lock()
+        self._closed = False
+        self._writer = None
+        atexit.register(self.close)
+
+    def export(self, events: list):
+        """
+        Buffer the runs of events, written by the background thread.
+
+        Parameters:
+        - events (list): Event dicts of a MetricsRecorder, one per activity and one for the pipeline.
+
+        Raises:
+        - ValueError: If the store is closed.
+
+        Returns:
+        None
+        """
+        pipeline_rows = []
+        activity_rows = []
+        pipeline_started_at = {
+            event["run_id"]: event["started_at"] for event in events if event["event"] == "pipeline"
+        }
+        for event in events:
+            if event["event"] == "pipeline":
+                pipeline_rows.append(tuple(event.get(column) for column in _PIPELINE_COLUMNS))
+                continue
+            # Activities that did not start, skipped or cancelled, are recorded at the start of their run
+            row = {
+                **event,
+                "started_at": event.get("started_at") or pipeline_started_at.get(event["run_id"], time.time()),
+                "cache_hit": int(bool(event.get("cache_hit"))),
+                "failure_reason": None if event.get("failure_reason") is None else str(event["failure_reason"]),
+            }
+            activity_rows.append(tuple(row.get(column) for column in _ACTIVITY_COLUMNS))
+        with self._buffer_lock:
+            if self._closed:
+                raise ValueError(f"Run history store '{self.path}' is closed.")
+            self._pipeline_rows.extend(pipeline_rows)
+            self._activity_rows.extend(activity_rows)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="run-history-writer", daemon=True)
+                self._writer.start()
+            if len(self._pipeline_rows) + len(self._activity_rows) >= self.batch_size:
+                self._buffer_lock.notify()
+
+    def _write_loop(self):
+        """Write the buffered rows every flush_seconds, or as soon as a batch is full."""
+        while True:
+            with self._buffer_lock:
+                self._buffer_lock.wait_for(
+                    lambda: self._closed
+                    or len(self._pipeline_rows) + len(self._activity_rows) >= self.batch_size,
+                    timeout=self.flush_seconds,
+                )
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows now.
+
+        Returns:
+        None
+        """
+        # Taking the rows under the connection lock makes a flush wait for a write in progress
+        with self._connection_lock:
+            with self._buffer_lock:
+                pipeline_rows, self._pipeline_rows = self._pipeline_rows, []
+                activity_rows, self._activity_rows = self._activity_rows, []
+            if not pipeline_rows and not activity_rows:
+                return
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    _insert_statement("pipeline_runs", _PIPELINE_COLUMNS), pipeline_rows
+                )
+                self._connection.executemany(
+                    _insert_statement("activity_runs", _ACTIVITY_COLUMNS), activity_rows
+                )
+
+    def close(self):
+        """
+        Write the buffered rows and close the database.
+
+        Returns:
+        None
+        """
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._buffer_lock.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        with self._connection_lock:
+            self._connection.close()
+        atexit.unregister(self.close)
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list:
+        """Run a query on the flushed history, rows as dicts."""
+        self.flush()
+        with self._connection_lock:
+            cursor = self._connection.execute(sql, parameters)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def last_run(self, pipeline: str, status: PipelineRunStatus = None) -> dict:
+        """
+        Get the last run of a pipeline, for instance its last successful run.
+
+        Parameters:
+        - pipeline (str): The name of the pipeline.
+        - status (PipelineRunStatus, optional): Only consider runs with this status.
+
+        Returns:
+        dict: The run, None if there is none.
+        """
+        if status is None:
+            rows = self._query(
+                "SELECT * FROM pipeline_runs WHERE pipeline = ? ORDER BY started_at DESC LIMIT 1", (pipeline,)
+            )
+        else:
+            rows = self._query(
+                "SELECT * FROM pipeline_runs WHERE pipeline = ? AND status = ? ORDER BY started_at DESC LIMIT 1",
+                (pipeline, status.value),
+            )
+        return rows[0] if rows else None
+
+    def pipeline_runs(
+        self, pipeline: str, since: float = None, status: PipelineRunStatus = None, limit: int = 100
+    ) -> list:
+        """
+        Get the most recent runs of a pipeline.
+
+        Parameters:
+        - pipeline (str): The name of the pipeline.
+        - since (float, optional): Only consider runs started after this Unix timestamp.
+        - status (PipelineRunStatus, optional): Only consider runs with this status.
+        - limit (int, optional): Maximum number of runs.
+
+        Returns:
+        list: The runs, most recent first.
+        """
+        sql = "SELECT * FROM pipeline_runs WHERE pipeline = ? AND started_at >= ?"
+        parameters = [pipeline, since or 0.0]
+        if status is not None:
+            sql += " AND status = ?"
+            parameters.append(status.value)
+        return self._query(sql + " ORDER BY started_at DESC LIMIT ?", (*parameters, limit))
+
+    def activity_runs(self, run_id: str) -> list:
+        """
+        Get the activity runs of a pipeline run.
+
+        Parameters:
+        - run_id (str): The id of the pipeline run.
+
+        Returns:
+        list: The activity runs, in start order.
+        """
+        return self._query("SELECT * FROM activity_runs WHERE run_id = ? ORDER BY started_at, id", (run_id,))
+
+    def activity_duration_percentile(
+        self,
+        pipeline: str,
+        activity: str,
+        percentile: float = 95.0,
+        days: float = 30.0,
+        status: PipelineRunStatus = PipelineRunStatus.SUCCEEDED,
+    ) -> float:
+        """
+        Get a percentile of the wall time of an activity over its recent runs, by nearest rank.
+
+        Parameters:
+        - pipeline (str): The name of the pipeline.
+        - activity (str): The name of the activity.
+        - percentile (float, optional): The percentile, between 0 and 100.
+        - days (float, optional): Only consider runs started in the last days.
+        - status (PipelineRunStatus, optional): Only consider runs with this status, None for all runs.
+
+        Raises:
+        - ValueError: If the percentile is not between 0 and 100.
+
+        Returns:
+        float: The wall time in seconds, None if there is no run.
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"percentile must be between 0 and 100, got {percentile}.")
+        since = time.time() - days * 86400
+        where = "pipeline = ? AND activity = ? AND started_at >= ? AND wall_seconds IS NOT NULL"
+        parameters = (pipeline, activity, since)
+        if status is not None:
+            where += " AND status = ?"
+            parameters += (status.value,)
+        count = self._query(f"SELECT COUNT(*) AS count FROM activity_runs WHERE {where}", parameters)[0]["count"]
+        if not count:
+            return None
+        rank = max(0, math.ceil(percentile / 100 * count) - 1)
+        rows = self._query(
+            f"SELECT wall_seconds FROM activity_runs WHERE {where} ORDER BY wall_seconds LIMIT 1 OFFSET ?",
+            (*parameters, rank),
+        )
+        return rows[0]["wall_seconds"]
+
+    def prune(self, older_than_days: float) -> int:
+        """
+        Delete the runs started before a number of days ago.
+
+        Parameters:
+        - older_than_days (float): Age of the oldest runs kept, in days.
+
+        Returns:
+        int: The number of pipeline and activity runs deleted.
+        """
+        self.flush()
+        cutoff = time.time() - older_than_days * 86400
+        with self._connection_lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                deleted = self._connection.execute("DELETE FROM pipeline_runs WHERE started_at < ?", (cutoff,)).rowcount
+                deleted += self._connection.execute("DELETE FROM activity_runs WHERE started_at < ?", (cutoff,)).rowcount
+        return deleted
+
+    def __enter__(self) -> "RunHistoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
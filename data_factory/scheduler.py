@@ -0,0 +1,617 @@
+"""Module for triggers and the in-process scheduler running pipelines on them"""
+
+import abc
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from data_factory.executor import ExecutorFactory, ExecutorType
+from data_factory.pipeline import Pipeline
+from data_factory.pipeline_orchestrator import _apply_run_outcome, _run_pipeline
+from data_factory.status import PipelineRunStatus
+from data_factory.utils.validation_utils import StringUtils
+
+# Pipeline parameters set by the triggers, passed to the activities declaring a parameter of the same name
+TRIGGER_TIME_PARAMETER = "trigger_time"
+WINDOW_START_PARAMETER = "window_start"
+WINDOW_END_PARAMETER = "window_end"
+
+_CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_CRON_NAMES = {
+    **{name: i for i, name in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)},
+    **{name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))},
+}
+# (name, lowest value, highest value) of the five cron fields
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7))
+
+
+def _utc_now() -> datetime:
+    """Current time, timezone-aware."""
+    return datetime.now(timezone.utc)
+
+
+def _aware(moment: datetime, description: str) -> datetime:
+    """Reject naive datetimes, triggers compare times across timezones."""
+    if moment is not None and moment.tzinfo is None:
+        raise ValueError(f"{description} must be timezone-aware, got {moment}.")
+    return moment
+
+
+class TriggerRun:
+    """One run of a pipeline started by a trigger."""
+
+    def __init__(self, trigger_name: str, scheduled_time: datetime, parameters: dict) -> None:
+        """
+        Initialize TriggerRun instance.
+
+        Parameters:
+        - trigger_name (str): The name of the trigger.
+        - scheduled_time (datetime): The time the run was due, the end of the window for tumbling windows.
+        - parameters (dict): Pipeline parameters set by the trigger for this run.
+
+        Returns:
+        None
+        """
+        self.trigger_name = trigger_name
+        self.scheduled_time = scheduled_time
+        self.parameters = parameters
+        # Set when the run starts, the copy of the pipeline that runs
+        self.pipeline = None
+        self.started_at = None
+        self.finished_at = None
+        self.run_status = None
+        self.failure_reason = None
+
+    def __repr__(self) -> str:
+        return (
+            f"TriggerRun({self.trigger_name!r}, scheduled_time={self.scheduled_time.isoformat()}, "
+            f"run_status={self.run_status})"
+        )
+
+
+class Trigger(abc.ABC):
+    """
+    Base class of the triggers starting runs of a pipeline.
+
+    Every run is a copy of the pipeline with the trigger parameters merged into its parameters, so runs of the
+    same pipeline can overlap without sharing run state.
+    """
+
+    # If False, fire times missed while a run is waiting are coalesced into one run
+    queue_missed_runs = False
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: Pipeline,
+        parameters: dict = None,
+        max_concurrency: int = 1,
+        start_time: datetime = None,
+        end_time: datetime = None,
+    ) -> None:
+        """
+        Initialize Trigger instance.
+
+        Parameters:
+        - name (str): The name of the trigger.
+        - pipeline (Pipeline): The pipeline started by the trigger.
+        - parameters (dict, optional): Pipeline parameters of every run.
+        - max_concurrency (int, optional): Maximum number of runs of the pipeline at once, runs started by
+          other triggers of the same pipeline included.
+        - start_time (datetime, optional): Timezone-aware time before which the trigger does not fire.
+        - end_time (datetime, optional): Timezone-aware time after which the trigger does not fire.
+
+        Raises:
+        - ValueError: If the name is not in snake_case, max_concurrency is not positive or a time is naive.
+
+        Returns:
+        None
+        """
+        if not StringUtils.validate_snake_case(name):
+            raise ValueError(f"The name '{name}' is not in snake_case.")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be a positive integer, got {max_concurrency}.")
+        self.name = name
+        self.pipeline = pipeline
+        self.parameters = parameters or {}
+        self.max_concurrency = max_concurrency
+        self.start_time = _aware(start_time, "start_time")
+        self.end_time = _aware(end_time, "end_time")
+        self._next_time = None
+
+    @abc.abstractmethod
+    def next_fire_time(self, after: datetime) -> datetime:
+        """
+        Get the first fire time strictly after a time.
+
+        Parameters:
+        - after (datetime): The time.
+
+        Returns:
+        datetime: The fire time.
+        """
+
+    def due_runs(self, now: datetime) -> list:
+        """
+        Get the runs due at a time, and advance the trigger past them.
+
+        Fire times missed since the last call, for instance while the scheduler was stopped, are coalesced into
+        one run at the last of them.
+
+        Parameters:
+        - now (datetime): The current time.
+
+        Returns:
+        list: The TriggerRun instances due.
+        """
+        if self._next_time is None:
+            start = self.start_time or now
+            self._next_time = self.next_fire_time(start - timedelta(microseconds=1))
+        if self._next_time > now or (self.end_time is not None and self._next_time > self.end_time):
+            return []
+        fire_time = self._next_time
+        while True:
+            following = self.next_fire_time(fire_time)
+            if following > now or (self.end_time is not None and following > self.end_time):
+                break
+            fire_time = following
+        self._next_time = following
+        return [TriggerRun(self.name, fire_time, {**self.parameters, TRIGGER_TIME_PARAMETER: fire_time})]
+
+
+class IntervalTrigger(Trigger):
+    """Trigger firing every interval, from its start time or from the first time it is checked."""
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: Pipeline,
+        interval: timedelta,
+        parameters: dict = None,
+        max_concurrency: int = 1,
+        start_time: datetime = None,
+        end_time: datetime = None,
+    ) -> None:
+        """
+        Initialize IntervalTrigger instance.
+
+        Parameters:
+        - interval (timedelta): Time between two fire times.
+        - name, pipeline, parameters, max_concurrency, start_time, end_time: See Trigger.
+
+        Raises:
+        - ValueError: If the interval is not positive, see also Trigger.
+
+        Returns:
+        None
+        """
+        super().__init__(name, pipeline, parameters, max_concurrency, start_time, end_time)
+        if interval <= timedelta(0):
+            raise ValueError(f"interval must be positive, got {interval}.")
+        self.interval = interval
+        self._anchor = start_time
+
+    def next_fire_time(self, after: datetime) -> datetime:
+        if self._anchor is None:
+            self._anchor = after + timedelta(microseconds=1)
+        if after < self._anchor:
+            return self._anchor
+        return self._anchor + ((after - self._anchor) // self.interval + 1) * self.interval
+
+
+class CronTrigger(Trigger):
+    """
+    Trigger firing on a cron schedule: "minute hour day-of-month month day-of-week".
+
+    Fields accept *, values, ranges a-b, steps */n or a-b/n, lists and month or day names. Day of week 0 and
+    7 are Sunday. When both day fields are restricted, a day matching either fires, as in cron. The aliases
+    @yearly, @monthly, @weekly, @daily and @hourly are supported.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: Pipeline,
+        expression: str,
+        tz: timezone = timezone.utc,
+        parameters: dict = None,
+        max_concurrency: int = 1,
+        start_time: datetime = None,
+        end_time: datetime = None,
+    ) -> None:
+        """
+        Initialize CronTrigger instance.
+
+        Parameters:
+        - expression (str): The cron expression.
+        - tz (tzinfo, optional): Timezone the expression is evaluated in, for instance a zoneinfo.ZoneInfo.
+        - name, pipeline, parameters, max_concurrency, start_time, end_time: See Trigger.
+
+        Raises:
+        - ValueError: If the expression is invalid, see also Trigger.
+
+        Returns:
+        None
+        """
+        super().__init__(name, pipeline, parameters, max_concurrency, start_time, end_time)
+        self.expression = expression
+        self.tz = tz
+        fields = _CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != len(_CRON_FIELDS):
+            raise ValueError(f"Invalid cron expression '{expression}', expected 5 fields.")
+        self._minutes, self._hours, self._days, self._months, weekdays = (
+            self._parse_field(field, *spec, expression) for field, spec in zip(fields, _CRON_FIELDS)
+        )
+        self._weekdays = {weekday % 7 for weekday in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, name: str, lowest: int, highest: int, expression: str) -> set:
+        """Parse one cron field into the set of values it matches."""
+        values = set()
+        for part in field.lower().split(","):
+            part_range, _, step = part.partition("/")
+            try:
+                step = int(step) if step else 1
+                if part_range == "*":
+                    start, end = lowest, highest
+                else:
+                    start_text, _, end_text = part_range.partition("-")
+                    start = _CRON_NAMES.get(start_text, None)
+                    start = int(start_text) if start is None else start
+                    if end_text:
+                        end = _CRON_NAMES.get(end_text, None)
+                        end = int(end_text) if end is None else end
+                    else:
+                        end = highest if "/" in part else start
+            except ValueError as e:
+                raise ValueError(f"Invalid {name} field '{field}' in cron expression '{expression}'.") from e
+            if step < 1 or not lowest <= start <= end <= highest:
+                raise ValueError(
+                    f"Invalid {name} field '{field}' in cron expression '{expression}', "
+                    f"values must be within {lowest}-{highest}."
+                )
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        """Whether the day of a time matches the day of month and day of week fields."""
+        day_match = moment.day in self._days
+        weekday_match = (moment.weekday() + 1) % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_fire_time(self, after: datetime) -> datetime:
+        moment = after.astimezone(self.tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Jump field by field, a schedule that matches no day within 8 years (e.g. February 30) never fires
+        limit = moment + timedelta(days=8 * 366)
+        while moment < limit:
+            if moment.month not in self._months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self._hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self._minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression '{self.expression}' never fires.")
+
+
+class TumblingWindowTrigger(Trigger):
+    """
+    Trigger firing once per fixed-size, contiguous window, once the window is over.
+
+    Windows are never skipped: a start time in the past backfills every window up to now, and windows that
+    could not start yet wait for a free slot in order. The window start and end are passed as the
+    WINDOW_START_PARAMETER and WINDOW_END_PARAMETER pipeline parameters.
+    """
+
+    queue_missed_runs = True
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: Pipeline,
+        window: timedelta,
+        start_time: datetime,
+        end_time: datetime = None,
+        delay: timedelta = timedelta(0),
+        parameters: dict = None,
+        max_concurrency: int = 1,
+    ) -> None:
+        """
+        Initialize TumblingWindowTrigger instance.
+
+        Parameters:
+        - window (timedelta): Size of the windows.
+        - start_time (datetime): Timezone-aware start of the first window.
+        - end_time (datetime, optional): Timezone-aware time after which no window ends.
+        - delay (timedelta, optional): Time waited after the end of a window before its run is due, for late data.
+        - name, pipeline, parameters, max_concurrency: See Trigger.
+
+        Raises:
+        - ValueError: If the window is not positive or the delay is negative, see also Trigger.
+
+        Returns:
+        None
+        """
+        if start_time is None:
+            raise ValueError("start_time is required for tumbling window triggers.")
+        super().__init__(name, pipeline, parameters, max_concurrency, start_time, end_time)
+        if window <= timedelta(0):
+            raise ValueError(f"window must be positive, got {window}.")
+        if delay < timedelta(0):
+            raise ValueError(f"delay must not be negative, got {delay}.")
+        self.window = window
+        self.delay = delay
+        self._next_time = start_time
+
+    def next_fire_time(self, after: datetime) -> datetime:
+        if after < self.start_time:
+            return self.start_time + self.window + self.delay
+        windows = (after - self.delay - self.start_time) // self.window + 1
+        return self.start_time + windows * self.window + self.delay
+
+    def due_runs(self, now: datetime) -> list:
+        """
+        Get the windows over at a time, and advance the trigger past them.
+
+        Parameters:
+        - now (datetime): The current time.
+
+        Returns:
+        list: The TriggerRun instances due, one per window in window order.
+        """
+        runs = []
+        while True:
+            window_start = self._next_time
+            window_end = window_start + self.window
+            if window_end + self.delay > now or (self.end_time is not None and window_end > self.end_time):
+                return runs
+            runs.append(
+                TriggerRun(
+                    self.name,
+                    window_end,
+                    {**self.parameters, WINDOW_START_PARAMETER: window_start, WINDOW_END_PARAMETER: window_end},
+                )
+            )
+            self._next_time = window_end
+
+
+class TriggerScheduler:
+    """
+    In-process scheduler starting pipeline runs on their triggers.
+
+    Runs are submitted to one long-lived executor pool, so workers stay warm from run to run. At most
+    max_workers runs are in flight at once and every trigger caps the runs of its pipeline with
+    max_concurrency. Due runs that have to wait start in scheduled time order as slots free up.
+    """
+
+    def __init__(
+        self,
+        triggers: list,
+        max_workers: int = 4,
+        executor_type: ExecutorType = ExecutorType.THREAD,
+        poll_seconds: float = 1.0,
+        history_size: int = 1000,
+        verbose: bool = False,
+        clock: callable = _utc_now,
+    ) -> None:
+        """
+        Initialize TriggerScheduler instance.
+
+        Parameters:
+        - triggers (list): The triggers.
+        - max_workers (int, optional): Maximum number of runs in flight, across all pipelines.
+        - executor_type (ExecutorType, optional): Pool the runs are submitted to, pipelines must be picklable
+          for PROCESS.
+        - poll_seconds (float, optional): Time between two checks of the triggers by the scheduler thread.
+        - history_size (int, optional): Number of finished runs kept in history.
+        - verbose (bool, optional): If True, print verbose information.
+        - clock (callable, optional): Function returning the current timezone-aware time.
+
+        Raises:
+        - ValueError: If trigger names are not unique or max_workers is not positive.
+
+        Returns:
+        None
+        """
+        duplicate_names = [name for name, count in Counter(trigger.name for trigger in triggers).items() if count > 1]
+        if duplicate_names:
+            raise ValueError(f"Duplicate trigger names found: {', '.join(duplicate_names)}")
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be a positive integer, got {max_workers}.")
+        self.triggers = list(triggers)
+        self.max_workers = max_workers
+        self.executor_type = executor_type
+        self.poll_seconds = poll_seconds
+        self.verbose = verbose
+        self.clock = clock
+        self.history = deque(maxlen=history_size)
+        self._pending = {trigger.name: deque() for trigger in self.triggers}
+        self._triggers = {trigger.name: trigger for trigger in self.triggers}
+        self._running = {}
+        self._active_runs = Counter()
+        # Reentrant, runs finishing at once call back into the scheduler from the thread submitting them
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def tick(self, now: datetime = None) -> list:
+        """
+        Queue the runs due and start as many waiting runs as the caps allow.
+
+        The scheduler thread calls tick every poll_seconds, call it directly to drive the scheduler yourself.
+
+        Parameters:
+        - now (datetime, optional): The current time, defaults to the clock of the scheduler.
+
+        Returns:
+        list: The TriggerRun instances started.
+        """
+        now = now or self.clock()
+        with self._lock:
+            for trigger in self.triggers:
+                pending = self._pending[trigger.name]
+                for trigger_run in trigger.due_runs(now):
+                    if pending and not trigger.queue_missed_runs:
+                        continue
+                    pending.append(trigger_run)
+            return self._start_pending()
+
+    def _start_pending(self) -> list:
+        """Start waiting runs, earliest scheduled first, while the caps allow. Called with the lock held."""
+        started = []
+        while len(self._running) < self.max_workers:
+            candidates = [
+                pending[0]
+                for name, pending in self._pending.items()
+                if pending
+                and self._active_runs[self._triggers[name].pipeline.name] < self._triggers[name].max_concurrency
+            ]
+            if not candidates:
+                break
+            trigger_run = min(candidates, key=lambda run: run.scheduled_time)
+            self._pending[trigger_run.trigger_name].popleft()
+            self._submit(trigger_run)
+            started.append(trigger_run)
+        return started
+
+    def _submit(self, trigger_run: TriggerRun):
+        """Submit a run to the executor pool. Called with the lock held."""
+        if self._executor is None:
+            self._executor = ExecutorFactory.create(self.executor_type, self.max_workers)
+        trigger = self._triggers[trigger_run.trigger_name]
+        trigger_run.pipeline = trigger.pipeline.copy(trigger_run.parameters)
+        trigger_run.started_at = self.clock()
+        trigger_run.run_status = PipelineRunStatus.RUNNING
+        self._active_runs[trigger.pipeline.name] += 1
+        if self.verbose:
+            print(
+                f"[Scheduler] --> [Trigger: {trigger.name}] Starting pipeline {trigger.pipeline.name} "
+                f"scheduled at {trigger_run.scheduled_time.isoformat()}."
+            )
+        future = self._executor.submit(_run_pipeline, trigger_run.pipeline, self.verbose)
+        self._running[future] = trigger_run
+        future.add_done_callback(self._on_run_done)
+
+    def _on_run_done(self, future: Future):
+        """Apply the outcome of a finished run, then start the runs waiting for its slot."""
+        with self._lock:
+            trigger_run = self._running.pop(future)
+            pipeline = trigger_run.pipeline
+            try:
+                log = _apply_run_outcome(pipeline, future.result(), self.executor_type)
+                trigger_run.run_status = pipeline.get_run_status()
+                trigger_run.failure_reason = pipeline.get_failure_reason()
+            except Exception as e:  # pylint: disable=W0718
+                log = ""
+                trigger_run.run_status = PipelineRunStatus.FAILED
+                trigger_run.failure_reason = f"The run could not be completed: {e}"
+            trigger_run.finished_at = self.clock()
+            # The copy runs once, nothing reads its spill files after the run
+            pipeline.discard_spilled_outputs()
+            self._active_runs[pipeline.name] -= 1
+            self.history.append(trigger_run)
+            if self.verbose:
+                print(
+                    f"[Scheduler] --> [Trigger: {trigger_run.trigger_name}] Pipeline {pipeline.name}{log}"
+                    f"[Scheduler] --> Done with status = {trigger_run.run_status}.\n"
+                )
+            if not self._stop.is_set():
+                self._start_pending()
+            self._idle.notify_all()
+
+    def pending_runs(self) -> list:
+        """
+        Get the runs due but waiting for a free slot.
+
+        Returns:
+        list: The waiting TriggerRun instances.
+        """
+        with self._lock:
+            return [trigger_run for pending in self._pending.values() for trigger_run in pending]
+
+    def running_runs(self) -> list:
+        """
+        Get the runs in flight.
+
+        Returns:
+        list: The running TriggerRun instances.
+        """
+        with self._lock:
+            return list(self._running.values())
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Wait until no run is in flight or waiting, for instance until a backfill is done.
+
+        Parameters:
+        - timeout (float, optional): Maximum time to wait, in seconds.
+
+        Returns:
+        bool: True if the scheduler is idle, False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: not self._running and not any(self._pending.values()), timeout=timeout
+            )
+
+    def start(self):
+        """
+        Start the scheduler thread, checking the triggers every poll_seconds.
+
+        Returns:
+        None
+        """
+        if self._thread is not None:
+            raise ValueError("The scheduler is already started.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="trigger-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        """Check the triggers until the scheduler is stopped."""
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.poll_seconds)
+
+    def stop(self, wait: bool = True):
+        """
+        Stop the scheduler thread. Waiting runs are not started.
+
+        Parameters:
+        - wait (bool, optional): If True, wait for the runs in flight and shut the executor pool down.
+
+        Returns:
+        None
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def __enter__(self) -> "TriggerScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.stop()
@@ -0,0 +1,270 @@
+"""Module for spilling large activity outputs to local scratch files, read back lazily by downstream activities"""
+
+import atexit
+import importlib
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from typing import Any
+from data_factory.handoff import OUTPUT_TYPE_CHECKS, OutputType, SharedBufferHandle
+
+
+class SpilledOutput:
+    """
+    Picklable reference to an activity output value spilled to a scratch file.
+
+    Bytes and NumPy values are written raw and memory mapped when they are read back, other values are pickled
+    and unpickled when they are read back.
+    """
+
+    __slots__ = ("path", "nbytes", "output_type", "dtype", "shape")
+
+    def __init__(
+        self, path: str, nbytes: int, output_type: OutputType, dtype: str = None, shape: tuple = None
+    ) -> None:
+        """
+        Initialize SpilledOutput instance.
+
+        Parameters:
+        - path (str): Path of the scratch file.
+        - nbytes (int): Size of the file.
+        - output_type (OutputType): OutputType.BYTES or OutputType.NUMPY for raw files, OutputType.ANY for pickles.
+        - dtype (str, optional): NumPy dtype of the array.
+        - shape (tuple, optional): NumPy shape of the array.
+
+        Returns:
+        None
+        """
+        self.path = path
+        self.nbytes = nbytes
+        self.output_type = output_type
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self) -> tuple:
+        return self.path, self.nbytes, self.output_type, self.dtype, self.shape
+
+    def __setstate__(self, state: tuple):
+        self.__init__(*state)
+
+    def __repr__(self) -> str:
+        return f"SpilledOutput(path={self.path!r}, nbytes={self.nbytes}, output_type={self.output_type})"
+
+
+def _buffer_size(value: Any) -> int:
+    """Size of the buffer of bytes, NumPy and Arrow values, None for other values."""
+    if OUTPUT_TYPE_CHECKS[OutputType.BYTES](value):
+        return memoryview(value).nbytes
+    nbytes = getattr(value, "nbytes", None)
+    return nbytes if isinstance(nbytes, int) else None
+
+
+def _pickle(value: Any) -> bytes:
+    """Pickle of a value, None if it cannot be pickled."""
+    try:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:  # pylint: disable=W0718
+        return None
+
+
+class SpillStore:
+    """
+    Local scratch store of the activity outputs larger than a memory budget.
+
+    A pipeline given a spill store writes every output value larger than memory_budget_bytes to
+    <directory>/<pipeline name>/<run id>/ as soon as its activity is done, and hands a small SpilledOutput to
+    the downstream activities instead. The value is read back right before the action of a downstream
+    activity is called, so the pipeline does not hold it in memory in between. At the end of a run, the files
+    no named output or activity parameter refers to are deleted; the other ones are kept until the next run of
+    the pipeline starts, see Pipeline.discard_spilled_outputs.
+    """
+
+    def __init__(self, directory: str = None, memory_budget_bytes: int = 64 << 20) -> None:
+        """
+        Initialize SpillStore instance.
+
+        Parameters:
+        - directory (str, optional): Scratch directory, defaults to a temporary directory removed at exit.
+        - memory_budget_bytes (int, optional): Output values larger than this are spilled.
+
+        Raises:
+        - ValueError: If memory_budget_bytes is negative.
+
+        Returns:
+        None
+        """
+        if memory_budget_bytes < 0:
+            raise ValueError(f"memory_budget_bytes must not be negative, got {memory_budget_bytes}.")
+        self._owns_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix="data_factory_spill_") if directory is None else directory
+        self.memory_budget_bytes = memory_budget_bytes
+        if self._owns_directory:
+            atexit.register(self.close)
+
+    def spill(self, pipeline_name: str, run_id: str, result: Any) -> Any:
+        """
+        Spill the values of an activity output larger than the memory budget.
+
+        Bytes, NumPy and Arrow values are measured by their buffer, other values, such as lists and dicts of
+        large values, by the length of their pickle, which is the content of their scratch file if they are
+        spilled.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the pipeline run.
+        - result (dict): The output of the activity.
+
+        Returns:
+        dict: The output with large values replaced by SpilledOutput instances, values that cannot be pickled
+        are kept in memory.
+        """
+        if not isinstance(result, dict):
+            return result
+        spilled = None
+        for key, value in result.items():
+            if isinstance(value, (SpilledOutput, SharedBufferHandle)):
+                continue
+            size, pickled = _buffer_size(value), None
+            if size is None:
+                pickled = _pickle(value)
+                if pickled is None:
+                    continue
+                size = len(pickled)
+            if size <= self.memory_budget_bytes:
+                continue
+            handle = self._write(os.path.join(self.directory, pipeline_name, str(run_id)), value, pickled)
+            if handle is not None:
+                spilled = spilled or dict(result)
+                spilled[key] = handle
+        return result if spilled is None else spilled
+
+    @staticmethod
+    def _write(directory: str, value: Any, pickled: bytes = None) -> SpilledOutput:
+        """Write a value, or its pickle if already computed, to a new scratch file, None if it cannot be pickled."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, uuid.uuid4().hex)
+        if OUTPUT_TYPE_CHECKS[OutputType.BYTES](value):
+            buffer = memoryview(value).cast("B")
+            handle = SpilledOutput(path, buffer.nbytes, OutputType.BYTES)
+        elif OUTPUT_TYPE_CHECKS[OutputType.NUMPY](value) and value.flags["C_CONTIGUOUS"] and not value.dtype.hasobject:
+            buffer = memoryview(value).cast("B")
+            handle = SpilledOutput(path, value.nbytes, OutputType.NUMPY, value.dtype.str, value.shape)
+        else:
+            buffer = pickled if pickled is not None else _pickle(value)
+            if buffer is None:
+                return None
+            handle = SpilledOutput(path, len(buffer), OutputType.ANY)
+        with open(path, "wb") as f:
+            f.write(buffer)
+        return handle
+
+    @staticmethod
+    def load(handle: SpilledOutput) -> Any:
+        """
+        Read a spilled value back.
+
+        Parameters:
+        - handle (SpilledOutput): The handle.
+
+        Returns:
+        memoryview | numpy.ndarray | Any: A read-only memory map of bytes and NumPy values, the unpickled value
+        otherwise.
+        """
+        if handle.output_type == OutputType.ANY:
+            with open(handle.path, "rb") as f:
+                return pickle.load(f)
+        if handle.output_type == OutputType.NUMPY:
+            numpy = importlib.import_module("numpy")
+            if not handle.nbytes:
+                return numpy.empty(handle.shape, dtype=numpy.dtype(handle.dtype))
+            return numpy.memmap(handle.path, dtype=numpy.dtype(handle.dtype), mode="r", shape=handle.shape)
+        if not handle.nbytes:
+            return memoryview(b"")
+        with open(handle.path, "rb") as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @staticmethod
+    def resolve(parameters: dict) -> dict:
+        """
+        Read back every SpilledOutput passed as a parameter.
+
+        Parameters:
+        - parameters (dict): Parameters of an activity.
+
+        Returns:
+        dict: The parameters with handles replaced by their values, the parameters themselves if there is none.
+        """
+        if not any(isinstance(value, SpilledOutput) for value in parameters.values()):
+            return parameters
+        return {
+            key: SpillStore.load(value) if isinstance(value, SpilledOutput) else value
+            for key, value in parameters.items()
+        }
+
+    @staticmethod
+    def materialize(result: Any) -> Any:
+        """
+        Copy the spilled values of an activity output back into memory, for instance to persist them.
+
+        Parameters:
+        - result (dict): The output of an activity.
+
+        Returns:
+        dict: The output with handles replaced by bytes, NumPy array copies or unpickled values.
+        """
+        if not isinstance(result, dict) or not any(isinstance(value, SpilledOutput) for value in result.values()):
+            return result
+        materialized = {}
+        for key, value in result.items():
+            if isinstance(value, SpilledOutput):
+                loaded = SpillStore.load(value)
+                if value.output_type == OutputType.BYTES:
+                    loaded = bytes(loaded)
+                elif value.output_type == OutputType.NUMPY:
+                    loaded = loaded.copy()
+                value = loaded
+            materialized[key] = value
+        return materialized
+
+    def discard(self, pipeline_name: str, run_id: str, keep: list = ()):
+        """
+        Delete the spilled values of a pipeline run.
+
+        Parameters:
+        - pipeline_name (str): The name of the pipeline.
+        - run_id (str): The id of the pipeline run.
+        - keep (list, optional): Dicts, such as named outputs or activity parameters, whose SpilledOutput values
+          are kept.
+
+        Returns:
+        None
+        """
+        directory = os.path.join(self.directory, pipeline_name, str(run_id))
+        kept = {
+            value.path for values in keep for value in values.values() if isinstance(value, SpilledOutput)
+        }
+        if not kept:
+            shutil.rmtree(directory, ignore_errors=True)
+            return
+        for file_name in os.listdir(directory) if os.path.isdir(directory) else ():
+            path = os.path.join(directory, file_name)
+            if path not in kept:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Memory mapped files cannot be removed on every platform, the next run removes them
+                    continue
+
+    def close(self):
+        """
+        Delete the scratch directory if the store created it.
+
+        Returns:
+        None
+        """
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            atexit.unregister(self.close)
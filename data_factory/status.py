@@ -0,0 +1,24 @@
+"""Module for the run statuses of pipelines and activities"""
+
+from enum import Enum
+
+
+class PipelineRunStatus(Enum):
+    """Enum representing the possible run statuses of a pipeline."""
+
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELED = "Canceled"
+    RUNNING = "Running"
+    SKIPPED = "Skipped"
+    TIMED_OUT = "TimedOut"
+
+
+class PipelineFailureReason(Enum):
+    """Enum representing the possible failure reasons of a pipeline."""
+
+    ACTIVITY_FAILED = "One or more activities failed"
+    TIMEOUT = "Pipeline execution timed out"
+    INVALID_CONFIGURATION = "Invalid pipeline configuration"
+    CANCELED = "Pipeline run was canceled"
+    TASK_FAILED = "Task of the pipeline failed on its workers"
@@ -0,0 +1,199 @@
+"""Module for streaming pipelines, whose activities exchange chunks through bounded queues"""
+
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from data_factory.activity import resolve_action
+from data_factory.metrics import MetricsProbe
+from data_factory.status import PipelineRunStatus
+
+STREAM_INPUT_PARAMETER = "chunks"
+
+_END_OF_STREAM = object()
+
+_POLL_SECONDS = 0.05
+
+
+class _StreamAborted(Exception):
+    """Raised inside a stage when another stage failed and the stream is aborted."""
+
+
+class _DownstreamClosed(Exception):
+    """Raised inside a stage when its downstream stage finished without consuming all of its input."""
+
+
+class StreamingRun:
+    """
+    One run of activities as concurrent streaming stages.
+
+    The first activity yields chunks, every following activity receives the chunks of the previous one as an
+    iterator in its STREAM_INPUT_PARAMETER parameter and yields its own chunks, the last activity consumes
+    them. Every stage runs in its own thread and stages are connected by bounded queues: a stage blocks
+    when its downstream queue is full, so memory stays bounded by queue_size chunks per stage.
+
+    For activities with collect_metrics set, the time every stage spends blocked on its queues is measured as
+    its queue wait.
+    """
+
+    def __init__(self, activities: list, queue_size: int = 8, parameters: list = None) -> None:
+        """
+        Initialize StreamingRun instance.
+
+        Parameters:
+        - activities (list): The activities, in stage order.
+        - queue_size (int): Maximum number of chunks buffered between two stages.
+        - parameters (list, optional): Parameters of every stage for this run, None items default to the
+          parameters of the activity.
+
+        Returns:
+        None
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be a positive integer, got {queue_size}.")
+        self.activities = activities
+        self.parameters = parameters or [None] * len(activities)
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in activities[1:]]
+        self.closed = [threading.Event() for _ in activities[1:]]
+        self.aborted = threading.Event()
+        self.failed_activities = []
+        self.queue_wait_seconds = [0.0] * len(activities)
+        self._lock = threading.Lock()
+
+    def run(self) -> list:
+        """
+        Run every stage at once and wait for all of them.
+
+        Returns:
+        list: The failed activities, in failure order.
+        """
+        stages = [
+            threading.Thread(
+                target=self._run_stage, args=(i, activity), name=f"stage-{activity.name}"
+            )
+            for i, activity in enumerate(self.activities)
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        return self.failed_activities
+
+    def _run_stage(self, i: int, activity):
+        """
+        Run one stage, pushing its chunks to the downstream queue.
+
+        Parameters:
+        - i (int): Index of the stage.
+        - activity (Activity): The activity of the stage.
+
+        Returns:
+        None
+        """
+        activity.run_status = PipelineRunStatus.RUNNING
+        activity.failure_reason = None
+        activity.metrics = None
+        probe = MetricsProbe() if activity.collect_metrics else None
+        cpu_started = time.thread_time()
+        is_last = i == len(self.activities) - 1
+        try:
+            parameters = dict(
+                activity.parameters if self.parameters[i] is None else self.parameters[i]
+            )
+            if i > 0:
+                parameters[STREAM_INPUT_PARAMETER] = self._read(i - 1, activity.collect_metrics)
+            output = resolve_action(activity.action)(**parameters)
+
+            if not is_last:
+                if output is None:
+                    raise ValueError(
+                        f"Streaming activity '{activity.name}' must return an iterable of chunks."
+                    )
+                try:
+                    for chunk in output:
+                        self._write(i, chunk, activity.collect_metrics)
+                    self._write(i, _END_OF_STREAM, activity.collect_metrics)
+                except _DownstreamClosed:
+                    pass
+            elif isinstance(output, Iterator):
+                for _ in output:
+                    pass
+            activity.run_status = PipelineRunStatus.SUCCEEDED
+
+        except _StreamAborted:
+            activity.run_status = PipelineRunStatus.CANCELED
+            activity.failure_reason = "Stream aborted after another activity failed."
+
+        except Exception as e:  # pylint: disable=W0718
+            activity.run_status = PipelineRunStatus.FAILED
+            activity.failure_reason = str(e)
+            with self._lock:
+                self.failed_activities.append(activity)
+            self.aborted.set()
+
+        finally:
+            if i > 0:
+                self.closed[i - 1].set()
+            if probe is not None:
+                activity.metrics = probe.finish(
+                    cpu_seconds=time.thread_time() - cpu_started,
+                    queue_wait_seconds=self.queue_wait_seconds[i],
+                )
+
+    def _read(self, i: int, measure: bool = False) -> Iterator:
+        """
+        Iterate the chunks of the queue between stage i and stage i + 1.
+
+        Parameters:
+        - i (int): Index of the upstream stage.
+        - measure (bool, optional): If True, add the time spent waiting for chunks to the queue wait of stage i + 1.
+
+        Returns:
+        Iterator: The chunks, until the upstream stage is done.
+        """
+        while True:
+            waited = time.perf_counter() if measure else None
+            try:
+                chunk = self.queues[i].get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self.aborted.is_set():
+                    raise _StreamAborted() from None
+                continue
+            finally:
+                if measure:
+                    self.queue_wait_seconds[i + 1] += time.perf_counter() - waited
+            if chunk is _END_OF_STREAM:
+                return
+            yield chunk
+
+    def _write(self, i: int, chunk, measure: bool = False):
+        """
+        Push a chunk to the queue between stage i and stage i + 1, blocking while it is full.
+
+        Parameters:
+        - i (int): Index of the upstream stage.
+        - chunk (Any): The chunk.
+        - measure (bool, optional): If True, add the time spent blocked on the full queue to the queue wait of stage i.
+
+        Returns:
+        None
+        """
+        waited = time.perf_counter() if measure else None
+        try:
+            self._put(i, chunk)
+        finally:
+            if measure:
+                self.queue_wait_seconds[i] += time.perf_counter() - waited
+
+    def _put(self, i: int, chunk):
+        """Push a chunk to a queue, polling for aborted and closed stages while it is full."""
+        while True:
+            if self.aborted.is_set():
+                raise _StreamAborted()
+            if self.closed[i].is_set():
+                raise _DownstreamClosed()
+            try:
+                self.queues[i].put(chunk, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,538 @@
+"""Module for the durable SQLite task queue of distributed pipeline and activity runs, and its workers"""
+
+import argparse
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Any
+
+
+class TaskKind(Enum):
+    """Enum representing the kinds of tasks of the queue."""
+
+    # A pipeline, run with Pipeline.run, its result is the outcome applied by PipelineOrchestrator
+    PIPELINE = "Pipeline"
+    # An activity and its parameters, run with Activity.run, its result is (outcome, output)
+    ACTIVITY = "Activity"
+
+
+class TaskState(Enum):
+    """Enum representing the states of a task of the queue."""
+
+    QUEUED = "Queued"
+    LEASED = "Leased"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELED = "Canceled"
+
+
+# States a task does not leave
+FINAL_TASK_STATES = (TaskState.SUCCEEDED, TaskState.FAILED, TaskState.CANCELED)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        name TEXT,
+        payload BLOB NOT NULL,
+        state TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        worker TEXT,
+        lease_expires_at REAL,
+        enqueued_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        result BLOB,
+        error TEXT
+    )
+    """,
+    # Next task to lease: the oldest queued task, or the oldest expired lease
+    "CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, lease_expires_at, id)",
+)
+
+# Fails the tasks whose lease expired on their last attempt, parameters: failed state, now, leased state, now
+_FAIL_EXPIRED_LEASES = (
+    "UPDATE tasks SET state = ?, finished_at = ?, "
+    "error = 'Lease of worker ' || worker || ' expired after ' || attempts || ' attempts.' "
+    "WHERE state = ? AND lease_expires_at < ? AND attempts >= max_attempts"
+)
+
+
+class SqliteTaskQueue:
+    """
+    Durable queue of pipeline and activity tasks in a SQLite database, shared by a coordinator and its workers.
+
+    Workers lease tasks for lease_seconds and extend the lease with heartbeats while the task runs. The lease of
+    a worker that crashed or lost its connection expires and the task is leased again by another worker, until
+    it has been attempted max_attempts times. Tasks and their results are pickled, so the workers must be able
+    to import the actions of the activities.
+
+    Any process that can open the database can enqueue or work: several processes of one machine, or several
+    machines sharing the database on a filesystem with working file locks. Leases use the clocks of the
+    workers, which must be roughly in sync.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0, max_attempts: int = 3) -> None:
+        """
+        Initialize SqliteTaskQueue instance, creating the database if needed.
+
+        Parameters:
+        - path (str): Path of the SQLite database file.
+        - lease_seconds (float, optional): Time a leased task is owned by its worker without a heartbeat.
+        - max_attempts (int, optional): Number of times a task is leased before it fails.
+
+        Raises:
+        - ValueError: If lease_seconds or max_attempts is not positive.
+
+        Returns:
+        None
+        """
+        if lease_seconds <= 0:
+            raise ValueError(f"lease_seconds must be positive, got {lease_seconds}.")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be a positive integer, got {max_attempts}.")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread, workers heartbeat from their own thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """Run one write statement in its own immediate transaction."""
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            return connection.execute(sql, parameters)
+
+    def enqueue_pipeline(self, pipeline: Any) -> int:
+        """
+        Enqueue a run of a pipeline.
+
+        Parameters:
+        - pipeline (Pipeline): The pipeline, it must be picklable.
+
+        Returns:
+        int: The id of the task.
+        """
+        return self.enqueue(TaskKind.PIPELINE, pipeline, pipeline.name)
+
+    def enqueue_activity(self, activity: Any, parameters: dict = None) -> int:
+        """
+        Enqueue a run of an activity.
+
+        Parameters:
+        - activity (Activity): The activity, it must be picklable.
+        - parameters (dict, optional): Parameters of the run, defaults to the parameters of the activity.
+
+        Returns:
+        int: The id of the task.
+        """
+        return self.enqueue(TaskKind.ACTIVITY, (activity, parameters), activity.name)
+
+    def enqueue(self, kind: TaskKind, payload: Any, name: str = None) -> int:
+        """
+        Enqueue a task.
+
+        Parameters:
+        - kind (TaskKind): The kind of the task.
+        - payload (Any): The pipeline, or the activity and its parameters.
+        - name (str, optional): Name of the task, for listings.
+
+        Returns:
+        int: The id of the task.
+        """
+        cursor = self._transaction(
+            "INSERT INTO tasks (kind, name, payload, state, max_attempts, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind.value, name, pickle.dumps(payload), TaskState.QUEUED.value, self.max_attempts, time.time()),
+        )
+        return cursor.lastrowid
+
+    def lease(self, worker_id: str) -> tuple:
+        """
+        Lease the oldest queued task, or the oldest task whose lease expired.
+
+        Expired tasks that were attempted max_attempts times fail instead of being leased again. Tasks whose
+        payload cannot be unpickled by the worker fail, and the next task is leased instead.
+
+        Parameters:
+        - worker_id (str): The id of the worker.
+
+        Returns:
+        tuple: The id, kind and payload of the task, None if there is no task to lease.
+        """
+        while True:
+            row = self._lease_row(worker_id)
+            if row is None:
+                return None
+            try:
+                return row[0], TaskKind(row[1]), pickle.loads(row[2])
+            except Exception as e:  # pylint: disable=W0718
+                self._transaction(
+                    "UPDATE tasks SET state = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                    "WHERE id = ? AND worker = ? AND state = ?",
+                    (
+                        TaskState.FAILED.value,
+                        f"Payload could not be loaded by worker {worker_id}: {e}",
+                        time.time(),
+                        row[0],
+                        worker_id,
+                        TaskState.LEASED.value,
+                    ),
+                )
+
+    def _lease_row(self, worker_id: str) -> tuple:
+        """Lease the next task in one transaction, returning its id, kind and pickled payload."""
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(_FAIL_EXPIRED_LEASES, (TaskState.FAILED.value, now, TaskState.LEASED.value, now))
+            row = connection.execute(
+                "SELECT id, kind, payload FROM tasks WHERE state = ? OR (state = ? AND lease_expires_at < ?) "
+                "ORDER BY id LIMIT 1",
+                (TaskState.QUEUED.value, TaskState.LEASED.value, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE tasks SET state = ?, worker = ?, attempts = attempts + 1, lease_expires_at = ?, "
+                "started_at = ? WHERE id = ?",
+                (TaskState.LEASED.value, worker_id, now + self.lease_seconds, now, row[0]),
+            )
+        return row
+
+    def _fail_expired_leases(self):
+        """Fail the tasks whose lease expired on their last attempt, which no worker would lease again."""
+        now = time.time()
+        self._transaction(_FAIL_EXPIRED_LEASES, (TaskState.FAILED.value, now, TaskState.LEASED.value, now))
+
+    def heartbeat(self, task_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease of a task.
+
+        Parameters:
+        - task_id (int): The id of the task.
+        - worker_id (str): The id of the worker holding the lease.
+
+        Returns:
+        bool: False if the worker lost the lease, the task then belongs to another worker.
+        """
+        cursor = self._transaction(
+            "UPDATE tasks SET lease_expires_at = ? WHERE id = ? AND worker = ? AND state = ?",
+            (time.time() + self.lease_seconds, task_id, worker_id, TaskState.LEASED.value),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str, result: Any) -> bool:
+        """
+        Report the result of a task.
+
+        Parameters:
+        - task_id (int): The id of the task.
+        - worker_id (str): The id of the worker holding the lease.
+        - result (Any): The result of the task, it must be picklable.
+
+        Returns:
+        bool: False if the worker lost the lease, the result is then discarded.
+        """
+        cursor = self._transaction(
+            "UPDATE tasks SET state = ?, result = ?, finished_at = ? WHERE id = ? AND worker = ? AND state = ?",
+            (TaskState.SUCCEEDED.value, pickle.dumps(result), time.time(), task_id, worker_id, TaskState.LEASED.value),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> bool:
+        """
+        Report that a task raised, queueing it again if it has attempts left.
+
+        Parameters:
+        - task_id (int): The id of the task.
+        - worker_id (str): The id of the worker holding the lease.
+        - error (str): The error of the task.
+
+        Returns:
+        bool: False if the worker lost the lease, the error is then discarded.
+        """
+        cursor = self._transaction(
+            "UPDATE tasks SET state = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, error = ?, "
+            "finished_at = ?, lease_expires_at = NULL WHERE id = ? AND worker = ? AND state = ?",
+            (
+                TaskState.FAILED.value,
+                TaskState.QUEUED.value,
+                error,
+                time.time(),
+                task_id,
+                worker_id,
+                TaskState.LEASED.value,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, task_ids: list) -> int:
+        """
+        Cancel tasks that are not leased yet.
+
+        Parameters:
+        - task_ids (list): The ids of the tasks.
+
+        Returns:
+        int: The number of tasks canceled.
+        """
+        placeholders = ", ".join("?" * len(task_ids))
+        cursor = self._transaction(
+            f"UPDATE tasks SET state = ?, finished_at = ? WHERE state = ? AND id IN ({placeholders})",
+            (TaskState.CANCELED.value, time.time(), TaskState.QUEUED.value, *task_ids),
+        )
+        return cursor.rowcount
+
+    def get(self, task_id: int) -> dict:
+        """
+        Get a task, without its payload.
+
+        Parameters:
+        - task_id (int): The id of the task.
+
+        Returns:
+        dict: The task, its state as a TaskState and its result unpickled, None if there is no such task.
+        """
+        cursor = self._connection().execute(
+            "SELECT id, kind, name, state, attempts, worker, enqueued_at, started_at, finished_at, result, error "
+            "FROM tasks WHERE id = ?",
+            (task_id,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        task = dict(zip([description[0] for description in cursor.description], row))
+        task["kind"] = TaskKind(task["kind"])
+        task["state"] = TaskState(task["state"])
+        task["result"] = None if task["result"] is None else pickle.loads(task["result"])
+        return task
+
+    def wait(self, task_ids: list, timeout: float = None, poll_seconds: float = 0.5) -> dict:
+        """
+        Wait for tasks to reach a final state.
+
+        Tasks whose lease expired on their last attempt fail while waiting, even if no worker is left to lease
+        them.
+
+        Parameters:
+        - task_ids (list): The ids of the tasks.
+        - timeout (float, optional): Maximum time to wait, in seconds.
+        - poll_seconds (float, optional): Time between two checks of the database.
+
+        Returns:
+        dict: Task id -> task, see get, for the tasks in a final state.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = {}
+        pending = list(task_ids)
+        while pending:
+            self._fail_expired_leases()
+            placeholders = ", ".join("?" * len(pending))
+            rows = self._connection().execute(
+                f"SELECT id FROM tasks WHERE id IN ({placeholders}) AND state IN (?, ?, ?)",
+                (*pending, *(state.value for state in FINAL_TASK_STATES)),
+            ).fetchall()
+            for (task_id,) in rows:
+                done[task_id] = self.get(task_id)
+            pending = [task_id for task_id in pending if task_id not in done]
+            if pending and deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(poll_seconds, remaining))
+            elif pending:
+                time.sleep(poll_seconds)
+        return done
+
+    def counts(self) -> dict:
+        """
+        Count the tasks per state, tasks whose lease expired on their last attempt counted as failed.
+
+        Returns:
+        dict: TaskState -> number of tasks.
+        """
+        self._fail_expired_leases()
+        rows = self._connection().execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return {state: 0 for state in TaskState} | {TaskState(state): count for state, count in rows}
+
+
+def run_task(kind: TaskKind, payload: Any) -> Any:
+    """
+    Run a task of the queue.
+
+    Parameters:
+    - kind (TaskKind): The kind of the task.
+    - payload (Any): The pipeline, or the activity and its parameters.
+
+    Returns:
+    Any: The outcome of the pipeline, or the outcome and output of the activity.
+    """
+    if kind == TaskKind.PIPELINE:
+        # Imported here, the orchestrator enqueues pipelines through this module
+        from data_factory.pipeline_orchestrator import _run_pipeline  # pylint: disable=C0415
+
+        return _run_pipeline(payload, verbose=False)
+    activity, parameters = payload
+    output = activity.run(parameters)
+    return activity.get_outcome(), output
+
+
+class TaskWorker:
+    """Worker leasing the tasks of a queue one at a time, heartbeating while they run."""
+
+    def __init__(
+        self,
+        task_queue: SqliteTaskQueue,
+        worker_id: str = None,
+        poll_seconds: float = 1.0,
+        verbose: bool = False,
+    ) -> None:
+        """
+        Initialize TaskWorker instance.
+
+        Parameters:
+        - task_queue (SqliteTaskQueue): The queue.
+        - worker_id (str, optional): The id of the worker, defaults to the host name, process id and a random suffix.
+        - poll_seconds (float, optional): Time between two lease attempts when the queue is empty.
+        - verbose (bool, optional): If True, print verbose information.
+
+        Returns:
+        None
+        """
+        self.task_queue = task_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.poll_seconds = poll_seconds
+        self.verbose = verbose
+        self._stop = threading.Event()
+
+    def run(self, max_tasks: int = None, idle_timeout: float = None) -> int:
+        """
+        Lease and run tasks until stopped.
+
+        Parameters:
+        - max_tasks (int, optional): Stop after this number of tasks.
+        - idle_timeout (float, optional): Stop after the queue was empty for this time, in seconds.
+
+        Returns:
+        int: The number of tasks run.
+        """
+        tasks_run = 0
+        idle_since = time.monotonic()
+        while not self._stop.is_set() and (max_tasks is None or tasks_run < max_tasks):
+            task = self.task_queue.lease(self.worker_id)
+            if task is None:
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    break
+                self._stop.wait(self.poll_seconds)
+                continue
+            self.run_task(*task)
+            tasks_run += 1
+            idle_since = time.monotonic()
+        return tasks_run
+
+    def stop(self):
+        """
+        Stop the worker after its current task.
+
+        Returns:
+        None
+        """
+        self._stop.set()
+
+    def run_task(self, task_id: int, kind: TaskKind, payload: Any):
+        """
+        Run a leased task, heartbeating its lease, and report its result or error.
+
+        Parameters:
+        - task_id (int): The id of the task.
+        - kind (TaskKind): The kind of the task.
+        - payload (Any): The pipeline, or the activity and its parameters.
+
+        Returns:
+        None
+        """
+        if self.verbose:
+            print(f"[Worker: {self.worker_id}] -> Running task {task_id} ({kind.value}).")
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(task_id, done), name=f"task-{task_id}-heartbeat", daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = run_task(kind, payload)
+        except Exception as e:  # pylint: disable=W0718
+            done.set()
+            heartbeat.join()
+            self.task_queue.fail(task_id, self.worker_id, f"{type(e).__name__}: {e}")
+            if self.verbose:
+                print(f"[Worker: {self.worker_id}] -> Task {task_id} failed: {e}")
+            return
+        done.set()
+        heartbeat.join()
+        reported = self.task_queue.complete(task_id, self.worker_id, result)
+        if self.verbose:
+            print(f"[Worker: {self.worker_id}] -> Task {task_id} done, reported = {reported}.")
+
+    def _heartbeat(self, task_id: int, done: threading.Event):
+        """Extend the lease of a running task every third of the lease, until it is done or the lease is lost."""
+        while not done.wait(self.task_queue.lease_seconds / 3):
+            if not self.task_queue.heartbeat(task_id, self.worker_id):
+                if self.verbose:
+                    print(f"[Worker: {self.worker_id}] -> Lost the lease of task {task_id}.")
+                return
+
+
+def main(argv: list = None) -> int:
+    """
+    Run a worker of a task queue: python -m data_factory.task_queue <database> [options].
+
+    Parameters:
+    - argv (list, optional): Command line arguments, defaults to sys.argv.
+
+    Returns:
+    int: The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m data_factory.task_queue")
+    parser.add_argument("database", help="Path of the SQLite task queue.")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--lease-seconds", type=float, default=60.0)
+    parser.add_argument("--max-tasks", type=int, default=None)
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Exit after the queue was empty this long.")
+    parser.add_argument("--poll-seconds", type=float, default=1.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    worker = TaskWorker(
+        SqliteTaskQueue(args.database, lease_seconds=args.lease_seconds),
+        worker_id=args.worker_id,
+        poll_seconds=args.poll_seconds,
+        verbose=args.verbose,
+    )
+    worker.run(max_tasks=args.max_tasks, idle_timeout=args.idle_timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""Unit tests for the ActivityResultCache class."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from data_factory.cache import ActivityResultCache
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+
+
+def square(value: int) -> dict:
+    """Example deterministic action."""
+    square.calls += 1
+    return {"df_spark": value * value}
+
+
+square.calls = 0
+
+# Parameters whose pickles differ between processes, sets being pickled in hash order
+SET_PARAMETERS = {
+    "tables": {"orders", "customers", "products", "invoices", "payments"},
+    "options": {"when": datetime(2024, 2, 24, tzinfo=timezone.utc), "keys": frozenset({"id", "day"}), "limit": 2.5},
+}
+
+
+class TestActivityResultCache:
+    """Test suite for the ActivityResultCache class."""
+
+    def test_fingerprint(self):
+        """Test that the fingerprint depends on the parameters and the code of the action."""
+
+        def cube(value: int) -> int:
+            return value**3
+
+        key = ActivityResultCache.fingerprint(square, {"value": 2})
+        assert key == ActivityResultCache.fingerprint(square, {"value": 2})
+        assert key != ActivityResultCache.fingerprint(square, {"value": 3})
+        assert key != ActivityResultCache.fingerprint(cube, {"value": 2})
+        assert ActivityResultCache.fingerprint(square, {"value": lambda: 0}) is None
+
+        cube_key = ActivityResultCache.fingerprint(cube, {"value": 2})
+        cube.cache_version = "v2"
+        assert ActivityResultCache.fingerprint(cube, {"value": 2}) != cube_key
+
+    def test_fingerprint_is_stable_across_processes(self):
+        """Test that set parameters get the same key under different hash seeds, unsupported values none."""
+        script = (
+            "from data_factory.cache import ActivityResultCache\n"
+            "from data_factory.tests.unit.cache.test_cache import SET_PARAMETERS, square\n"
+            "print(ActivityResultCache.fingerprint(square, SET_PARAMETERS))\n"
+        )
+        keys = {
+            subprocess.run(
+                [sys.executable, "-c", script],
+                env={**os.environ, "PYTHONHASHSEED": seed},
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            for seed in ("1", "2", "3")
+        }
+        assert keys == {ActivityResultCache.fingerprint(square, SET_PARAMETERS)}
+        assert ActivityResultCache.fingerprint(square, {"value": {1: "a"}}) != ActivityResultCache.fingerprint(
+            square, {"value": {True: "a"}}
+        )
+        assert ActivityResultCache.fingerprint(square, {"value": object()}) is None
+
+    def test_fingerprint_covers_closures_and_defaults(self, tmp_path):
+        """Test that closures of one factory capturing different values do not share cached results."""
+
+        def make_action(offset: int):
+            def action(df_spark: int = 0) -> dict:
+                return {"df_spark": df_spark + offset}
+
+            return action
+
+        first, second = make_action(1), make_action(2)
+        assert ActivityResultCache.fingerprint(first, {}) != ActivityResultCache.fingerprint(second, {})
+        assert ActivityResultCache.fingerprint(first, {}) == ActivityResultCache.fingerprint(make_action(1), {})
+
+        def with_default(value: int = 1) -> dict:
+            return {"df_spark": value}
+
+        key = ActivityResultCache.fingerprint(with_default, {})
+        with_default.__defaults__ = (2,)
+        assert ActivityResultCache.fingerprint(with_default, {}) != key
+
+        lock = threading.Lock()
+        assert ActivityResultCache.fingerprint(lambda: lock, {}) is None
+
+        cache = ActivityResultCache(disk_path=str(tmp_path))
+        activities = [Activity("first", first, cache=cache), Activity("second", second, cache=cache)]
+        assert activities[0].run() == {"df_spark": 1}
+        assert activities[1].run() == {"df_spark": 2}
+        assert not activities[1].get_cache_hit()
+
+    def test_lru_and_ttl_eviction(self):
+        """Test eviction of the least recently used entries and of expired entries."""
+        cache = ActivityResultCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == (True, 1)
+        cache.set("c", 3)
+        assert cache.get("b") == (False, None)
+        assert cache.get("a") == (True, 1)
+        assert len(cache) == 2
+
+        cache = ActivityResultCache(ttl_seconds=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") == (False, None)
+
+    def test_disk_tier(self, tmp_path):
+        """Test that results stored on disk are found by another cache instance."""
+        ActivityResultCache(disk_path=str(tmp_path)).set("ab12", {"df_spark": 1})
+        cache = ActivityResultCache(disk_path=str(tmp_path))
+        assert cache.get("ab12") == (True, {"df_spark": 1})
+        assert cache.get("cd34") == (False, None)
+
+    def test_cached_activity(self, tmp_path):
+        """Test that a re-run pipeline skips the action of a cached activity and reports the cache hit."""
+        cache = ActivityResultCache(disk_path=str(tmp_path))
+        calls = square.calls
+
+        for expected_cache_hit in (False, True):
+            activity = Activity("square", square, parameters={"value": 3}, cache=cache)
+            my_pipeline = Pipeline("my_pipeline", activities=[activity])
+            my_pipeline.run()
+            assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+            assert activity.get_cache_hit() == expected_cache_hit
+            cache.clear()
+
+        assert square.calls == calls + 1
@@ -0,0 +1,202 @@
+"""Unit tests for cooperative cancellation and fail-fast orchestration."""
+
+import asyncio
+import pickle
+import threading
+import time
+import pytest
+from data_factory.cancellation import CancellationToken, OperationCanceledError
+from data_factory.pipeline import Activity, DependencyCondition, Pipeline, PipelineFailureReason, PipelineRunStatus, TimeoutMode
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+
+CALLS = []
+
+
+def poll_until_canceled(cancellation_token: CancellationToken) -> dict:
+    """Work in small steps until the run is canceled."""
+    while not cancellation_token.wait(0.01):
+        pass
+    cancellation_token.raise_if_canceled()
+    return {}
+
+
+def sleep(seconds: float) -> dict:
+    """Sleep without polling the token."""
+    time.sleep(seconds)
+    CALLS.append(seconds)
+    return {}
+
+
+def fail() -> dict:
+    """Action always failing."""
+    raise ValueError("source unavailable")
+
+
+def record(name: str) -> dict:
+    """Record the call."""
+    CALLS.append(name)
+    return {}
+
+
+def cancel_later(token: CancellationToken, seconds: float = 0.1) -> threading.Timer:
+    """Cancel the token from another thread."""
+    timer = threading.Timer(seconds, token.cancel, args=("stopped by test",))
+    timer.start()
+    return timer
+
+
+def test_polling_action_cancels_sequential_pipeline():
+    """Actions polling the token stop, the pipeline and its pending activities are canceled."""
+    CALLS.clear()
+    token = CancellationToken()
+    pipeline = Pipeline(
+        "sequential",
+        activities=[Activity("poll", poll_until_canceled), Activity("after", record, parameters={"name": "after"})],
+    )
+    cancel_later(token)
+    pipeline.run(cancellation_token=token)
+    assert pipeline.get_run_status() == PipelineRunStatus.CANCELED
+    assert pipeline.get_failure_reason() == PipelineFailureReason.CANCELED
+    assert pipeline.get_failure_message() == "Canceled: stopped by test"
+    assert [activity.get_run_status() for activity in pipeline.activities] == [PipelineRunStatus.CANCELED] * 2
+    assert not CALLS
+
+
+@pytest.mark.parametrize("timeout_mode", [TimeoutMode.THREAD, TimeoutMode.PROCESS])
+def test_running_activities_are_abandoned_in_dag(timeout_mode):
+    """Activities that do not poll the token stop being waited for, their downstream activities are canceled."""
+    CALLS.clear()
+    token = CancellationToken()
+    pipeline = Pipeline(
+        "dag",
+        activities=[
+            Activity("slow", sleep, parameters={"seconds": 5}, timeout_mode=timeout_mode),
+            Activity("quick", record, parameters={"name": "quick"}),
+            Activity("after", record, parameters={"name": "after"}, depends_on={"slow": DependencyCondition.COMPLETED}),
+        ],
+    )
+    cancel_later(token, 0.3)
+    started = time.perf_counter()
+    pipeline.run(cancellation_token=token)
+    assert time.perf_counter() - started < 2
+    statuses = {activity.name: activity.get_run_status() for activity in pipeline.activities}
+    assert statuses == {
+        "slow": PipelineRunStatus.CANCELED,
+        "quick": PipelineRunStatus.SUCCEEDED,
+        "after": PipelineRunStatus.CANCELED,
+    }
+    assert pipeline.get_run_status() == PipelineRunStatus.CANCELED
+    assert CALLS == ["quick"]
+
+
+def test_thread_timeout_cancels_the_run_token():
+    """A THREAD mode timeout cancels the token of the run only, and the abandoned worker does not write back."""
+    token = CancellationToken()
+    stopped = threading.Event()
+
+    def poll(cancellation_token: CancellationToken) -> dict:
+        try:
+            return poll_until_canceled(cancellation_token)
+        finally:
+            stopped.set()
+
+    polling = Activity("polling", poll, timeout_seconds=0.1)
+    polling.cancellation_token = token
+    polling.run()
+    assert polling.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert stopped.wait(5)
+    assert not token.is_canceled
+
+    release = threading.Event()
+
+    def ignore_token() -> dict:
+        release.wait(5)
+        return {}
+
+    ignoring = Activity("ignoring", ignore_token, timeout_seconds=0.1)
+    ignoring.collect_metrics = True
+    ignoring.run()
+    release.set()
+    time.sleep(0.1)
+    assert ignoring.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert ignoring._action_cpu_seconds is None  # pylint: disable=W0212
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_fail_fast_cancels_sibling_pipelines(max_workers):
+    """A failed pipeline cancels the running and pending pipelines, the caller's token stays untouched."""
+    CALLS.clear()
+    caller_token = CancellationToken()
+    pipelines = [
+        Pipeline("failing", activities=[Activity("fail", fail)]),
+        Pipeline("polling", activities=[Activity("poll", poll_until_canceled)]),
+        Pipeline("pending", activities=[Activity("record", record, parameters={"name": "pending"})]),
+    ]
+    orchestrator = PipelineOrchestrator(pipelines)
+    orchestrator.run_pipelines(max_workers=max_workers, cancellation_token=caller_token, fail_fast=True)
+    assert orchestrator.get_run_statuses() == {
+        "failing": PipelineRunStatus.FAILED,
+        "polling": PipelineRunStatus.CANCELED,
+        "pending": PipelineRunStatus.CANCELED,
+    }
+    assert pipelines[1].get_failure_message() == "Canceled: Pipeline 'failing' ended with status Failed."
+    assert not CALLS and not caller_token.is_canceled
+    # The fail-fast token of the run no longer hangs on the caller's token
+    assert not caller_token._callbacks  # pylint: disable=W0212
+
+
+def test_arun_with_canceled_token_cancels_dag_without_running_it():
+    """Async DAG runs whose ready activities are all canceled end as CANCELED instead of waiting on nothing."""
+    CALLS.clear()
+    token = CancellationToken()
+    token.cancel("canceled before the run")
+    pipeline = Pipeline(
+        "async_dag",
+        activities=[
+            Activity("first", record, parameters={"name": "first"}),
+            Activity("second", record, parameters={"name": "second"}, depends_on=["first"]),
+        ],
+    )
+    asyncio.run(pipeline.arun(cancellation_token=token))
+    assert pipeline.get_run_status() == PipelineRunStatus.CANCELED
+    assert [activity.get_run_status() for activity in pipeline.activities] == [PipelineRunStatus.CANCELED] * 2
+    assert not CALLS
+
+    pipelines = [
+        Pipeline("failing", activities=[Activity("fail", fail)]),
+        Pipeline(
+            "dag",
+            activities=[
+                Activity("a", sleep, parameters={"seconds": 0.05}),
+                Activity("b", record, parameters={"name": "b"}, depends_on=["a"]),
+            ],
+        ),
+    ]
+    caller_token = CancellationToken()
+    asyncio.run(PipelineOrchestrator(pipelines).arun(cancellation_token=caller_token, fail_fast=True))
+    assert pipelines[0].get_run_status() == PipelineRunStatus.FAILED
+    assert pipelines[1].get_run_status() == PipelineRunStatus.CANCELED
+    assert not caller_token.is_canceled and not caller_token._callbacks  # pylint: disable=W0212
+
+
+def test_token_links_and_pickles():
+    """Child tokens follow their parent until detached, copies keep the state they were sent with."""
+    parent = CancellationToken()
+    child = CancellationToken(parent=parent)
+    detached = CancellationToken(parent=parent)
+    detached.detach()
+    calls = []
+    unregister = child.on_cancel(lambda: calls.append("unregistered"))
+    unregister()
+    child.on_cancel(lambda: calls.append("child"))
+    child.cancel("child only")
+    assert not parent.is_canceled and calls == ["child"]
+
+    copy = pickle.loads(pickle.dumps(parent))
+    parent.cancel("parent")
+    assert not copy.is_canceled and not detached.is_canceled
+    copy = pickle.loads(pickle.dumps(parent))
+    with pytest.raises(OperationCanceledError, match="Canceled: parent"):
+        copy.raise_if_canceled()
+    parent.on_cancel(lambda: calls.append("late"))
+    assert calls == ["child", "late"]
@@ -0,0 +1,70 @@
+"""Unit tests for checkpointing and resuming pipeline runs."""
+
+import pytest
+from data_factory.checkpoint import CheckpointStore
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+
+
+class TestCheckpointStore:
+    """Test suite for the CheckpointStore class and Pipeline.resume."""
+
+    def test_save_load_clear(self, tmp_path):
+        """Test the round trip of a checkpoint, and that unpicklable outputs are not checkpointed."""
+        store = CheckpointStore(str(tmp_path))
+        assert store.save("my_pipeline", "run1", "activity1", {"a": 1}, {"df_spark": 2})
+        assert not store.save("my_pipeline", "run1", "activity2", {}, {"df_spark": lambda: 0})
+        assert store.load("my_pipeline", "run1") == {
+            "activity1": {"parameters": {"a": 1}, "output": {"df_spark": 2}}
+        }
+
+        store.clear("my_pipeline", "run1")
+        with pytest.raises(ValueError):
+            store.load("my_pipeline", "run1")
+
+    @pytest.mark.parametrize("as_dag", [False, True])
+    def test_resume_failed_run(self, tmp_path, as_dag):
+        """Test that resuming a failed run skips the succeeded activities and restores their output."""
+        calls = []
+        state = {"fail": True}
+
+        def extract(value: int):
+            calls.append("extract")
+            return {"df_spark": value}
+
+        def transform(df_spark: int = 0):
+            calls.append("transform")
+            return {"df_spark": df_spark * 10}
+
+        def load(df_spark: int = 0):
+            calls.append("load")
+            if state["fail"]:
+                raise RuntimeError("load failed")
+            state["loaded"] = df_spark
+
+        depends_on = (lambda name: [name]) if as_dag else (lambda name: None)
+        my_pipeline = Pipeline(
+            "my_pipeline",
+            activities=[
+                Activity("extract", extract, parameters={"value": 4}),
+                Activity("transform", transform, depends_on=depends_on("extract")),
+                Activity("load", load, depends_on=depends_on("transform")),
+            ],
+            checkpoint_store=CheckpointStore(str(tmp_path)),
+        )
+        my_pipeline.run()
+        assert my_pipeline.get_run_status() == PipelineRunStatus.FAILED
+        run_id = my_pipeline.get_run_id()
+
+        state["fail"] = False
+        my_pipeline.resume(run_id)
+
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+        assert my_pipeline.get_run_id() == run_id
+        assert calls == ["extract", "transform", "load", "load"]
+        assert state["loaded"] == 40
+        assert my_pipeline.activities[1].get_run_status() == PipelineRunStatus.SUCCEEDED
+
+    def test_resume_without_store(self):
+        """Test that resuming a pipeline without checkpoint store is rejected."""
+        with pytest.raises(ValueError):
+            Pipeline("my_pipeline").resume("run1")
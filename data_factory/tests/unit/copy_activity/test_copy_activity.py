@@ -0,0 +1,129 @@
+"""Unit tests for the CopyActivity class."""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from data_factory.copy_activity import CopyActivity, CopyMode
+from data_factory.dataset import Dataset, DatasetType
+from data_factory.linked_service import LinkedService, ServiceType
+from data_factory.pipeline import Pipeline, PipelineRunStatus
+
+PAYLOAD = bytes(range(256)) * 1000
+
+PAGES = [b"page-1\n", b"page-2\n", b"page-3\n"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Stand-in HTTP endpoint serving PAYLOAD with Range support, and PAGES."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):  # pylint: disable=C0103
+        """Announce the size of PAYLOAD."""
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.send_header("Accept-Ranges", "bytes" if self.path == "/ranged" else "none")
+        self.end_headers()
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Serve a range of PAYLOAD, all of it, or one page."""
+        parts = urlsplit(self.path)
+        if parts.path == "/pages":
+            number = int(parse_qs(parts.query)["page"][0])
+            body = PAGES[number - 1] if number <= len(PAGES) else b""
+            self._reply(200, body)
+        elif parts.path == "/missing_pages":
+            self._reply(404, b"no such page")
+        elif "Range" in self.headers and parts.path == "/ranged":
+            start, end = self.headers["Range"].removeprefix("bytes=").split("-")
+            with self.server.lock:
+                self.server.range_requests += 1
+            self._reply(206, PAYLOAD[int(start) : int(end) + 1])
+        else:
+            self._reply(200, PAYLOAD)
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+
+@pytest.fixture(name="service")
+def fixture_service():
+    """HttpEndpoint linked service of a local HTTP server, torn down after the test."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.lock = threading.Lock()
+    server.range_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service = LinkedService(
+        "copy_source", f"http://127.0.0.1:{server.server_address[1]}/", ServiceType.HTTP_ENDPOINT
+    )
+    service.server = server
+    yield service
+    server.shutdown()
+    server.server_close()
+
+
+class TestCopyActivity:
+    """Test CopyActivity."""
+
+    def test_ranged_copy(self, service, tmp_path):
+        """Parallel Range requests reassemble the payload in the sink file."""
+        sink = Dataset("sink", str(tmp_path / "<DAY>" / "data.bin"), DatasetType.FILE)
+        activity = CopyActivity(
+            "copy", service, sink, "ranged", block_size=10_000, buffer_size=4096, parameters={"DAY": "mon"}
+        )
+        result = activity.run()
+        assert activity.get_run_status() == PipelineRunStatus.SUCCEEDED
+        assert result["bytes_copied"] == len(PAYLOAD)
+        assert result["throughput_bytes_per_second"] > 0
+        assert (tmp_path / "mon" / "data.bin").read_bytes() == PAYLOAD
+        assert service.server.range_requests == 26
+        assert os.listdir(tmp_path / "mon") == ["data.bin"]
+
+    def test_single_stream_copy(self, service, tmp_path):
+        """Endpoints without Range support are copied as a single stream."""
+        sink = Dataset("sink", str(tmp_path / "data.bin"), DatasetType.FILE)
+        result = CopyActivity("copy", service, sink, "plain", block_size=10_000).run()
+        assert result["bytes_copied"] == len(PAYLOAD)
+        assert (tmp_path / "data.bin").read_bytes() == PAYLOAD
+        assert service.server.range_requests == 0
+
+    def test_paginated_copy(self, service, tmp_path):
+        """Pages are appended in order until the first empty page."""
+        sink = Dataset("sink", str(tmp_path / "pages.txt"), DatasetType.FILE)
+        activity = CopyActivity(
+            "copy", service, sink, "pages", mode=CopyMode.PAGINATED, parallel_copies=2, buffer_size=4
+        )
+        pipeline = Pipeline("copy_pipeline", activities=[activity])
+        pipeline.run()
+        assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+        assert (tmp_path / "pages.txt").read_bytes() == b"".join(PAGES)
+        assert os.listdir(tmp_path) == ["pages.txt"]
+
+    def test_paginated_copy_of_missing_first_page_fails(self, service, tmp_path):
+        """A missing first page fails the copy instead of writing an empty file."""
+        sink = Dataset("sink", str(tmp_path / "pages.txt"), DatasetType.FILE)
+        activity = CopyActivity("copy", service, sink, "missing_pages", mode=CopyMode.PAGINATED, parallel_copies=3)
+        activity.run()
+        assert activity.get_run_status() == PipelineRunStatus.FAILED
+        assert "404" in activity.get_failure_reason()
+        assert not os.listdir(tmp_path)
+
+    def test_failed_copy_keeps_destination(self, service, tmp_path):
+        """A failed copy leaves neither a partial nor a temporary file."""
+        sink = Dataset("sink", str(tmp_path / "data.bin"), DatasetType.FILE)
+        (tmp_path / "data.bin").write_bytes(b"previous")
+        service.properties["max_retries"] = 0
+        activity = CopyActivity("copy", service, sink, "http://127.0.0.1:1/unreachable")
+        activity.run()
+        assert activity.get_run_status() == PipelineRunStatus.FAILED
+        assert os.listdir(tmp_path) == ["data.bin"]
+        assert (tmp_path / "data.bin").read_bytes() == b"previous"
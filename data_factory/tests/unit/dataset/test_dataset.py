@@ -1,6 +1,13 @@
 """Unit tests for the Dataset class."""
 
-from data_factory.dataset import Dataset, DatasetType
+import pytest
+from data_factory.dataset import Dataset, DatasetType, RecordFormat
+
+
+def count_lines(buffer: memoryview) -> tuple:
+    """Module level parser, picklable for process pools."""
+    data = bytes(buffer)
+    return data.count(b"\n"), data.splitlines()[0] if data else b""
 
 
 class TestDataset:
@@ -67,3 +74,67 @@ class TestDataset:
         # Test with a string value
         param_data_location = ds_test_params.build_parametrized_data_location(cik=None)
         assert param_data_location == "Test/api/xbrl/companyfacts/.json"
+
+    def test_partitions_newline_delimited(self, tmp_path):
+        """Test that newline-delimited partitions end on record boundaries and cover the file."""
+        file_path = tmp_path / "events_2024.jsonl"
+        lines = [f'{{"id": {i}, "payload": "{"x" * (i % 37)}"}}\n'.encode() for i in range(1000)]
+        file_path.write_bytes(b"".join(lines))
+
+        dataset = Dataset("events", str(tmp_path / "events_<YEAR>.jsonl"), DatasetType.FILE)
+        ranges = dataset.partitions(num_partitions=7, year=2024)
+
+        assert len(ranges) == 7
+        assert ranges[0][0] == 0 and ranges[-1][1] == file_path.stat().st_size
+        data = file_path.read_bytes()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start and data[end - 1 : end] == b"\n"
+
+        results = dataset.map_partitions(count_lines, num_partitions=7, max_workers=2, year=2024)
+        assert sum(count for count, _ in results) == 1000
+        assert [first for _, first in results][0] == lines[0].rstrip()
+
+    def test_partitions_fixed_width(self, tmp_path):
+        """Test that fixed-width partitions hold whole records."""
+        file_path = tmp_path / "records.dat"
+        file_path.write_bytes(b"abcdefgh" * 10)
+        dataset = Dataset("records", str(file_path), DatasetType.FILE)
+
+        ranges = dataset.partitions(3, RecordFormat.FIXED_WIDTH, record_length=8)
+        assert ranges == [(0, 24), (24, 48), (48, 80)]
+
+        with pytest.raises(ValueError):
+            dataset.partitions(3, RecordFormat.FIXED_WIDTH, record_length=7)
+
+    def test_expand_data_locations(self, tmp_path):
+        """Test expanding a parameter grid, and dropping locations that do not exist."""
+        dataset = Dataset(
+            "events",
+            str(tmp_path / "<REGION>" / "events_<DATE>_<HOUR>.json"),
+            DatasetType.FILE,
+        )
+        locations = dataset.expand_data_locations(
+            {"date": ["20240101", "20240102"], "region": ["eu", "us"], "hour": range(2)}
+        )
+        assert len(locations) == 8
+        assert locations[0] == str(tmp_path / "eu" / "events_20240101_.json")
+        assert locations[-1] == str(tmp_path / "us" / "events_20240102_1.json")
+        assert locations[1] == dataset.build_parametrized_data_location(
+            region="eu", date="20240101", hour=1
+        )
+
+        (tmp_path / "eu").mkdir()
+        (tmp_path / "eu" / "events_20240102_1.json").write_text("{}")
+        assert dataset.expand_data_locations(
+            {"date": ["20240101", "20240102"], "region": ["eu", "us"], "hour": [1]},
+            existing_only=True,
+        ) == [str(tmp_path / "eu" / "events_20240102_1.json")]
+
+        # The cached listing is refreshed once the directory changes
+        (tmp_path / "eu" / "events_20240101_1.json").write_text("{}")
+        assert len(
+            dataset.expand_data_locations(
+                {"date": ["20240101", "20240102"], "region": ["eu"], "hour": [1]},
+                existing_only=True,
+            )
+        ) == 2
@@ -0,0 +1,144 @@
+"""Unit tests for declarative definitions, lazy actions and the cached config."""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import pytest
+from data_factory.activity import LazyAction
+from data_factory.copy_activity import CopyActivity
+from data_factory.definitions import DefinitionLoader, load_definitions
+from data_factory.pipeline import DependencyCondition, PipelineRunStatus
+from data_factory.utils import Utils
+
+ACTION_MODULE = '''
+def add(a, b, df_spark=0):
+    return {"df_spark": a + b + df_spark}
+'''
+
+
+@pytest.fixture(name="action_module")
+def fixture_action_module(tmp_path, monkeypatch):
+    """Importable module of actions, not imported yet."""
+    (tmp_path / "definition_actions.py").write_text(ACTION_MODULE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "definition_actions"
+    sys.modules.pop("definition_actions", None)
+
+
+def test_json_definitions_import_actions_lazily(tmp_path, action_module):
+    """Pipelines load without importing their actions, which are imported on the first run."""
+    definitions = {
+        "linked_services": [
+            {"name": "api", "connection_string": "http://127.0.0.1:1/", "service_type": "HttpEndpoint"}
+        ],
+        "datasets": [{"name": "raw", "data_location": str(tmp_path / "raw.bin"), "dataset_type": "File"}],
+        "pipelines": [
+            {
+                "name": "daily",
+                "parameters": {"b": 10},
+                "activities": [
+                    {"name": "first", "action": f"{action_module}.add", "parameters": {"a": 1, "b": 2}},
+                    {"name": "second", "action": f"{action_module}:add", "parameters": {"a": 0, "b": 0}},
+                ],
+            },
+            {
+                "name": "copy",
+                "activities": [
+                    {"name": "extract", "type": "Copy", "source": "api", "sink": "raw", "mode": "Paginated"},
+                    {"name": "after", "action": f"{action_module}.add", "depends_on": {"extract": "Failed"}},
+                ],
+            },
+        ],
+    }
+    path = tmp_path / "daily.json"
+    path.write_text(json.dumps(definitions), encoding="utf-8")
+
+    pipelines = load_definitions(str(path))
+    assert sorted(pipelines) == ["copy", "daily"]
+    assert action_module not in sys.modules
+    assert isinstance(pipelines["copy"].activities[0], CopyActivity)
+    assert pipelines["copy"].activities[1].depends_on == {"extract": (DependencyCondition.FAILED,)}
+
+    daily = pipelines["daily"]
+    daily.run()
+    assert daily.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert action_module in sys.modules
+    assert daily.activities[1].parameters["df_spark"] == 11
+
+
+def test_yaml_directory_cross_references(tmp_path):
+    """Definitions of a directory may refer to linked services and datasets of other files."""
+    pytest.importorskip("yaml")
+    (tmp_path / "a_pipelines.yaml").write_text(
+        "pipelines:\n"
+        "  - name: copy_pipeline\n"
+        "    activities:\n"
+        "      - {name: extract, type: Copy, source: api, sink: raw}\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "b_sources.yml").write_text(
+        "linked_services:\n"
+        "  - {name: api, connection_string: 'http://127.0.0.1:1/', service_type: HttpEndpoint}\n"
+        "datasets:\n"
+        f"  - {{name: raw, data_location: '{tmp_path / 'raw.bin'}', dataset_type: File}}\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "notes.txt").write_text("not a definition", encoding="utf-8")
+    loader = DefinitionLoader()
+    pipelines = loader.load(str(tmp_path))
+    assert list(pipelines) == ["copy_pipeline"]
+    assert pipelines["copy_pipeline"].activities[0].parameters["source"] is loader.linked_services["api"]
+
+
+def test_invalid_definitions():
+    """Unknown keys, enum values and references are reported with the definition they belong to."""
+    loader = DefinitionLoader()
+    with pytest.raises(ValueError, match="unknown key 'acton'"):
+        loader.load_documents([({"pipelines": [{"name": "p", "activities": [{"name": "a", "acton": "m.f"}]}]}, "x")])
+    with pytest.raises(ValueError, match="Invalid timeout_mode .* 'Fork'"):
+        loader.load_documents(
+            [({"pipelines": [{"name": "p", "activities": [{"name": "a", "action": "m.f", "timeout_mode": "Fork"}]}]}, "x")]
+        )
+    with pytest.raises(ValueError, match="unknown linked service 'missing'"):
+        loader.load_documents(
+            [({"pipelines": [{"name": "p", "activities": [{"name": "a", "type": "Copy", "source": "missing", "sink": "s"}]}]}, "x")]
+        )
+    with pytest.raises(ValueError, match="Invalid action path"):
+        LazyAction("no_module")
+
+
+def test_lazy_action_pickles_as_path(action_module):
+    """Lazy actions are sent to worker processes as their path."""
+    action = LazyAction(f"{action_module}.add")
+    assert action(a=1, b=2) == {"df_spark": 3}
+    copied = pickle.loads(pickle.dumps(action))
+    assert copied.path == action.path
+    assert copied(a=2, b=2) == {"df_spark": 4}
+
+
+def test_config_cached_until_modified(tmp_path, monkeypatch):
+    """The root path is detected once and the config is parsed again only when the file changes."""
+    Utils.clear_cache()
+    calls = []
+    check_output = subprocess.check_output
+
+    def counting_check_output(*args, **kwargs):
+        calls.append(args)
+        return check_output(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "check_output", counting_check_output)
+    assert Utils.get_root_path() == Utils.get_root_path()
+    assert len(calls) == 1
+
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"version": "1"}), encoding="utf-8")
+    config = Utils.get_config(str(config_path))
+    config["version"] = "changed by caller"
+    assert Utils.get_config(str(config_path)) == {"version": "1"}
+    config_path.write_text(json.dumps({"version": "2"}), encoding="utf-8")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert Utils.get_config(str(config_path)) == {"version": "2"}
+    Utils.clear_cache()
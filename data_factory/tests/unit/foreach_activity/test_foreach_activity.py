@@ -0,0 +1,100 @@
+"""Unit tests for the ForEachActivity class."""
+
+import threading
+import time
+import pytest
+from data_factory.dataset import Dataset, DatasetType
+from data_factory.foreach_activity import ForEachActivity
+from data_factory.pipeline import Activity, OutputType, Pipeline, PipelineRunStatus
+
+
+class _Square:
+    """Action squaring its item, recording how many items run at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, item: int, offset: int = 0) -> int:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        if item < 0:
+            raise ValueError("negative item")
+        return item * item + offset
+
+
+def test_items_fan_out_within_batch_count():
+    """Every item runs once on a copy of the inner activity, at most batch_count at once, outputs in order."""
+    square = _Square()
+    inner = Activity("square", square, parameters={"item": None, "offset": 0})
+    for_each = ForEachActivity("square_all", inner, items=list(range(12)), batch_count=3, parameters={"offset": 1})
+    result = for_each.run()
+    assert for_each.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert result["outputs"] == [i * i + 1 for i in range(12)]
+    assert result["statuses"] == ["Succeeded"] * 12
+    assert result["succeeded_count"] == 12
+    assert 1 < square.max_running <= 3
+    assert inner.parameters == {"item": None, "offset": 0}
+    assert inner.get_run_status() is None
+
+
+def test_item_failures():
+    """Failed items are aggregated, and fail the activity unless fail_on_item_failure is unset."""
+    inner = Activity("square", _Square(), parameters={"item": None})
+    lenient = ForEachActivity("lenient", inner, items=[1, -2, 3], fail_on_item_failure=False)
+    result = lenient.run()
+    assert lenient.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert result["failed_count"] == 1
+    assert result["statuses"] == ["Succeeded", "Failed", "Succeeded"]
+    assert result["failures"] == {1: "negative item"}
+
+    strict = ForEachActivity("strict", inner, items=[1, -2, 3])
+    strict.run()
+    assert strict.get_run_status() == PipelineRunStatus.FAILED
+    assert "1 of 3 items failed, item 1 (-2): negative item" in strict.get_failure_reason()
+
+
+def test_sub_pipeline_over_dataset_locations(tmp_path):
+    """Dataset locations are expanded when the activity runs and passed to a sub-pipeline per item."""
+    for region in ("eu", "us"):
+        (tmp_path / f"{region}.txt").write_text(region * 3, encoding="utf-8")
+    dataset = Dataset("regions", str(tmp_path / "<REGION>.txt"), DatasetType.FILE)
+
+    def read_file(path: str) -> dict:
+        with open(path, encoding="utf-8") as f:
+            return {"size": len(f.read())}
+
+    sub_pipeline = Pipeline(
+        "read_region",
+        activities=[Activity("read", read_file, parameters={"path": None}, outputs={"size": OutputType.ANY})],
+        parameters={"path": None},
+    )
+    for_each = ForEachActivity(
+        "read_regions",
+        sub_pipeline,
+        dataset=dataset,
+        parameter_grid={"REGION": ["eu", "us", "asia"]},
+        existing_only=True,
+        item_parameter="path",
+    )
+    result = for_each.run()
+    assert result["item_count"] == 2
+    assert [output["read"]["size"] for output in result["outputs"]] == [6, 6]
+
+
+def test_items_from_upstream_output():
+    """Items bound to a named output of an upstream activity."""
+    listing = Activity("list_items", lambda: {"items": [2, 3]}, outputs={"items": OutputType.ANY})
+    inner = Activity("square", _Square(), parameters={"item": None})
+    for_each = ForEachActivity("square_listed", inner, inputs={"items": "list_items.items"}, batch_count=2)
+    pipeline = Pipeline("listed", activities=[listing, for_each])
+    pipeline.run()
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert pipeline.get_named_outputs()["square_listed"]["outputs"] == [4, 9]
+    with pytest.raises(ValueError, match="exactly one of items"):
+        ForEachActivity("ambiguous", inner, items=[1], inputs={"items": "list_items.items"})
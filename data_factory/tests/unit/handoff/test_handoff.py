@@ -0,0 +1,116 @@
+"""Unit tests for named outputs and their handoff between activities."""
+
+import pytest
+from data_factory.executor import ExecutorType
+from data_factory.handoff import OutputType, SharedBufferHandle, SharedMemoryHandoff
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+
+PAYLOAD_SIZE = 2 << 20
+
+
+def produce(size: int) -> dict:
+    """Module level action producing a large buffer, picklable for process pools."""
+    return {"payload": bytes(range(256)) * (size // 256), "row_count": size}
+
+
+def consume(payload, row_count: int) -> None:
+    """Module level action checking it received the buffer in place, not an unpickled copy."""
+    if not isinstance(payload, memoryview):
+        raise TypeError(f"expected a shared memoryview, got {type(payload).__name__}")
+    if len(payload) != row_count or payload[257] != 1:
+        raise ValueError("corrupted payload")
+
+
+class TestHandoff:
+    """Test suite for named outputs and SharedMemoryHandoff."""
+
+    def test_shared_memory_round_trip(self):
+        """Test exporting a buffer to shared memory, attaching it and freeing it."""
+        result = SharedMemoryHandoff.export_outputs(
+            {"payload": b"abc", "other": 1}, {"payload": OutputType.BYTES}, min_bytes=1
+        )
+        handle = result["payload"]
+        assert isinstance(handle, SharedBufferHandle)
+        assert result["other"] == 1
+        assert bytes(SharedMemoryHandoff.attach(handle)) == b"abc"
+        assert SharedMemoryHandoff.materialize(result) == {"payload": b"abc", "other": 1}
+
+        SharedMemoryHandoff.release_attached()
+        SharedMemoryHandoff.unlink([handle])
+        with pytest.raises(FileNotFoundError):
+            SharedMemoryHandoff.attach(handle)
+
+    def test_named_outputs_sequential(self):
+        """Test binding named outputs by name, and failing activities returning mistyped outputs."""
+        received = {}
+
+        def check(payload, rows):
+            received.update(payload=payload, rows=rows)
+
+        my_pipeline = Pipeline(
+            "my_pipeline",
+            activities=[
+                Activity(
+                    "produce",
+                    produce,
+                    parameters={"size": 512},
+                    outputs={"payload": OutputType.BYTES, "row_count": OutputType.ANY},
+                ),
+                Activity("noop", lambda: None),
+                Activity(
+                    "check",
+                    check,
+                    inputs={"payload": "produce.payload", "rows": "produce.row_count"},
+                ),
+            ],
+        )
+        my_pipeline.run()
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+        assert received["rows"] == 512 and len(received["payload"]) == 512
+
+        mistyped = Activity(
+            "mistyped", produce, parameters={"size": 256}, outputs={"row_count": OutputType.BYTES}
+        )
+        mistyped.run()
+        assert mistyped.get_run_status() == PipelineRunStatus.FAILED
+        assert "expected Bytes" in mistyped.get_failure_reason()
+
+    def test_named_outputs_process_pool(self):
+        """Test that large buffers are handed over through shared memory between worker processes."""
+        my_pipeline = Pipeline(
+            "my_pipeline",
+            activities=[
+                Activity(
+                    "produce",
+                    produce,
+                    parameters={"size": PAYLOAD_SIZE},
+                    outputs={"payload": OutputType.BYTES, "row_count": OutputType.ANY},
+                ),
+                Activity(
+                    "consume",
+                    consume,
+                    depends_on=["produce"],
+                    inputs={"payload": "produce.payload", "row_count": "produce.row_count"},
+                ),
+            ],
+        )
+        my_pipeline.run(max_workers=2, executor_type=ExecutorType.PROCESS)
+        assert my_pipeline.get_failure_message() is None
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+
+        payload = my_pipeline.get_named_outputs()["produce"]["payload"]
+        assert isinstance(payload, bytes) and len(payload) == PAYLOAD_SIZE and payload[257] == 1
+        assert my_pipeline.get_named_outputs()["produce"]["row_count"] == PAYLOAD_SIZE
+
+    def test_invalid_input_bindings(self):
+        """Test that inputs bound to activities which are not upstream are rejected."""
+        producer = Activity("produce", produce, outputs={"payload": OutputType.BYTES})
+        consumer = Activity("consume", consume, inputs={"payload": "produce.payload"}, depends_on=["other"])
+        other = Activity("other", produce)
+        with pytest.raises(ValueError, match="not upstream"):
+            Pipeline("my_pipeline", activities=[producer, consumer, other]).run()
+
+        with pytest.raises(ValueError):
+            Activity("consume", consume, inputs={"payload": "produce"})
+        with pytest.raises(ValueError):
+            Activity("produce", produce, outputs={"payload": bytes})
@@ -86,3 +86,33 @@ def test_import_df_pipeline():
     """
     import_tester = ImportTest("from data_factory import pipeline", "pipeline")
     assert import_tester.import_test()
+
+
+def test_import_df_activity():
+    """
+    Test import for activity in data factory.
+
+    Checks if the module 'activity' can be imported from 'data_factory'.
+    """
+    import_tester = ImportTest("from data_factory import activity", "activity")
+    assert import_tester.import_test()
+
+
+def test_import_df_checkpoint():
+    """
+    Test import for checkpoint in data factory.
+
+    Checks if the module 'checkpoint' can be imported from 'data_factory'.
+    """
+    import_tester = ImportTest("from data_factory import checkpoint", "checkpoint")
+    assert import_tester.import_test()
+
+
+def test_import_df_copy_activity():
+    """
+    Test import for copy activity in data factory.
+
+    Checks if the module 'copy_activity' can be imported from 'data_factory'.
+    """
+    import_tester = ImportTest("from data_factory import copy_activity", "copy_activity")
+    assert import_tester.import_test()
@@ -0,0 +1,141 @@
+"""Unit tests for the pooled HTTP client."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_factory.http_client import HttpConnectionPool, RetryPolicy
+from data_factory.linked_service import LinkedService, ServiceType
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Stand-in HTTP endpoint, keeping connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Answer GET requests according to their path."""
+        server = self.server
+        with server.lock:
+            server.clients.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path == "/flaky" and server.failures > 0:
+                server.failures -= 1
+                self._reply(503, b"unavailable")
+            elif self.path == "/slow":
+                time.sleep(0.05)
+                self._reply(200, b"slow")
+            else:
+                self._reply(200, self.path.encode())
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    """Local HTTP server, torn down after the test."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.lock = threading.Lock()
+    server.clients = set()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _base_url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+class TestHttpConnectionPool:
+    """Test HttpConnectionPool."""
+
+    def test_keep_alive(self, server):
+        """Sequential requests reuse one connection."""
+        pool = HttpConnectionPool(_base_url(server))
+        for i in range(10):
+            response = pool.get(f"item/{i}")
+            assert response.status == 200
+            assert response.body == f"/item/{i}".encode()
+        assert pool.connections_opened == 1
+        assert len(server.clients) == 1
+        pool.close()
+
+    def test_retry(self, server):
+        """Retry statuses are retried with backoff, until the retries are exhausted."""
+        server.failures = 2
+        pool = HttpConnectionPool(_base_url(server), retry_policy=RetryPolicy(backoff_seconds=0.01))
+        assert pool.get("flaky").status == 200
+
+        server.failures = 5
+        pool = HttpConnectionPool(
+            _base_url(server), retry_policy=RetryPolicy(max_retries=1, backoff_seconds=0.01)
+        )
+        assert pool.get("flaky").status == 503
+
+    def test_per_host_limit(self, server):
+        """No more than max_per_host requests are in flight to a host."""
+        pool = HttpConnectionPool(_base_url(server), pool_size=4, max_per_host=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda _: pool.get("slow").status, range(8)))
+        assert statuses == [200] * 8
+        assert server.max_in_flight <= 2
+        assert pool.connections_opened <= 2
+
+    def test_stream(self, server):
+        """Streamed bodies are read in chunks and the connection goes back to the pool."""
+        pool = HttpConnectionPool(_base_url(server))
+        with pool.stream("GET", "chunked/body") as response:
+            assert b"".join(response.iter_chunks(chunk_size=3)) == b"/chunked/body"
+        assert pool.get("again").status == 200
+        assert pool.connections_opened == 1
+
+    def test_async(self, server):
+        """The asyncio client sends its requests through the pool and is shared within an event loop."""
+        service = LinkedService("http_service", _base_url(server), ServiceType.HTTP_ENDPOINT)
+
+        async def fetch_all():
+            client = service.get_async_http_client()
+            assert service.get_async_http_client() is client
+            responses = await asyncio.gather(*(client.get(f"a/{i}") for i in range(5)))
+            return client, responses
+
+        client, responses = asyncio.run(fetch_all())
+        assert [response.body for response in responses] == [f"/a/{i}".encode() for i in range(5)]
+        assert client.pool is service.get_http_client()
+        assert asyncio.run(fetch_all())[0] is not client
+
+    def test_linked_service_client_shared(self, server):
+        """Linked services with the same name and connection string share their pool."""
+        first = LinkedService("shared_service", _base_url(server), ServiceType.HTTP_ENDPOINT)
+        second = LinkedService("shared_service", _base_url(server), ServiceType.HTTP_ENDPOINT)
+        assert first.get_http_client() is second.get_http_client()
+
+    def test_linked_service_client_follows_properties(self, server):
+        """Linked services with other properties, or whose properties changed, get their own pool."""
+        first = LinkedService("rotated_service", _base_url(server), ServiceType.HTTP_ENDPOINT, {"headers": {"A": "1"}})
+        second = LinkedService("rotated_service", _base_url(server), ServiceType.HTTP_ENDPOINT, {"headers": {"A": "2"}})
+        pool = first.get_http_client()
+        assert second.get_http_client() is not pool
+        assert second.get_http_client().headers == {"A": "2"}
+        first.properties["pool_size"] = 1
+        assert first.get_http_client() is not pool
+        assert first.get_http_client().pool_size == 1
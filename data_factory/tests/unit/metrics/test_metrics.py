@@ -0,0 +1,148 @@
+"""Unit tests for the metrics of pipeline runs."""
+
+import io
+import json
+import sys
+import time
+import pytest
+from data_factory.executor import ExecutorType
+from data_factory.metrics import JsonLinesExporter, MetricsExporter, MetricsRecorder, PrometheusTextExporter
+from data_factory.pipeline import Activity, OutputType, Pipeline, PipelineRunStatus
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+
+
+COUNT_OUTPUTS = {"rows_processed": OutputType.ANY, "bytes_processed": OutputType.ANY}
+
+
+def count_rows(n_rows: int) -> dict:
+    """Busy loop over n_rows, reporting them as processed."""
+    total = 0
+    for i in range(n_rows):
+        total += i * i
+    return {"rows_processed": n_rows, "bytes_processed": 8 * n_rows}
+
+
+class TestMetrics:
+    """Test MetricsRecorder and its exporters."""
+
+    def test_sequential_run_metrics(self):
+        """Every activity and the pipeline are recorded once per run, with their measurements."""
+        stream = io.StringIO()
+        prometheus = PrometheusTextExporter()
+        recorder = MetricsRecorder([JsonLinesExporter(stream=stream), prometheus])
+        pipeline = Pipeline(
+            "metrics_pipeline",
+            activities=[
+                Activity("first", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 200_000}),
+                Activity("second", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 10}, timeout_seconds=None),
+            ],
+            metrics_recorder=recorder,
+        )
+        pipeline.run()
+        pipeline.run()
+
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [event["event"] for event in events] == ["activity", "activity", "pipeline"] * 2
+        first = events[0]
+        assert first["activity"] == "first" and first["status"] == PipelineRunStatus.SUCCEEDED.value
+        assert first["rows"] == 200_000 and first["bytes"] == 1_600_000
+        assert first["cpu_seconds"] > 0 and first["wall_seconds"] > 0
+        assert first["process_peak_rss_bytes"] > 0
+        assert events[2]["wall_seconds"] >= first["wall_seconds"]
+
+        text = prometheus.render()
+        assert (
+            'data_factory_activity_runs_total{pipeline="metrics_pipeline",activity="first",status="Succeeded"} 2'
+            in text
+        )
+        assert "# TYPE data_factory_process_peak_rss_bytes gauge" in text
+        assert 'data_factory_pipeline_runs_total{pipeline="metrics_pipeline",status="Succeeded"} 2' in text
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RSS is sampled from /proc")
+    def test_rss_delta_is_measured_per_run(self):
+        """The RSS growth of a run is its own, unlike the process peak left by earlier runs."""
+        activities = [
+            Activity("allocate", lambda: {"df_spark": bytearray(64 << 20)}),
+            Activity("small", lambda df_spark: {"df_spark": len(df_spark)}, parameters={"df_spark": None}),
+        ]
+        recorder = MetricsRecorder([PrometheusTextExporter()])
+        pipeline = Pipeline("rss_pipeline", activities=activities, metrics_recorder=recorder)
+        pipeline.run()
+        allocate, small = (activity.metrics for activity in activities)
+        assert allocate.rss_delta_bytes >= 32 << 20
+        assert small.rss_delta_bytes < 32 << 20
+        assert small.process_peak_rss_bytes >= allocate.rss_delta_bytes
+        with pytest.raises(TypeError):
+            MetricsExporter()  # pylint: disable=E0110
+
+    def test_disabled_metrics(self):
+        """Activities of pipelines without a recorder collect no metrics."""
+        activity = Activity("first", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 10})
+        Pipeline("no_metrics", activities=[activity]).run()
+        assert activity.metrics is None
+
+    def test_dag_process_pool_metrics(self):
+        """Metrics collected in worker processes come back with the outcome, queue wait included."""
+        stream = io.StringIO()
+        activities = [
+            Activity("root", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 10}),
+            Activity("left", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 100_000}, depends_on=["root"]),
+            Activity("right", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 100_000}, depends_on=["root"]),
+        ]
+        pipeline = Pipeline(
+            "dag_metrics",
+            activities=activities,
+            metrics_recorder=MetricsRecorder([JsonLinesExporter(stream=stream)]),
+        )
+        pipeline.run(max_workers=1, executor_type=ExecutorType.PROCESS)
+        assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+        events = {
+            event["activity"]: event
+            for event in map(json.loads, stream.getvalue().splitlines())
+            if event["event"] == "activity"
+        }
+        assert set(events) == {"root", "left", "right"}
+        assert all(event["cpu_seconds"] > 0 for event in events.values())
+        # With one worker, one of the two branches waits for the other
+        assert max(events["left"]["queue_wait_seconds"], events["right"]["queue_wait_seconds"]) > 0
+
+    def test_streaming_queue_wait(self):
+        """A stage waiting for a slow upstream stage records its queue wait."""
+
+        def extract():
+            for i in range(5):
+                time.sleep(0.02)
+                yield i
+
+        def load(chunks):
+            for _ in chunks:
+                pass
+
+        stream = io.StringIO()
+        pipeline = Pipeline(
+            "stream_metrics",
+            activities=[Activity("extract", extract), Activity("load", load)],
+            metrics_recorder=MetricsRecorder([JsonLinesExporter(stream=stream)]),
+        )
+        pipeline.run_streaming(queue_size=1)
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert events[1]["activity"] == "load"
+        assert events[1]["queue_wait_seconds"] >= 0.05
+
+    def test_orchestrator_process_pool_metrics(self):
+        """Pipelines run in worker processes are recorded once, by the orchestrator."""
+        prometheus = PrometheusTextExporter()
+        recorder = MetricsRecorder([prometheus])
+        pipelines = [
+            Pipeline(
+                f"pipeline_{i}",
+                activities=[Activity("work", count_rows, outputs=COUNT_OUTPUTS, parameters={"n_rows": 1000})],
+                metrics_recorder=recorder,
+            )
+            for i in range(2)
+        ]
+        PipelineOrchestrator(pipelines).run_pipelines(max_workers=2, executor_type=ExecutorType.PROCESS)
+        text = prometheus.render()
+        for i in range(2):
+            assert f'data_factory_pipeline_runs_total{{pipeline="pipeline_{i}",status="Succeeded"}} 1' in text
+            assert f'data_factory_activity_rows_total{{pipeline="pipeline_{i}",activity="work",status="Succeeded"}} 1000' in text
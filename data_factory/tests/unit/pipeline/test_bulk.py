@@ -0,0 +1,65 @@
+"""Unit tests for the bulk construction of activities and pipelines."""
+
+import pytest
+from data_factory.foreach_activity import ForEachActivity
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+
+
+def add_numbers(a: int, b: int) -> int:
+    """Module level action."""
+    return a + b
+
+
+def test_bulk_activities_run():
+    """Activities built in bulk carry their own parameters and run state, and run like other activities."""
+    activities = Activity.bulk(
+        [f"add_{i}" for i in range(100_000)],
+        add_numbers,
+        parameters=[{"a": i, "b": 1} for i in range(100_000)],
+    )
+    assert len(activities) == 100_000
+    assert activities[42].parameters == {"a": 42, "b": 1}
+    assert activities[42].run() == 43
+    assert activities[42].get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert activities[43].get_run_status() is None
+
+
+def test_bulk_validation():
+    """Names are validated in one pass and the parameters must match the names."""
+    with pytest.raises(ValueError, match="'Bad_Name' is not in snake_case"):
+        Activity.bulk(["good_name", "Bad_Name"], add_numbers)
+    with pytest.raises(ValueError, match="expected one per activity"):
+        Activity.bulk(["first", "second"], add_numbers, parameters=[{}])
+    with pytest.raises(TypeError, match="ForEachActivity.bulk is not supported"):
+        ForEachActivity.bulk(["first", "second"], add_numbers)
+
+
+def test_bulk_and_copied_activities_match_initialized_ones():
+    """Every slot of activities built in bulk or copied after a run holds what __init__ would have set."""
+    activities = Activity.bulk(["first", "second"], add_numbers, parameters=[{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+    expected = Activity("second", add_numbers, parameters={"a": 3, "b": 4})
+    activities[0].run()
+    copied = activities[0].copy({"a": 3, "b": 4})
+    copied.name = "second"
+    for activity in (activities[1], copied):
+        assert {slot: getattr(activity, slot) for slot in Activity.__slots__} == {
+            slot: getattr(expected, slot) for slot in Activity.__slots__
+        }
+
+
+def test_records_have_slots():
+    """Activities and pipelines are slotted records without a per-instance __dict__."""
+    activity = Activity("activity", add_numbers)
+    pipeline = Pipeline("pipeline", activities=[activity])
+    assert not hasattr(activity, "__dict__")
+    assert not hasattr(pipeline, "__dict__")
+    with pytest.raises(AttributeError):
+        activity.typo = 1  # pylint: disable=E0237
+
+
+def test_bulk_pipelines_duplicate_names():
+    """Duplicate pipeline names among many pipelines are reported."""
+    pipelines = [Pipeline(f"pipeline_{i}") for i in range(50_000)] + [Pipeline("pipeline_7")]
+    with pytest.raises(ValueError, match="pipeline_7"):
+        PipelineOrchestrator(pipelines)
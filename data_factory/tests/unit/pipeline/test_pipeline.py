@@ -1,6 +1,29 @@
 """Test Pipeline and Activity Class."""
 
-from data_factory.pipeline import Pipeline, Activity, PipelineRunStatus
+import asyncio
+import multiprocessing
+import threading
+import time
+import pytest
+from data_factory.executor import ExecutorType
+from data_factory.pipeline import (
+    Pipeline,
+    Activity,
+    PipelineRunStatus,
+    PipelineFailureReason,
+    DependencyCondition,
+    TimeoutMode,
+)
+
+
+def add_numbers(a: int, b: int, df_spark: int = 0) -> dict:
+    """Module level action, picklable for process pools."""
+    return {"df_spark": a + b + df_spark}
+
+
+def sleep_for(seconds: float) -> None:
+    """Module level action, picklable for process pools."""
+    time.sleep(seconds)
 
 
 def test_basic_pipeline_flow():
@@ -40,32 +63,212 @@ def test_basic_pipeline_flow():
     assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
 
 
-# def test_activity_timeout():
-#     def wait_longer_than_timeout(_timeout_seconds:int):
+def test_dag_runs_independent_activities_concurrently():
+    """
+    Test that activities without dependencies between them run at the same time in DAG mode.
+
+    Both extract activities wait on a barrier that only opens when they run concurrently,
+    the load activity depends on both and receives their merged output.
+    """
+    barrier = threading.Barrier(2, timeout=5)
+    loaded = {}
+
+    def extract(value: int):
+        barrier.wait()
+        return {"df_spark": value}
+
+    def load(df_spark):
+        loaded["df_spark"] = df_spark
+
+    extract_a = Activity("extract_a", extract, parameters={"value": 1})
+    extract_b = Activity("extract_b", extract, parameters={"value": 2})
+    load_all = Activity("load_all", load, depends_on=["extract_a", "extract_b"])
+
+    my_pipeline = Pipeline("my_pipeline", activities=[load_all, extract_a, extract_b])
+    my_pipeline.run(max_workers=2)
+
+    assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert extract_a.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert extract_b.get_run_status() == PipelineRunStatus.SUCCEEDED
+    # extract_b is the later entry of depends_on, its output wins the df_spark key
+    assert loaded["df_spark"] == 2
+
+
+def test_dag_dependency_conditions():
+    """
+    Test that Failed and Completed conditions run, and Succeeded conditions skip, after an upstream failure.
+    """
+
+    def failing():
+        raise RuntimeError("boom")
+
+    def noop():
+        return None
+
+    extract = Activity("extract", failing)
+    on_success = Activity("on_success", noop, depends_on=["extract"])
+    on_failure = Activity(
+        "on_failure", noop, depends_on={"extract": DependencyCondition.FAILED}
+    )
+    on_completion = Activity(
+        "on_completion", noop, depends_on={"extract": DependencyCondition.COMPLETED}
+    )
+    after_skip = Activity(
+        "after_skip", noop, depends_on={"on_success": DependencyCondition.SKIPPED}
+    )
+
+    my_pipeline = Pipeline(
+        "my_pipeline",
+        activities=[extract, on_success, on_failure, on_completion, after_skip],
+    )
+    my_pipeline.run()
+
+    assert my_pipeline.get_run_status() == PipelineRunStatus.FAILED
+    assert my_pipeline.get_failure_reason() == PipelineFailureReason.ACTIVITY_FAILED
+    assert my_pipeline.get_failure_message() == "boom"
+    assert on_success.get_run_status() == PipelineRunStatus.SKIPPED
+    assert on_failure.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert on_completion.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert after_skip.get_run_status() == PipelineRunStatus.SUCCEEDED
+
 
-#         # time_st = time.time()
-#         # while time.time() - time_st < _timeout_seconds:
-#         #     print(f"waiting {5} sec with timeout = {_timeout_seconds}...")
-#         #     time.sleep(5)
-#     # Set up the timeout signal
-#         signal.signal(signal.SIGALRM, timeout_handler)
-#         signal.alarm(_timeout_seconds)  # Set the timeout in seconds
+def test_dag_invalid_graphs():
+    """Test that dependency cycles and unknown dependencies are rejected."""
+    activity_a = Activity("activity_a", add_numbers, depends_on=["activity_b"])
+    activity_b = Activity("activity_b", add_numbers, depends_on=["activity_a"])
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline("my_pipeline", activities=[activity_a, activity_b]).run()
 
-#         try:
-#             time_st = time.time()
-#             while time.time() - time_st < _timeout_seconds:
-#                 print(f"waiting {5} sec with timeout = {_timeout_seconds}...")
-#                 time.sleep(5)
-#         finally:
-#             # Reset the alarm
-#             signal.alarm(0)
+    activity_c = Activity("activity_c", add_numbers, depends_on=["missing"])
+    with pytest.raises(ValueError, match="unknown activity"):
+        Pipeline("my_pipeline", activities=[activity_c]).run()
+
+    with pytest.raises(ValueError):
+        Activity("activity_d", add_numbers, depends_on={"activity_a": "Succeeded"})
+
+
+def test_dag_process_pool():
+    """Test running a DAG on a process pool, outcomes are applied back to the original activities."""
+    activity_a = Activity("activity_a", add_numbers, parameters={"a": 1, "b": 2})
+    activity_b = Activity(
+        "activity_b", add_numbers, parameters={"a": 3, "b": 4}, depends_on=["activity_a"]
+    )
+    activity_c = Activity(
+        "activity_c",
+        add_numbers,
+        parameters={"a": 1, "b": None},
+        depends_on=["activity_a"],
+    )
+
+    my_pipeline = Pipeline("my_pipeline", activities=[activity_a, activity_b, activity_c])
+    my_pipeline.run(max_workers=2, executor_type=ExecutorType.PROCESS)
+
+    assert activity_a.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert activity_b.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert activity_b.parameters["df_spark"] == 3
+    assert activity_c.parameters["df_spark"] == 3
+    assert activity_c.get_run_status() == PipelineRunStatus.FAILED
+    assert my_pipeline.get_run_status() == PipelineRunStatus.FAILED
+
+
+def test_activity_timeout():
+    """
+    Test that an activity overrunning its timeout ends with TIMED_OUT and fails its pipeline with TIMEOUT.
+    """
+    release = threading.Event()
+
+    def wait_for_release():
+        release.wait(10)
+
+    activity_to_timeout = Activity(
+        "activity_to_timeout", wait_for_release, timeout_seconds=0.1
+    )
+    my_pipeline = Pipeline("my_pipeline", activities=[activity_to_timeout])
+    my_pipeline.run()
+    release.set()
+
+    assert activity_to_timeout.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert "timed out after 0.1 seconds" in activity_to_timeout.get_failure_reason()
+    assert my_pipeline.get_run_status() == PipelineRunStatus.FAILED
+    assert my_pipeline.get_failure_reason() == PipelineFailureReason.TIMEOUT
+
+
+def test_activity_timeout_process_mode():
+    """
+    Test that a timed out activity running in PROCESS mode has its worker process terminated,
+    and that outputs and failures of PROCESS mode activities are reported back.
+    """
+    activity_to_timeout = Activity(
+        "activity_to_timeout",
+        sleep_for,
+        timeout_seconds=0.2,
+        parameters={"seconds": 30},
+        timeout_mode=TimeoutMode.PROCESS,
+    )
+    time_st = time.time()
+    activity_to_timeout.run()
+    assert time.time() - time_st < 5
+    assert activity_to_timeout.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert not [p for p in multiprocessing.active_children() if p.name == "activity-activity_to_timeout"]
+
+    activity_ok = Activity(
+        "activity_ok",
+        add_numbers,
+        timeout_seconds=10,
+        parameters={"a": 1, "b": 2},
+        timeout_mode=TimeoutMode.PROCESS,
+    )
+    assert activity_ok.run() == {"df_spark": 3}
+    assert activity_ok.get_run_status() == PipelineRunStatus.SUCCEEDED
+
+    activity_failing = Activity(
+        "activity_failing",
+        add_numbers,
+        timeout_seconds=10,
+        parameters={"a": 1, "b": None},
+        timeout_mode=TimeoutMode.PROCESS,
+    )
+    activity_failing.run()
+    assert activity_failing.get_run_status() == PipelineRunStatus.FAILED
+    assert "unsupported operand" in activity_failing.get_failure_reason()
+
+
+def test_async_pipeline():
+    """
+    Test Pipeline.arun with async and sync actions.
+
+    Async activities run concurrently on the event loop bounded by max_concurrency, the sync activity is
+    offloaded to an executor, and an async activity overrunning its timeout ends with TIMED_OUT.
+    """
+    running = {"now": 0, "max": 0}
+
+    async def fetch(value: int):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return {"df_spark": value}
+
+    def load(df_spark):
+        return {"df_spark": df_spark}
+
+    fetches = [Activity(f"fetch_{i}", fetch, parameters={"value": i}) for i in range(20)]
+    load_all = Activity("load_all", load, depends_on=[a.name for a in fetches])
+    my_pipeline = Pipeline("my_pipeline", activities=fetches + [load_all])
+    asyncio.run(my_pipeline.arun(max_concurrency=5))
+
+    assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert running["max"] == 5
+    assert load_all.get_run_status() == PipelineRunStatus.SUCCEEDED
 
-#     # Create activities
-#     activity_to_timeout = Activity("activity_to_timeout", wait_longer_than_timeout, timeout_seconds=0.1)
+    async def hang():
+        await asyncio.sleep(10)
 
-#     # Run the pipeline
-#     activity_to_timeout.run()
+    activity_to_timeout = Activity("activity_to_timeout", hang, timeout_seconds=0.05)
+    my_pipeline = Pipeline("my_pipeline", activities=[activity_to_timeout])
+    asyncio.run(my_pipeline.arun())
+    assert activity_to_timeout.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert my_pipeline.get_failure_reason() == PipelineFailureReason.TIMEOUT
 
-#     # Check the pipeline's run status
-#     print(activity_to_timeout.get_run_status())
-#     print(activity_to_timeout.get_failure_reason())
+    activity_sync_run = Activity("activity_sync_run", fetch, parameters={"value": 1})
+    assert activity_sync_run.run() == {"df_spark": 1}
@@ -1,7 +1,11 @@
 """Unit Tests for PipelineOrchestrator methods"""
 
+import asyncio
 import random
+import re
 import os
+import threading
+from data_factory.executor import ExecutorType
 from data_factory.utils import Utils
 from data_factory.pipeline_orchestrator import PipelineOrchestrator
 from data_factory.pipeline import Pipeline, Activity, PipelineRunStatus
@@ -87,3 +91,95 @@ def test_basic_pipeline_orchestration():
             )
         results.append(result)
     assert results == expected
+
+
+def fail_if_negative(value: int) -> None:
+    """Module level action, picklable for process pools."""
+    if value < 0:
+        raise ValueError(f"negative value {value}")
+
+
+def test_concurrent_pipeline_orchestration(capsys):
+    """
+    Test running pipelines concurrently on a thread pool.
+
+    Every pipeline waits on a barrier that only opens when all of them run at the same time,
+    and the verbose output of each pipeline is printed as one contiguous block.
+    """
+    barrier = threading.Barrier(3, timeout=5)
+
+    def wait_for_siblings():
+        barrier.wait()
+
+    pipelines = [
+        Pipeline(
+            f"my_pipeline_{i}",
+            activities=[
+                Activity("activity1", wait_for_siblings),
+                Activity("activity2", fail_if_negative, parameters={"value": i}),
+            ],
+        )
+        for i in range(3)
+    ]
+    pipeline_orchestrator = PipelineOrchestrator(pipelines)
+    pipeline_orchestrator.run_pipelines(verbose=True, max_workers=3)
+
+    assert list(pipeline_orchestrator.get_run_statuses().values()) == [
+        PipelineRunStatus.SUCCEEDED for _ in range(3)
+    ]
+    output = capsys.readouterr().out
+    for pipeline in pipelines:
+        block = re.findall(r"\[Pipeline: (my_pipeline_\d)\]", output)
+        start = block.index(pipeline.name)
+        assert set(block[start : start + block.count(pipeline.name)]) == {pipeline.name}
+
+
+def test_process_pool_pipeline_orchestration():
+    """Test running pipelines on a process pool, outcomes are collected back into the run statuses."""
+    pipelines = [
+        Pipeline(
+            f"my_pipeline_{i}",
+            activities=[Activity("activity1", fail_if_negative, parameters={"value": value})],
+        )
+        for i, value in enumerate([1, -1])
+    ]
+    pipeline_orchestrator = PipelineOrchestrator(pipelines)
+    pipeline_orchestrator.run_pipelines(
+        max_workers=2, executor_type=ExecutorType.PROCESS
+    )
+
+    assert pipeline_orchestrator.get_run_statuses() == {
+        "my_pipeline_0": PipelineRunStatus.SUCCEEDED,
+        "my_pipeline_1": PipelineRunStatus.FAILED,
+    }
+    assert pipelines[1].get_failure_message() == "negative value -1"
+    assert pipelines[1].activities[0].get_run_status() == PipelineRunStatus.FAILED
+
+
+def test_async_pipeline_orchestration():
+    """Test PipelineOrchestrator.arun running many pipelines on one event loop with a shared concurrency limit."""
+    running = {"now": 0, "max": 0}
+
+    async def fetch():
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+
+    pipelines = [
+        Pipeline(f"my_pipeline_{i}", activities=[Activity("activity1", fetch)])
+        for i in range(50)
+    ]
+    pipelines.append(
+        Pipeline(
+            "my_pipeline_failing",
+            activities=[Activity("activity1", fail_if_negative, parameters={"value": -1})],
+        )
+    )
+    pipeline_orchestrator = PipelineOrchestrator(pipelines)
+    asyncio.run(pipeline_orchestrator.arun(max_concurrency=10))
+
+    statuses = pipeline_orchestrator.get_run_statuses()
+    assert statuses.pop("my_pipeline_failing") == PipelineRunStatus.FAILED
+    assert set(statuses.values()) == {PipelineRunStatus.SUCCEEDED}
+    assert running["max"] == 10
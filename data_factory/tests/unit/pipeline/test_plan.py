@@ -0,0 +1,83 @@
+"""Unit tests for compiled pipeline plans."""
+
+import pickle
+import pytest
+from data_factory.executor import ExecutorType
+from data_factory.pipeline import Activity, OutputType, Pipeline, PipelineRunStatus
+
+
+def add_numbers(a: int, b: int, df_spark: int = 0) -> dict:
+    """Module level action, picklable for process pools."""
+    return {"df_spark": a + b + df_spark}
+
+
+def maybe_forward(forward: bool) -> dict:
+    """Return df_spark only when asked to."""
+    return {"df_spark": 100} if forward else {}
+
+
+def test_compiled_run_matches_and_does_not_mutate():
+    """Compiled runs bind the same parameters as uncompiled runs, without updating activity.parameters."""
+    activity_a = Activity("activity_a", add_numbers, parameters={"a": 1, "b": 2})
+    activity_b = Activity("activity_b", add_numbers, parameters={"a": 0, "b": 4})
+    my_pipeline = Pipeline("my_pipeline", activities=[activity_a, activity_b], parameters={"a": 10})
+    plan = my_pipeline.compile()
+
+    assert plan.bind("activity_b", {"df_spark": 13}, {}) == {"a": 10, "b": 4, "df_spark": 13}
+    my_pipeline.run()
+    assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert activity_a.parameters == {"a": 1, "b": 2}
+    assert activity_b.parameters == {"a": 0, "b": 4}
+    with pytest.raises(TypeError):
+        plan.bindings["activity_a"].base_parameters["a"] = 5
+
+
+def test_compiled_runs_do_not_leak_state():
+    """An output forwarded in one run is not seen by the next run that does not produce it."""
+    seen = []
+
+    def record(df_spark: int = None):
+        seen.append(df_spark)
+
+    forward = Activity("forward", maybe_forward, parameters={"forward": True})
+    my_pipeline = Pipeline(
+        "my_pipeline", activities=[forward, Activity("record", record)], parameters={"forward": True}
+    )
+    my_pipeline.compile()
+    my_pipeline.run()
+    my_pipeline.parameters["forward"] = False
+    my_pipeline.compile()
+    my_pipeline.run()
+    assert seen == [100, None]
+
+
+def test_compiled_dag_process_pool():
+    """Compiled DAGs run on process pools, with named outputs bound from the plan."""
+    activity_a = Activity(
+        "activity_a", add_numbers, parameters={"a": 1, "b": 2}, outputs={"df_spark": OutputType.ANY}
+    )
+    activity_b = Activity(
+        "activity_b",
+        add_numbers,
+        parameters={"a": 3},
+        depends_on=["activity_a"],
+        inputs={"b": "activity_a.df_spark"},
+    )
+    my_pipeline = Pipeline("my_pipeline", activities=[activity_a, activity_b])
+    plan = my_pipeline.compile()
+    assert plan.is_dag and plan.dag.order == ["activity_a", "activity_b"]
+    assert pickle.loads(pickle.dumps(plan)).bindings["activity_b"].inputs == (
+        ("b", "activity_a", "df_spark"),
+    )
+
+    for _ in range(2):
+        my_pipeline.run(max_workers=2, executor_type=ExecutorType.PROCESS)
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert activity_b.parameters == {"a": 3}
+
+
+def test_compile_validates_dag():
+    """Invalid dependency graphs are rejected when compiling."""
+    activity_a = Activity("activity_a", add_numbers, depends_on=["missing"])
+    with pytest.raises(ValueError, match="unknown activity"):
+        Pipeline("my_pipeline", activities=[activity_a]).compile()
@@ -0,0 +1,136 @@
+"""Unit tests for the profiling of activity runs."""
+
+import os
+import pstats
+import time
+from types import SimpleNamespace
+import pytest
+from data_factory.executor import ExecutorType
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus, TimeoutMode
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+from data_factory.profiling import MAX_STACK_FRAMES, ActivityProfiler, ProfileMode, collapsed_stacks
+
+
+def square_sum(n: int) -> int:
+    """Busy loop summing squares."""
+    return sum(i * i for i in range(n))
+
+
+def summarize(n: int) -> dict:
+    """Sum squares as the output of an activity."""
+    return {"df_spark": square_sum(n)}
+
+
+def build_table(n: int) -> dict:
+    """Allocate a table of n rows, then sum it."""
+    table = [[i, str(i)] for i in range(n)]
+    return {"df_spark": square_sum(len(table))}
+
+
+def fail(n: int) -> dict:
+    """Busy loop, then fail."""
+    square_sum(n)
+    raise ValueError("broken")
+
+
+def profile_files(output_dir, pipeline: Pipeline, activity: str) -> list:
+    """Report files of the last run of an activity, sorted."""
+    directory = os.path.join(output_dir, pipeline.name, pipeline.run_id, activity)
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_cpu_and_memory_reports(tmp_path):
+    """Profiled runs write pstats, collapsed stacks and allocations, failed runs included."""
+    profiler = ActivityProfiler(str(tmp_path), modes=(ProfileMode.CPU, ProfileMode.MEMORY))
+    pipeline = Pipeline(
+        "profiled",
+        activities=[
+            Activity("build", build_table, parameters={"n": 50_000}),
+            Activity("broken", fail, parameters={"n": 10_000}, depends_on=["build"]),
+        ],
+        profiler=profiler,
+    )
+    pipeline.run()
+    assert pipeline.activities[1].get_run_status() == PipelineRunStatus.FAILED
+    expected = ["allocations.txt", "profile.collapsed", "profile.pstats", "profile.txt"]
+    assert profile_files(tmp_path, pipeline, "build") == expected
+    assert profile_files(tmp_path, pipeline, "broken") == expected
+
+    directory = tmp_path / pipeline.name / pipeline.run_id / "build"
+    collapsed = (directory / "profile.collapsed").read_text(encoding="utf-8").splitlines()
+    assert any("build_table (test_profiling.py" in line and "square_sum" in line for line in collapsed)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in collapsed)
+    assert "build_table" in str(pstats.Stats(str(directory / "profile.pstats")).stats)  # pylint: disable=E1101
+    allocations = (directory / "allocations.txt").read_text(encoding="utf-8")
+    assert "Peak traced memory" in allocations and "test_profiling.py" in allocations
+
+
+def test_selection_by_activity_and_sampling(tmp_path):
+    """Only the selected activities are profiled, sampled runs follow the sample rate."""
+    pipeline = Pipeline(
+        "selected",
+        activities=[Activity("first", summarize, parameters={"n": 10}), Activity("second", summarize, parameters={"n": 10})],
+        profiler=ActivityProfiler(str(tmp_path), activities=["second"]),
+    )
+    pipeline.run()
+    assert not profile_files(tmp_path, pipeline, "first")
+    assert profile_files(tmp_path, pipeline, "second")
+
+    sampled = ActivityProfiler(str(tmp_path), sample_rate=0.25, seed=7)
+    selected = [sampled.activity_profile("p", "run", "a") is not None for _ in range(2000)]
+    assert 400 < sum(selected) < 600
+    with pytest.raises(ValueError, match="sample_rate"):
+        ActivityProfiler(str(tmp_path), sample_rate=2)
+
+
+def test_profiling_in_worker_processes(tmp_path):
+    """Actions run in worker processes, by the activity or the orchestrator, write their reports there."""
+    pipeline = Pipeline(
+        "process_timeout",
+        activities=[Activity("worker", square_sum, parameters={"n": 10_000}, timeout_mode=TimeoutMode.PROCESS)],
+    )
+    other = Pipeline("unprofiled", activities=[Activity("work", square_sum, parameters={"n": 10})])
+    orchestrator = PipelineOrchestrator([pipeline, other], profiler=ActivityProfiler(str(tmp_path)))
+    orchestrator.run_pipelines(max_workers=2, executor_type=ExecutorType.PROCESS)
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert profile_files(tmp_path, pipeline, "worker") == ["profile.collapsed", "profile.pstats", "profile.txt"]
+    assert profile_files(tmp_path, other, "work")
+
+
+def test_disabled_profiling(tmp_path):
+    """Pipelines without a profiler leave their activities unprofiled."""
+    pipeline = Pipeline("plain", activities=[Activity("work", square_sum, parameters={"n": 10})])
+    pipeline.run()
+    assert pipeline.activities[0].profile is None
+    assert not os.listdir(tmp_path)
+
+
+def diamond_stats(layers: int, own_time: float = 0.0) -> SimpleNamespace:
+    """
+    Statistics of a root calling two functions, each calling both functions of the next layer, and so on.
+
+    Every layer takes the whole second of the root, the last layer spends it, so the call graph has 2**layers
+    paths. Functions of the other layers spend own_time besides.
+    """
+    root = ("diamond.py", 0, "root")
+    entries = {root: (1, 1, 0.0, 1.0, {})}
+    callers = [root]
+    for layer in range(1, layers + 1):
+        functions = [("diamond.py", layer, f"f{layer}_{j}") for j in range(2)]
+        for function in functions:
+            edge = 0.5 / len(callers)
+            entries[function] = (1, 1, 0.5 if layer == layers else own_time, 0.5, {caller: (1, 1, 0.0, edge) for caller in callers})
+        callers = functions
+    return SimpleNamespace(stats=entries)
+
+
+def test_collapsed_stacks_of_diamond_call_graphs():
+    """Every path of small call graphs is kept, those of diamond-heavy ones are bounded in time and count."""
+    stacks = collapsed_stacks(diamond_stats(8))
+    assert len(stacks) == 2**8
+    assert 999_000 < sum(microseconds for _, microseconds in stacks) <= 1_000_000
+
+    started = time.monotonic()
+    stacks = collapsed_stacks(diamond_stats(60, own_time=0.001))
+    assert time.monotonic() - started < 10
+    assert 0 < len(stacks) <= MAX_STACK_FRAMES
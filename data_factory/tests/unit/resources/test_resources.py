@@ -0,0 +1,164 @@
+"""Unit tests for resource-aware activity scheduling."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from data_factory.cancellation import CancellationToken
+from data_factory.executor import ExecutorType
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+from data_factory.resources import ResourceBudget, ResourceRequest
+
+
+class ConcurrencyProbe:
+    """Track the number of actions running at once, overall and per label."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.order = []
+
+    def action(self, label: str, seconds: float = 0.05) -> dict:
+        """Action sleeping while counted as running under its label and under 'all'."""
+        with self.lock:
+            self.order.append(label)
+            for key in (label, "all"):
+                self.running[key] = self.running.get(key, 0) + 1
+                self.peak[key] = max(self.peak.get(key, 0), self.running[key])
+        time.sleep(seconds)
+        with self.lock:
+            for key in (label, "all"):
+                self.running[key] -= 1
+        return {}
+
+
+def independent(probe: ConcurrencyProbe, specs: list) -> list:
+    """Independent DAG activities, one per (name, label, resources)."""
+    root = Activity("root", lambda: {})
+    return [root] + [
+        Activity(name, probe.action, parameters={"label": label}, depends_on=["root"], resources=resources)
+        for name, label, resources in specs
+    ]
+
+
+def test_dag_packs_activities_against_cpu_and_memory_budgets():
+    """Ready activities run at once only as far as the CPU slots and memory of the budget allow."""
+    probe = ConcurrencyProbe()
+    specs = [(f"small_{i}", "small", ResourceRequest(cpu_slots=1, memory_mb=100)) for i in range(4)]
+    specs += [(f"large_{i}", "large", ResourceRequest(cpu_slots=1, memory_mb=600)) for i in range(2)]
+    budget = ResourceBudget(cpu_slots=3, memory_mb=1000)
+    pipeline = Pipeline("packed", activities=independent(probe, specs), resource_budget=budget)
+    pipeline.run(max_workers=8)
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert probe.peak["all"] == 3
+    assert probe.peak["large"] == 1
+    assert budget.usage() == {"cpu_slots": 0, "memory_mb": 0, "class_slots": {}, "waiting": 0}
+
+
+def test_resource_class_slots_bound_activities_of_the_class():
+    """Activities of a resource class run one at a time while the other activities run alongside them."""
+    probe = ConcurrencyProbe()
+    specs = [(f"call_{i}", "http", ResourceRequest(resource_class="http")) for i in range(3)]
+    specs += [(f"compute_{i}", "compute", None) for i in range(3)]
+    budget = ResourceBudget(class_slots={"http": 1})
+    pipeline = Pipeline("classes", activities=independent(probe, specs), resource_budget=budget)
+    pipeline.run(max_workers=8)
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert probe.peak["http"] == 1
+    assert probe.peak["all"] >= 3
+    assert budget.usage()["class_slots"] == {"http": 0}
+
+
+def test_higher_priority_is_granted_first_and_starving_requests_hold_back_smaller_ones():
+    """Waiting requests are granted by priority, a starving request is not passed over by smaller ones."""
+    probe = ConcurrencyProbe()
+    budget = ResourceBudget(cpu_slots=2, starvation_seconds=0.0)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        with budget.reserve(ResourceRequest(cpu_slots=2)):
+            low = budget.submit(executor, ResourceRequest(priority=0), probe.action, "low", 0.0)
+            high = budget.submit(executor, ResourceRequest(priority=5), probe.action, "high", 0.0)
+            assert budget.usage()["waiting"] == 2
+        low.result(timeout=5)
+        high.result(timeout=5)
+        assert probe.order == ["high", "low"]
+
+        with budget.reserve(ResourceRequest(cpu_slots=1)):
+            large = budget.submit(executor, ResourceRequest(cpu_slots=2), probe.action, "large", 0.0)
+            small = budget.submit(executor, ResourceRequest(cpu_slots=1), probe.action, "small", 0.0)
+            time.sleep(0.05)
+            assert not small.done()
+        large.result(timeout=5)
+        small.result(timeout=5)
+        assert probe.order[2:] == ["large", "small"]
+
+
+def test_request_exceeding_the_budget_is_rejected():
+    """A request that could never be granted raises instead of waiting forever."""
+    budget = ResourceBudget(cpu_slots=2, memory_mb=512, class_slots={"spark": 0})
+    with pytest.raises(ValueError):
+        budget.submit(ThreadPoolExecutor(max_workers=1), ResourceRequest(cpu_slots=4), print)
+    with pytest.raises(ValueError):
+        with budget.reserve(ResourceRequest(memory_mb=1024)):
+            pass
+    with pytest.raises(ValueError):
+        with budget.reserve(ResourceRequest(resource_class="spark")):
+            pass
+    with pytest.raises(ValueError):
+        Activity("invalid", print, resources={"cpu_slots": 1})
+
+
+def test_orchestrator_budget_is_shared_by_concurrent_pipelines():
+    """Sequential pipelines running at once share the budget of their orchestrator."""
+    probe = ConcurrencyProbe()
+    pipelines = [
+        Pipeline(
+            f"pipeline_{i}",
+            activities=[Activity(f"step_{j}", probe.action, parameters={"label": "step"}) for j in range(2)],
+        )
+        for i in range(3)
+    ]
+    orchestrator = PipelineOrchestrator(pipelines, resource_budget=ResourceBudget(cpu_slots=2))
+    orchestrator.run_pipelines(max_workers=3)
+    assert [pipeline.get_run_status() for pipeline in pipelines] == [PipelineRunStatus.SUCCEEDED] * 3
+    assert probe.peak["all"] == 2
+
+
+def square(value: int, df_spark: int = 0) -> dict:
+    """Picklable action for process pools, adding the square of value to the previous output."""
+    return {"df_spark": df_spark + value * value}
+
+
+def test_budget_applies_to_process_pools():
+    """Activities declaring resources are picklable and scheduled on process pools."""
+    activities = [Activity("first", square, parameters={"value": 3}, resources=ResourceRequest(memory_mb=64))]
+    activities.append(Activity("second", square, parameters={"value": 4}, depends_on=["first"]))
+    pipeline = Pipeline("process_budget", activities=activities, resource_budget=ResourceBudget(cpu_slots=1))
+    copy = pipeline.copy()
+    pipeline.run(max_workers=2, executor_type=ExecutorType.PROCESS)
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert copy.resource_budget is pipeline.resource_budget
+    assert copy.activities[0].resources.memory_mb == 64
+
+
+def test_canceling_the_run_withdraws_activities_waiting_for_resources():
+    """Sequential and DAG activities waiting for resources end CANCELED as soon as the run is canceled."""
+    budget = ResourceBudget(cpu_slots=1)
+    probe = ConcurrencyProbe()
+    sequential = Pipeline(
+        "sequential_waiting", activities=[Activity("step", probe.action, parameters={"label": "step"})], resource_budget=budget
+    )
+    dag = Pipeline("dag_waiting", activities=independent(probe, [("step", "step", None)]), resource_budget=budget)
+    with budget.reserve(ResourceRequest()):
+        for pipeline in (sequential, dag):
+            token = CancellationToken()
+            threading.Timer(0.1, token.cancel, args=("Shutting down.",)).start()
+            started = time.monotonic()
+            pipeline.run(max_workers=2, cancellation_token=token)
+            assert time.monotonic() - started < 2
+            assert pipeline.get_run_status() == PipelineRunStatus.CANCELED
+            assert pipeline.activities[0].get_failure_reason() == "Canceled: Shutting down."
+            assert budget.usage()["waiting"] == 0
+    assert "step" not in probe.order
+    assert budget.usage() == {"cpu_slots": 0, "memory_mb": 0, "class_slots": {}, "waiting": 0}
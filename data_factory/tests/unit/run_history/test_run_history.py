@@ -0,0 +1,99 @@
+"""Unit tests for the SQLite run history."""
+
+import time
+import pytest
+from data_factory.metrics import MetricsRecorder
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+from data_factory.run_history import RunHistoryStore
+
+
+def succeed(value: int = 0) -> dict:
+    """Action succeeding with its value."""
+    return {"df_spark": value}
+
+
+def fail() -> dict:
+    """Action always failing."""
+    raise ValueError("source unavailable")
+
+
+def activity_event(run_id: str, activity: str, started_at: float, wall_seconds: float, status: str) -> dict:
+    """Activity event as recorded by MetricsRecorder."""
+    return {
+        "event": "activity",
+        "pipeline": "bulk",
+        "run_id": run_id,
+        "activity": activity,
+        "status": status,
+        "started_at": started_at,
+        "wall_seconds": wall_seconds,
+    }
+
+
+def test_records_pipeline_runs(tmp_path):
+    """Runs recorded through a MetricsRecorder are queryable, including their failures."""
+    with RunHistoryStore(str(tmp_path / "history.db"), flush_seconds=60) as store:
+        recorder = MetricsRecorder([store])
+        good = Pipeline("daily", activities=[Activity("load", succeed)], metrics_recorder=recorder)
+        bad = Pipeline("daily", activities=[Activity("load", fail)], metrics_recorder=recorder)
+        good.run()
+        bad.run()
+
+        last_success = store.last_run("daily", PipelineRunStatus.SUCCEEDED)
+        assert last_success["run_id"] == good.run_id
+        last = store.last_run("daily")
+        assert last["run_id"] == bad.run_id and last["status"] == PipelineRunStatus.FAILED.value
+        assert last["failure_message"]
+        assert store.last_run("weekly") is None
+
+        failed_activity = store.activity_runs(bad.run_id)[0]
+        assert failed_activity["activity"] == "load" and "source unavailable" in failed_activity["failure_reason"]
+        assert len(store.pipeline_runs("daily", status=PipelineRunStatus.FAILED)) == 1
+
+
+def test_history_persists_across_stores(tmp_path):
+    """Closing a store writes its buffered runs, which another store reads."""
+    path = str(tmp_path / "history.db")
+    store = RunHistoryStore(path, flush_seconds=60)
+    Pipeline("daily", activities=[Activity("load", succeed)], metrics_recorder=MetricsRecorder([store])).run()
+    store.close()
+    store.close()
+    with pytest.raises(ValueError, match="closed"):
+        store.export([])
+    with RunHistoryStore(path) as reopened:
+        assert reopened.last_run("daily")["status"] == PipelineRunStatus.SUCCEEDED.value
+
+
+def test_background_writer_flushes_batches(tmp_path):
+    """Buffered rows are written by the background thread once a batch is full."""
+    with RunHistoryStore(str(tmp_path / "history.db"), batch_size=10, flush_seconds=60) as store:
+        now = time.time()
+        store.export([activity_event("r1", "load", now, 1.0, "Succeeded") for _ in range(10)])
+        deadline = time.time() + 5
+        while store._activity_rows and time.time() < deadline:  # pylint: disable=W0212
+            time.sleep(0.01)
+        assert not store._activity_rows  # pylint: disable=W0212
+
+
+def test_duration_percentile_over_many_runs(tmp_path):
+    """Percentiles of an activity's duration are read from the index, only within the time range."""
+    with RunHistoryStore(str(tmp_path / "history.db"), batch_size=50_000) as store:
+        now = time.time()
+        events = [
+            activity_event(f"r{i}", "load", now - i, float(i % 100 + 1), "Succeeded") for i in range(20_000)
+        ]
+        events += [activity_event(f"old{i}", "load", now - 40 * 86400, 1000.0, "Succeeded") for i in range(100)]
+        events += [activity_event(f"f{i}", "load", now, 500.0, "Failed") for i in range(100)]
+        events += [activity_event(f"t{i}", "transform", now, 2.0, "Succeeded") for i in range(1000)]
+        store.export(events)
+        store.flush()
+
+        started = time.perf_counter()
+        assert store.activity_duration_percentile("bulk", "load", 95, days=30) == 95.0
+        assert time.perf_counter() - started < 1.0
+        assert store.activity_duration_percentile("bulk", "load", 100, status=None) == 500.0
+        assert store.activity_duration_percentile("bulk", "load", 100, days=60) == 1000.0
+        assert store.activity_duration_percentile("bulk", "missing") is None
+        with pytest.raises(ValueError, match="percentile"):
+            store.activity_duration_percentile("bulk", "load", 101)
+        assert store.prune(older_than_days=35) == 100
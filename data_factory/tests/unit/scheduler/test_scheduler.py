@@ -0,0 +1,103 @@
+"""Unit tests for triggers and the trigger scheduler."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+from data_factory.scheduler import CronTrigger, IntervalTrigger, Trigger, TriggerScheduler, TumblingWindowTrigger
+
+START = datetime(2024, 2, 24, tzinfo=timezone.utc)  # a Saturday
+
+
+class _WindowRecorder:
+    """Action recording the windows it ran for and how many ran at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = []
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, window_start=None, window_end=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+            self.windows.append((window_start, window_end))
+
+
+def _pipeline(name: str, action) -> Pipeline:
+    return Pipeline(
+        name,
+        activities=[Activity("work", action, parameters={"window_start": None, "window_end": None})],
+    )
+
+
+def test_cron_next_fire_time():
+    """Cron fields, names, steps and the day of month / day of week rule."""
+    pipeline = _pipeline("cron_pipeline", lambda **_: None)
+    business = CronTrigger("business_hours", pipeline, "*/15 9-17 * * mon-fri")
+    assert business.next_fire_time(START) == datetime(2024, 2, 26, 9, 0, tzinfo=timezone.utc)
+    assert business.next_fire_time(datetime(2024, 2, 26, 9, 0, tzinfo=timezone.utc)) == datetime(
+        2024, 2, 26, 9, 15, tzinfo=timezone.utc
+    )
+    assert business.next_fire_time(datetime(2024, 2, 26, 17, 45, tzinfo=timezone.utc)) == datetime(
+        2024, 2, 27, 9, 0, tzinfo=timezone.utc
+    )
+    either_day = CronTrigger("either_day", pipeline, "0 6 13 * fri")
+    assert either_day.next_fire_time(START) == datetime(2024, 3, 1, 6, 0, tzinfo=timezone.utc)
+    monthly = CronTrigger("monthly", pipeline, "@monthly")
+    assert monthly.next_fire_time(START) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+    with pytest.raises(ValueError, match="hour field"):
+        CronTrigger("invalid", pipeline, "0 24 * * *")
+    with pytest.raises(TypeError):
+        Trigger("abstract", pipeline)  # pylint: disable=E0110
+
+
+def test_interval_trigger_coalesces_missed_runs():
+    """Fire times missed between two checks start one run, at the last of them."""
+    trigger = IntervalTrigger("every_hour", _pipeline("interval_pipeline", lambda **_: None), timedelta(hours=1), start_time=START)
+    assert [run.scheduled_time for run in trigger.due_runs(START)] == [START]
+    assert not trigger.due_runs(START + timedelta(minutes=30))
+    runs = trigger.due_runs(START + timedelta(hours=3, minutes=5))
+    assert [run.scheduled_time for run in runs] == [START + timedelta(hours=3)]
+    assert runs[0].parameters["trigger_time"] == START + timedelta(hours=3)
+
+
+def test_tumbling_window_backfill_with_concurrency_caps():
+    """Past windows are backfilled in order, each once, within the per-pipeline and global caps."""
+    recorder = _WindowRecorder()
+    pipeline = _pipeline("window_pipeline", recorder)
+    trigger = TumblingWindowTrigger(
+        "hourly_windows", pipeline, timedelta(hours=1), start_time=START, max_concurrency=2
+    )
+    other = TumblingWindowTrigger(
+        "other_windows", _pipeline("other_pipeline", recorder), timedelta(hours=6), start_time=START
+    )
+    scheduler = TriggerScheduler([trigger, other], max_workers=3)
+    started = scheduler.tick(START + timedelta(hours=12, minutes=1))
+    assert len(started) == 3
+    assert scheduler.wait_idle(timeout=10)
+    scheduler.stop()
+
+    assert len(scheduler.history) == 14
+    assert all(run.run_status == PipelineRunStatus.SUCCEEDED for run in scheduler.history)
+    hourly = sorted(start for start, end in recorder.windows if end - start == timedelta(hours=1))
+    assert hourly == [START + timedelta(hours=i) for i in range(12)]
+    assert recorder.max_running <= 3
+    assert pipeline.activities[0].parameters == {"window_start": None, "window_end": None}
+    assert pipeline.get_run_status() is None
+    assert not scheduler.tick(START + timedelta(hours=12, minutes=2))
+
+
+def test_scheduler_thread():
+    """The scheduler thread checks the triggers until it is stopped."""
+    recorder = _WindowRecorder()
+    trigger = IntervalTrigger("often", _pipeline("often_pipeline", recorder), timedelta(milliseconds=50))
+    with TriggerScheduler([trigger], poll_seconds=0.01) as scheduler:
+        time.sleep(0.3)
+    assert len(scheduler.history) >= 2
+    assert scheduler.history[0].run_status == PipelineRunStatus.SUCCEEDED
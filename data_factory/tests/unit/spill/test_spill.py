@@ -0,0 +1,174 @@
+"""Unit tests for spilling large activity outputs to disk."""
+
+import os
+from datetime import datetime, timedelta, timezone
+from data_factory.checkpoint import CheckpointStore
+from data_factory.dag import ActivityDag, ActivityDagRun
+from data_factory.executor import ExecutorType
+from data_factory.foreach_activity import ForEachActivity
+from data_factory.pipeline import Activity, OutputType, Pipeline, PipelineRunStatus
+from data_factory.scheduler import IntervalTrigger, TriggerScheduler
+from data_factory.spill import SpilledOutput, SpillStore
+
+RECEIVED = {}
+START = datetime(2024, 2, 24, tzinfo=timezone.utc)
+
+
+def produce(size: int) -> dict:
+    """Output a large buffer."""
+    return {"df_spark": b"x" * size}
+
+
+def consume(df_spark) -> dict:
+    """Record the type and size of the buffer received."""
+    RECEIVED["type"] = type(df_spark).__name__
+    RECEIVED["size"] = len(df_spark)
+    return {"size": len(df_spark)}
+
+
+def produce_rows(count: int) -> dict:
+    """Output a large list, spilled as a pickle."""
+    return {"rows": list(range(count))}
+
+
+def count_rows(rows: list) -> dict:
+    """Count the rows received."""
+    return {"df_spark": len(rows)}
+
+
+def spill_files(store: SpillStore, pipeline: Pipeline) -> list:
+    """Spill files of the last run of a pipeline."""
+    directory = os.path.join(store.directory, pipeline.name, pipeline.get_run_id())
+    return os.listdir(directory) if os.path.isdir(directory) else []
+
+
+def test_large_outputs_are_spilled_and_memory_mapped_by_the_consumer(tmp_path):
+    """Outputs over the budget reach the next activity as a memory map of their spill file."""
+    store = SpillStore(str(tmp_path), memory_budget_bytes=1024)
+    pipeline = Pipeline(
+        "spilled",
+        activities=[
+            Activity("produce", produce, parameters={"size": 100_000}),
+            Activity("consume", consume, parameters={"df_spark": None}),
+        ],
+        spill_store=store,
+    )
+    pipeline.compile()
+    pipeline.run()
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert RECEIVED == {"type": "memoryview", "size": 100_000}
+    # Nothing refers to the spilled output once the run is done
+    assert not spill_files(store, pipeline)
+
+
+def test_small_outputs_stay_in_memory_and_other_values_are_pickled(tmp_path):
+    """Values under the budget are not spilled, large non buffer values are measured, spilled and read as pickles."""
+    store = SpillStore(str(tmp_path), memory_budget_bytes=1024)
+    small = store.spill("pipeline", "run", {"df_spark": b"tiny"})
+    assert small == {"df_spark": b"tiny"}
+    spilled = store.spill("pipeline", "run", {"rows": list(range(10_000)), "lock": None})
+    assert isinstance(spilled["rows"], SpilledOutput) and spilled["lock"] is None
+    assert SpillStore.load(spilled["rows"]) == list(range(10_000))
+    assert SpillStore.materialize(spilled) == {"rows": list(range(10_000)), "lock": None}
+    # Containers are measured by their content, not by their shallow size
+    nested = store.spill("pipeline", "run", {"chunks": [bytes([i]) * 1024 for i in range(20)], "tables": {"orders": "y" * 4096}})
+    assert all(isinstance(value, SpilledOutput) for value in nested.values())
+    assert nested["chunks"].nbytes > 20 * 1024
+    assert SpillStore.load(nested["tables"]) == {"orders": "y" * 4096}
+
+
+def test_named_outputs_are_spilled_and_files_are_discarded_by_the_next_run(tmp_path):
+    """Named outputs keep their spill files until the next run of the pipeline starts."""
+    store = SpillStore(str(tmp_path), memory_budget_bytes=1024)
+    pipeline = Pipeline(
+        "named",
+        activities=[
+            Activity("rows", produce_rows, parameters={"count": 10_000}, outputs={"rows": OutputType.ANY}),
+            Activity("count", count_rows, inputs={"rows": "rows.rows"}),
+        ],
+        spill_store=store,
+    )
+    pipeline.run()
+    first_run_id = pipeline.get_run_id()
+    handle = pipeline.get_named_outputs()["rows"]["rows"]
+    assert isinstance(handle, SpilledOutput)
+    assert SpillStore.load(handle) == list(range(10_000))
+    pipeline.run()
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert not os.path.exists(os.path.join(store.directory, "named", first_run_id))
+    assert len(spill_files(store, pipeline)) == 1
+
+
+def test_scheduled_and_for_each_copies_leave_no_spill_files(tmp_path):
+    """Copies run once by a scheduler or a ForEach activity delete their spill files after their run."""
+    store = SpillStore(str(tmp_path), memory_budget_bytes=1024)
+    inner = Pipeline(
+        "inner",
+        activities=[Activity("rows", produce_rows, parameters={"count": 10_000}, outputs={"rows": OutputType.ANY})],
+        spill_store=store,
+    )
+    for_each = ForEachActivity("each", inner, items=[1, 2], parameters={"count": 10_000})
+    result = for_each.run()
+    assert for_each.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert result["outputs"][0]["rows"]["rows"] == list(range(10_000))
+
+    scheduler = TriggerScheduler([IntervalTrigger("every_minute", inner, timedelta(minutes=1), start_time=START)])
+    started = scheduler.tick(START)
+    assert scheduler.wait_idle(timeout=5)
+    scheduler.stop()
+    assert started[0].run_status == PipelineRunStatus.SUCCEEDED
+    assert not [files for _, _, files in os.walk(store.directory) if files]
+
+
+def test_checkpoints_hold_spilled_values(tmp_path):
+    """Checkpoints persist the values of spilled outputs, not their handles."""
+    store = SpillStore(str(tmp_path / "spill"), memory_budget_bytes=1024)
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints"))
+    pipeline = Pipeline(
+        "checkpointed",
+        activities=[Activity("produce", produce, parameters={"size": 4096})],
+        checkpoint_store=checkpoints,
+        spill_store=store,
+    )
+    pipeline.run()
+    saved = checkpoints.load("checkpointed", pipeline.get_run_id())["produce"]["output"]
+    assert saved == {"df_spark": b"x" * 4096}
+
+
+def test_dag_run_releases_outputs_once_downstream_activities_are_done():
+    """Upstream outputs are dropped as soon as the last activity consuming them is done."""
+    activities = [
+        Activity("source", print),
+        Activity("left", print, depends_on=["source"]),
+        Activity("right", print, depends_on=["source"]),
+        Activity("sink", print, depends_on=["left"]),
+    ]
+    dag_run = ActivityDagRun(ActivityDag(activities), PipelineRunStatus.SKIPPED)
+    dag_run.complete("source", PipelineRunStatus.SUCCEEDED, {"df_spark": 1})
+    dag_run.complete("left", PipelineRunStatus.SUCCEEDED, {"df_spark": 2})
+    assert set(dag_run.outputs) == {"source", "left"}
+    dag_run.complete("right", PipelineRunStatus.SUCCEEDED, {"df_spark": 3})
+    assert set(dag_run.outputs) == {"left"}
+    dag_run.complete("sink", PipelineRunStatus.SUCCEEDED, {"df_spark": 4})
+    assert not dag_run.outputs
+
+
+def test_process_pool_activities_read_spilled_outputs(tmp_path):
+    """Worker processes receive the handle and read the spill file themselves."""
+    store = SpillStore(str(tmp_path), memory_budget_bytes=1024)
+    pipeline = Pipeline(
+        "process_spill",
+        activities=[
+            Activity("rows", produce_rows, parameters={"count": 5_000}, outputs={"rows": OutputType.ANY}),
+            Activity("count", count_rows, depends_on=["rows"], inputs={"rows": "rows.rows"}),
+        ],
+        spill_store=store,
+    )
+    pipeline.run(max_workers=2, executor_type=ExecutorType.PROCESS)
+    assert pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert pipeline.activities[1].get_outcome()[0] == PipelineRunStatus.SUCCEEDED
+    store.close()
+    assert os.path.isdir(store.directory)
+    temporary = SpillStore()
+    temporary.close()
+    assert not os.path.exists(temporary.directory)
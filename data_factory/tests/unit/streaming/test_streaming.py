@@ -0,0 +1,87 @@
+"""Unit tests for streaming pipelines."""
+
+import threading
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+
+
+class TestStreamingPipeline:
+    """Test suite for Pipeline.run_streaming."""
+
+    def test_stream_with_backpressure(self):
+        """
+        Test that chunks flow through all stages, and that the queues bound how far the extract runs ahead.
+        """
+        progress = {"extracted": 0, "loaded": 0, "max_ahead": 0}
+        lock = threading.Lock()
+        loaded = []
+
+        def extract(n_chunks: int):
+            for i in range(n_chunks):
+                with lock:
+                    progress["extracted"] += 1
+                    progress["max_ahead"] = max(
+                        progress["max_ahead"], progress["extracted"] - progress["loaded"]
+                    )
+                yield i
+
+        def transform(chunks, factor: int):
+            for chunk in chunks:
+                yield chunk * factor
+
+        def load(chunks):
+            for chunk in chunks:
+                loaded.append(chunk)
+                with lock:
+                    progress["loaded"] += 1
+
+        my_pipeline = Pipeline(
+            "my_pipeline",
+            activities=[
+                Activity("extract", extract, parameters={"n_chunks": 200}),
+                Activity("transform", transform, parameters={"factor": 0}),
+                Activity("load", load),
+            ],
+            parameters={"factor": 3},
+        )
+        my_pipeline.run_streaming(queue_size=2)
+
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
+        assert loaded == [i * 3 for i in range(200)]
+        # 2 chunks per queue, plus one chunk held by each stage
+        assert progress["max_ahead"] <= 2 * 2 + 3
+
+    def test_stream_failure_cancels_other_stages(self):
+        """Test that a failing stage fails the pipeline and cancels the stage blocked upstream of it."""
+
+        def extract():
+            yield from range(1_000_000)
+
+        def load(chunks):
+            for chunk in chunks:
+                if chunk == 10:
+                    raise RuntimeError("load failed")
+
+        extract_activity = Activity("extract", extract)
+        my_pipeline = Pipeline(
+            "my_pipeline", activities=[extract_activity, Activity("load", load)]
+        )
+        my_pipeline.run_streaming(queue_size=4)
+
+        assert my_pipeline.get_run_status() == PipelineRunStatus.FAILED
+        assert my_pipeline.get_failure_message() == "load failed"
+        assert extract_activity.get_run_status() == PipelineRunStatus.CANCELED
+
+    def test_stream_consumer_stops_early(self):
+        """Test that a stage may stop consuming its input early without blocking its upstream stage."""
+
+        def extract():
+            yield from range(1_000_000)
+
+        def head(chunks):
+            return [next(chunks) for _ in range(3)]
+
+        my_pipeline = Pipeline(
+            "my_pipeline", activities=[Activity("extract", extract), Activity("head", head)]
+        )
+        my_pipeline.run_streaming(queue_size=1)
+        assert my_pipeline.get_run_status() == PipelineRunStatus.SUCCEEDED
@@ -0,0 +1,166 @@
+"""Unit tests for the SQLite task queue and its workers."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from data_factory.pipeline import Activity, Pipeline, PipelineRunStatus
+from data_factory.pipeline_orchestrator import PipelineOrchestrator
+from data_factory.status import PipelineFailureReason
+from data_factory.task_queue import SqliteTaskQueue, TaskKind, TaskState, TaskWorker
+
+
+def report_worker(name: str) -> dict:
+    """Return the name and the process running the action."""
+    return {"df_spark": f"{name}:{os.getpid()}"}
+
+
+def sleep_then_report(name: str, seconds: float) -> dict:
+    """Sleep, then return the name and the process running the action."""
+    time.sleep(seconds)
+    return report_worker(name)
+
+
+def fail() -> dict:
+    """Action always failing."""
+    raise ValueError("source unavailable")
+
+
+def build_pipelines(count: int) -> list:
+    """Pipelines of one activity, the last one failing."""
+    pipelines = [
+        Pipeline(f"pipeline_{i}", activities=[Activity("work", report_worker, parameters={"name": f"p{i}"})])
+        for i in range(count - 1)
+    ]
+    pipelines.append(Pipeline("failing", activities=[Activity("work", fail)]))
+    return pipelines
+
+
+def test_worker_processes_run_enqueued_pipelines(tmp_path):
+    """Worker processes started from the command line run the pipelines enqueued by the orchestrator."""
+    path = str(tmp_path / "queue.db")
+    SqliteTaskQueue(path)
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "data_factory.task_queue", path, "--idle-timeout", "5", "--poll-seconds", "0.05"],
+            cwd=os.getcwd(),
+        )
+        for _ in range(2)
+    ]
+    pipelines = build_pipelines(6)
+    orchestrator = PipelineOrchestrator(pipelines)
+    orchestrator.run_distributed(SqliteTaskQueue(path), timeout=60, poll_seconds=0.05)
+    for worker in workers:
+        worker.terminate()
+        worker.wait()
+
+    statuses = orchestrator.get_run_statuses()
+    assert statuses.pop("failing") == PipelineRunStatus.FAILED
+    assert set(statuses.values()) == {PipelineRunStatus.SUCCEEDED}
+    assert pipelines[0].activities[0].get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert pipelines[-1].activities[0].get_failure_reason() == "source unavailable"
+    assert pipelines[0].get_run_id() is not None
+
+
+def test_expired_lease_is_retried(tmp_path):
+    """The task of a worker that stopped heartbeating is leased again, the late result is discarded."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"), lease_seconds=0.1, max_attempts=2)
+    task_id = queue.enqueue_activity(Activity("work", report_worker), {"name": "a"})
+    leased_id, kind, _ = queue.lease("crashed")
+    assert (leased_id, kind) == (task_id, TaskKind.ACTIVITY)
+    assert queue.lease("other") is None
+    time.sleep(0.15)
+
+    assert TaskWorker(queue, worker_id="other").run(max_tasks=1) == 1
+    assert not queue.complete(task_id, "crashed", "late result")
+    task = queue.get(task_id)
+    assert task["state"] == TaskState.SUCCEEDED and task["worker"] == "other" and task["attempts"] == 2
+    outcome, output = task["result"]
+    assert outcome[0] == PipelineRunStatus.SUCCEEDED
+    assert output["df_spark"].startswith("a:")
+
+
+def test_lease_expiring_on_last_attempt_fails_task(tmp_path):
+    """Tasks whose last lease expired fail instead of being leased again."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"), lease_seconds=0.05, max_attempts=1)
+    task_id = queue.enqueue_activity(Activity("work", report_worker), {"name": "a"})
+    queue.lease("crashed")
+    time.sleep(0.1)
+    assert queue.lease("other") is None
+    task = queue.get(task_id)
+    assert task["state"] == TaskState.FAILED and "expired after 1 attempts" in task["error"]
+
+
+def test_heartbeat_keeps_lease_and_timeout(tmp_path):
+    """Heartbeats keep long tasks leased, pipelines not done in time end TIMED_OUT and are canceled."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"), lease_seconds=0.2)
+    slow = Pipeline("slow", activities=[Activity("wait", sleep_then_report, parameters={"name": "s", "seconds": 0.5})])
+    waiting = Pipeline("waiting", activities=[Activity("work", report_worker, parameters={"name": "w"})])
+    worker = TaskWorker(queue, poll_seconds=0.01)
+    thread = threading.Thread(target=worker.run, kwargs={"max_tasks": 1})
+    thread.start()
+    orchestrator = PipelineOrchestrator([slow, waiting])
+    orchestrator.run_distributed(queue, timeout=1.0, poll_seconds=0.02)
+    thread.join()
+
+    assert queue.get(1)["attempts"] == 1
+    assert slow.get_run_status() == PipelineRunStatus.SUCCEEDED
+    assert waiting.get_run_status() == PipelineRunStatus.TIMED_OUT
+    assert waiting.get_failure_reason() == PipelineFailureReason.TIMEOUT
+    assert queue.counts()[TaskState.CANCELED] == 1
+
+
+def test_failed_task_fails_pipeline_with_task_failed_reason(tmp_path):
+    """Pipelines whose task failed on every attempt end FAILED with PipelineFailureReason.TASK_FAILED."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"), lease_seconds=0.05, max_attempts=1)
+    pipeline = Pipeline("crashing", activities=[Activity("work", report_worker, parameters={"name": "c"})])
+
+    def crash_then_work():
+        while queue.lease("crashed") is None:
+            time.sleep(0.01)
+        TaskWorker(queue, poll_seconds=0.01).run(idle_timeout=0.5)
+
+    thread = threading.Thread(target=crash_then_work)
+    thread.start()
+    PipelineOrchestrator([pipeline]).run_distributed(queue, timeout=5, poll_seconds=0.02)
+    thread.join()
+
+    assert pipeline.get_run_status() == PipelineRunStatus.FAILED
+    assert pipeline.get_failure_reason() == PipelineFailureReason.TASK_FAILED
+    assert "expired after 1 attempts" in pipeline.get_failure_message()
+
+
+def test_unloadable_payload_fails_task_and_worker_keeps_running(tmp_path):
+    """A payload the worker cannot unpickle fails its task, the worker goes on with the next task."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"))
+    broken_id = queue.enqueue_activity(Activity("broken", report_worker), {"name": "b"})
+    queue._transaction("UPDATE tasks SET payload = ? WHERE id = ?", (b"not a pickle", broken_id))  # pylint: disable=W0212
+    task_id = queue.enqueue_activity(Activity("work", report_worker), {"name": "a"})
+
+    assert TaskWorker(queue, poll_seconds=0.01).run(max_tasks=1, idle_timeout=0.5) == 1
+    broken = queue.get(broken_id)
+    assert broken["state"] == TaskState.FAILED and "could not be loaded" in broken["error"]
+    assert queue.get(task_id)["state"] == TaskState.SUCCEEDED
+
+
+def test_worker_dying_on_last_attempt_fails_task_without_other_workers(tmp_path):
+    """A task whose worker died on its last attempt fails while waiting, no live worker needs to lease it."""
+    queue = SqliteTaskQueue(str(tmp_path / "queue.db"), lease_seconds=0.05, max_attempts=1)
+    task_id = queue.enqueue_activity(Activity("work", report_worker), {"name": "a"})
+    queue.lease("crashed")
+    done = queue.wait([task_id], timeout=1, poll_seconds=0.01)
+    assert done[task_id]["state"] == TaskState.FAILED and "expired after 1 attempts" in done[task_id]["error"]
+
+    pipeline = Pipeline("orphaned", activities=[Activity("work", report_worker, parameters={"name": "o"})])
+
+    def crash():
+        while queue.lease("crashed") is None:
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=crash)
+    thread.start()
+    PipelineOrchestrator([pipeline]).run_distributed(queue, poll_seconds=0.02)
+    thread.join()
+    assert pipeline.get_run_status() == PipelineRunStatus.FAILED
+    assert pipeline.get_failure_reason() == PipelineFailureReason.TASK_FAILED
@@ -26,3 +26,14 @@ class TestStringUtils:
         input_string = "Invalid_Snake_Case"
         result = StringUtils.validate_snake_case(input_string)
         assert not result
+
+    @staticmethod
+    def test_invalid_snake_case() -> None:
+        """Test the invalid_snake_case function returns the invalid strings in order."""
+        assert not StringUtils.invalid_snake_case(["a", "b_1", "c2_d"])
+        assert StringUtils.invalid_snake_case(["ok", "Not_Ok", "_x", "y_", "ok_2", "a__b"]) == [
+            "Not_Ok",
+            "_x",
+            "y_",
+            "a__b",
+        ]
@@ -2,3 +2,4 @@
 
 from .validation_utils import StringUtils
 from .general_utils import Utils
+from .file_utils import FileUtils
@@ -0,0 +1,153 @@
+""" File Utilities for data factory """
+
+import mmap
+import os
+
+
+class FileUtils:
+    """Utility class for listing and reading local files."""
+
+    # Directory path -> (modification time, file names), revalidated against the directory modification time
+    _directory_listings = {}
+
+    @staticmethod
+    def list_directory(directory: str) -> frozenset:
+        """
+        List the names in a directory, cached until the directory is modified.
+
+        Args:
+            directory (str): Path of the directory.
+
+        Returns:
+            frozenset: The names in the directory, empty if it does not exist.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            FileUtils._directory_listings.pop(directory, None)
+            return frozenset()
+        cached = FileUtils._directory_listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            names = frozenset(os.listdir(directory))
+        except OSError:
+            names = frozenset()
+        FileUtils._directory_listings[directory] = (mtime, names)
+        return names
+
+    @staticmethod
+    def filter_existing(paths: list) -> list:
+        """
+        Keep the paths that exist, listing every parent directory once instead of checking every path.
+
+        Args:
+            paths (list): Paths of files or directories.
+
+        Returns:
+            list: The existing paths, in their original order.
+        """
+        listings = {}
+        existing = []
+        for path in paths:
+            directory, name = os.path.split(path.rstrip("/\\") or path)
+            directory = directory or "."
+            if directory not in listings:
+                listings[directory] = FileUtils.list_directory(directory)
+            if name in listings[directory]:
+                existing.append(path)
+        return existing
+
+    @staticmethod
+    def split_newline_delimited(file_path: str, num_partitions: int) -> list:
+        """
+        Split a newline-delimited file into byte ranges ending on record boundaries.
+
+        The file is memory-mapped, only the bytes around each split point are read.
+
+        Args:
+            file_path (str): Path of the local file.
+            num_partitions (int): Target number of partitions, fewer are returned for small files.
+
+        Returns:
+            list: (start, end) byte ranges covering the file, each holding whole records.
+        """
+        size = os.path.getsize(file_path)
+        if size == 0:
+            return []
+        num_partitions = max(1, min(num_partitions, size))
+        ranges = []
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            for i in range(1, num_partitions):
+                target = max(start, size * i // num_partitions)
+                newline = mm.find(b"\n", target)
+                if newline == -1:
+                    break
+                end = newline + 1
+                if end > start:
+                    ranges.append((start, end))
+                    start = end
+            if start < size:
+                ranges.append((start, size))
+        return ranges
+
+    @staticmethod
+    def split_fixed_width(file_path: str, num_partitions: int, record_length: int) -> list:
+        """
+        Split a fixed-width file into byte ranges holding whole records.
+
+        Args:
+            file_path (str): Path of the local file.
+            num_partitions (int): Target number of partitions, fewer are returned for small files.
+            record_length (int): Length in bytes of every record.
+
+        Raises:
+            ValueError: If record_length is not positive or the file size is not a multiple of it.
+
+        Returns:
+            list: (start, end) byte ranges covering the file, each holding whole records.
+        """
+        if not record_length or record_length < 1:
+            raise ValueError(f"record_length must be a positive integer, got {record_length}.")
+        size = os.path.getsize(file_path)
+        if size % record_length:
+            raise ValueError(
+                f"File size {size} of '{file_path}' is not a multiple of record_length {record_length}."
+            )
+        num_records = size // record_length
+        num_partitions = max(1, min(num_partitions, num_records))
+        bounds = [num_records * i // num_partitions * record_length for i in range(num_partitions + 1)]
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    @staticmethod
+    def parse_partition(file_path: str, start: int, end: int, parser: callable):
+        """
+        Memory-map a file and parse one byte range of it in place.
+
+        The parser receives a memoryview over the mapped range, the range is paged in by the OS as the parser
+        reads it. The parser must not return views of the buffer, which is unmapped once it returns.
+
+        Args:
+            file_path (str): Path of the local file.
+            start (int): Start offset of the range.
+            end (int): End offset of the range, exclusive.
+            parser (callable): Function parsing the bytes of the range.
+
+        Returns:
+            Any: The output of the parser.
+        """
+        with open(file_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        buffer = view[start:end]
+        try:
+            return parser(buffer)
+        finally:
+            buffer.release()
+            view.release()
+            try:
+                mm.close()
+            except BufferError:
+                # The parser kept a view of the buffer, the mapping is released with it
+                pass
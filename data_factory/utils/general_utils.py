@@ -1,15 +1,28 @@
 """ General Utilities for data factory """
 
+import copy
 import json
+import os
 import subprocess
+import threading
 
 
 class Utils:
     """General Utils for data factory"""
 
+    # Working directory -> repo root, git is only asked once per directory
+    _root_paths = {}
+    # Config path -> (modification time, config), revalidated against the file modification time
+    _configs = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def get_root_path(verbose: bool = False) -> str:
-        """Get the root path of the algogrowth app."""
+        """Get the root path of the algogrowth app, detected once per working directory."""
+        cwd = os.getcwd()
+        repo_root = Utils._root_paths.get(cwd)
+        if repo_root is not None:
+            return repo_root
         try:
             # Run 'git rev-parse --show-toplevel' to get the root directory
             repo_root = subprocess.check_output(
@@ -19,15 +32,39 @@ class Utils:
                 print(
                     f"Warning! get_algogrowth_path() -> Detecting repo root @ {repo_root}."
                 )
-            return repo_root
         except subprocess.CalledProcessError:
             # If 'git' command fails, fallback to a default path
-            return "/home/jperod/repos/algogrowth/"
+            repo_root = "/home/jperod/repos/algogrowth/"
+        Utils._root_paths[cwd] = repo_root
+        return repo_root
+
+    @staticmethod
+    def get_config(config_path: str = None) -> dict:
+        """
+        Get the configuration settings for algogrowth app.
+
+        The file is parsed once and cached until it is modified, every call returns its own copy.
+
+        Args:
+            config_path (str, optional): Path of the config file, defaults to config.json at the root path.
+
+        Returns:
+            dict: The configuration settings.
+        """
+        if config_path is None:
+            config_path = f"{Utils.get_root_path()}/config.json"
+        mtime = os.stat(config_path).st_mtime_ns
+        with Utils._lock:
+            cached = Utils._configs.get(config_path)
+            if cached is None or cached[0] != mtime:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    cached = (mtime, json.loads(f.read()))
+                Utils._configs[config_path] = cached
+        return copy.deepcopy(cached[1])
 
     @staticmethod
-    def get_config() -> dict:
-        """Get the configuration settings for algogrowth app."""
-        config_path = f"{Utils.get_root_path()}/config.json"
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.loads(f.read())
-        return config
+    def clear_cache():
+        """Forget the cached root paths and configs."""
+        with Utils._lock:
+            Utils._root_paths.clear()
+            Utils._configs.clear()
@@ -2,6 +2,10 @@
 
 import re
 
+# Snake case allows lowercase letters, numbers, and underscores, and it should not start or end with an underscore.
+SNAKE_CASE_PATTERN = re.compile(r"^[a-z0-9]+(?:_[a-z0-9]+)*$")
+
+
 class StringUtils:
     """Utility class for string validation."""
 
@@ -16,7 +20,18 @@ class StringUtils:
         Returns:
             bool: True if the string is in snake_case, False otherwise.
         """
-        # Use a regular expression to check if the string is in snake_case
-        # Snake case allows lowercase letters, numbers, and underscores, and it should not start or end with an underscore.
-        pattern = re.compile(r"^[a-z0-9]+(?:_[a-z0-9]+)*$")
-        return bool(pattern.match(string))
+        return SNAKE_CASE_PATTERN.match(string) is not None
+
+    @staticmethod
+    def invalid_snake_case(strings: list) -> list:
+        """
+        Find the strings that do not follow the snake_case naming convention, in one pass.
+
+        Args:
+            strings (list): The strings to be validated.
+
+        Returns:
+            list: The strings that are not in snake_case, in their original order.
+        """
+        match = SNAKE_CASE_PATTERN.match
+        return [string for string in strings if match(string) is None]